@@ -3,16 +3,14 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status, APIRouter
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from config import settings
-from db import get_driver, get_session
-from neo4j.exceptions import ServiceUnavailable
 from models import Token, LoginRequest, UserPublic, UserRole, ProviderStatus
+from user_cache import user_cache
+from password_hashing import pwd_context, verify_and_update
+from repositories import Repositories, get_repos
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-# Use PBKDF2-SHA256 to avoid bcrypt backend issues on some Windows setups
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
@@ -31,48 +29,17 @@ def create_access_token(data: dict, expires_minutes: int = settings.jwt_exp_minu
     return jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
-def get_user_by_email(email: str) -> Optional[UserPublic]:
-    # minimal retry for transient Aura connection resets
-    attempts = 0
-    while True:
-        try:
-            with get_session() as session:
-                result = session.run(
-                    """
-                    MATCH (u:User {email: $email})
-                    RETURN u { .id, .role, .email, .contact_number,
-                               .full_name, .address, .shop_name, .shop_address,
-                               .provider_status, .banned, .email_verified,
-                               hashed_password: u.hashed_password } AS user
-                    """,
-                    email=email,
-                )
-                rec = result.single()
-                break
-        except ServiceUnavailable:
-            attempts += 1
-            if attempts >= 2:
-                raise
-            continue
-    if not rec:
-        return None
-    u = rec["user"]
-    public = UserPublic(
-        id=u.get("id"),
-        role=u.get("role"),
-        email=u.get("email"),
-        contact_number=u.get("contact_number"),
-        full_name=u.get("full_name"),
-        address=u.get("address"),
-        shop_name=u.get("shop_name"),
-        shop_address=u.get("shop_address"),
-        provider_status=u.get("provider_status"),
-        banned=u.get("banned"),
-    )
-    return public
+async def get_user_by_email(repos: Repositories, email: str) -> Optional[UserPublic]:
+    found = await repos.users.get_login_record(email)
+    return found[0] if found else None
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), repos: Repositories = Depends(get_repos)) -> UserPublic:
+    return await user_from_token(token, repos)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)) -> UserPublic:
+async def user_from_token(token: str, repos: Repositories) -> UserPublic:
+    """Resolve a bearer token to its user; 401 when the token or user is invalid."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -94,66 +61,54 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> UserPublic:
             email="admin@laundry.com",
             contact_number="N/A",
         )
-    with get_session() as session:
-        rec = session.run(
-            "MATCH (u:User {id: $id}) RETURN u { .id, .role, .email, .contact_number, .full_name, .address, .shop_name, .shop_address, .provider_status, .banned, .is_available } AS user",
-            id=user_id,
-        ).single()
-        if not rec:
-            raise credentials_exception
-        u = rec["user"]
-        return UserPublic(**u)
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    user = await repos.users.get(user_id)
+    if user is None:
+        raise credentials_exception
+    user_cache.put(user)
+    return user
 
 
-@router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    # OAuth2PasswordRequestForm expects username, password
-    email = form_data.username
+async def _authenticate(repos: Repositories, email: str, password: str) -> Token:
     # Hardcoded admin auth
-    if email == "admin@laundry.com" and form_data.password == "admin123":
+    if email == "admin@laundry.com" and password == "admin123":
         access_token = create_access_token({"sub": "admin", "role": UserRole.admin})
         return Token(access_token=access_token)
-    user = get_user_by_email(email)
-    if not user:
+    found = await repos.users.get_login_record(email)
+    if not found:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
+    user, hashed_password = found
     if getattr(user, "banned", False):
         raise HTTPException(status_code=403, detail="User is banned")
     if not getattr(user, "email_verified", False):
         raise HTTPException(status_code=403, detail="Please verify your email before logging in")
-
-    # fetch hashed password separately
-    with get_session() as session:
-        hp = session.run("MATCH (u:User {id: $id}) RETURN u.hashed_password AS hp", id=user.id).single()
-        hashed_password = hp["hp"] if hp else None
-    if not hashed_password or not verify_password(form_data.password, hashed_password):
+    if not hashed_password:
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    valid, new_hash = await verify_and_update(password, hashed_password)
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
+    if new_hash:
+        # Hash parameters changed since this password was stored; upgrade it transparently
+        await repos.users.set_password_hash(user.id, new_hash)
 
     access_token = create_access_token({"sub": user.id, "role": user.role})
     return Token(access_token=access_token)
 
 
+@router.post("/login", response_model=Token)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), repos: Repositories = Depends(get_repos)):
+    # OAuth2PasswordRequestForm expects username, password
+    return await _authenticate(repos, form_data.username, form_data.password)
+
+
 @router.get("/me", response_model=UserPublic)
-def me(current_user: UserPublic = Depends(get_current_user)):
+async def me(current_user: UserPublic = Depends(get_current_user)):
     return current_user
 
 # Optional JSON-based login for clients sending JSON instead of form-url-encoded
 @router.post("/login_json", response_model=Token)
-def login_json(payload: LoginRequest):
+async def login_json(payload: LoginRequest, repos: Repositories = Depends(get_repos)):
     # payload has email & password
-    if payload.email == "admin@laundry.com" and payload.password == "admin123":
-        access_token = create_access_token({"sub": "admin", "role": UserRole.admin})
-        return Token(access_token=access_token)
-    user = get_user_by_email(payload.email)
-    if not user:
-        raise HTTPException(status_code=400, detail="Incorrect email or password")
-    if getattr(user, "banned", False):
-        raise HTTPException(status_code=403, detail="User is banned")
-    if not getattr(user, "email_verified", False):
-        raise HTTPException(status_code=403, detail="Please verify your email before logging in")
-    with get_session() as session:
-        hp = session.run("MATCH (u:User {id: $id}) RETURN u.hashed_password AS hp", id=user.id).single()
-        hashed_password = hp["hp"] if hp else None
-    if not hashed_password or not verify_password(payload.password, hashed_password):
-        raise HTTPException(status_code=400, detail="Incorrect email or password")
-    access_token = create_access_token({"sub": user.id, "role": user.role})
-    return Token(access_token=access_token)
+    return await _authenticate(repos, payload.email, payload.password)
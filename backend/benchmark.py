@@ -0,0 +1,448 @@
+"""Load-test the hot read endpoints against a local Neo4j or the in-memory store.
+
+Seeds a deterministic synthetic graph (every node tagged `bench: true`), then
+drives the FastAPI app - in-process through httpx's ASGI transport by default,
+or a running server with --base-url - at several concurrency levels. For each
+endpoint and level it reports throughput and p50/p95/p99 latency, writes the
+run to JSON, and with --baseline flags regressions against an earlier run.
+
+Point NEO4J_URI/NEO4J_DATABASE at a disposable local database, never Aura
+production. `run --backend memory` instead loads the same graph into the
+in-process repositories (DATA_BACKEND=memory) and needs no database: the gap
+between the two runs is what the network and Neo4j cost. Run from the backend
+directory:
+
+    python benchmark.py seed --customers 2000 --providers 100
+    python benchmark.py run --concurrency 1 8 32 --duration 15
+    python benchmark.py run --backend memory --customers 2000 --providers 100
+    python benchmark.py run --baseline benchmark_results/before.json
+    python benchmark.py reset
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import httpx
+
+from auth import create_access_token
+from config import settings
+from db import close_async_driver, close_driver, get_session, write, write_one
+from models import BookingStatus
+from password_hashing import pwd_context
+from provider_search import SEARCHABLE_LABEL
+from receipt_snapshot import set_snapshot
+
+PH_TZ = ZoneInfo('Asia/Manila')
+
+BENCH_PASSWORD = "bench-password"
+BATCH_SIZE = 5000
+RESULTS_DIR = "benchmark_results"
+ENDPOINTS = ["bookings_mine", "notifications_mine", "auth_login", "providers_search", "receipts_mine"]
+
+_SHOP_WORDS = [
+    "Bubbles", "Fresh", "Clean", "Suds", "Sunshine", "Linen", "Spin", "Rinse",
+    "Sparkle", "Tide", "Breeze", "Lavender", "Cotton", "Express", "Quick", "Wash",
+]
+_CITIES = ["Quezon City", "Makati", "Pasig", "Taguig", "Manila", "Cebu City", "Davao City", "Iloilo City"]
+_STATUSES = [s.value for s in BookingStatus]
+
+
+@dataclass
+class Volumes:
+    providers: int = 50
+    customers: int = 1000
+    categories_per_provider: int = 3
+    bookings_per_customer: int = 20
+    notifications_per_customer: int = 30
+    seed: int = 42
+
+
+# --- Seeding -------------------------------------------------------------------
+
+_SEED_USERS = f"""
+UNWIND $rows AS row
+CREATE (u:User)
+SET u = row, u.bench = true
+FOREACH (_ IN CASE WHEN row.provider_status = 'approved' THEN [1] ELSE [] END | SET u:{SEARCHABLE_LABEL})
+"""
+
+_SEED_CATEGORIES = """
+UNWIND $rows AS row
+MATCH (p:User {id: row.provider_id})
+CREATE (c:Category {id: row.id, name: row.name, pricing_type: row.pricing_type, price: row.price,
+                    min_kilo: row.min_kilo, max_kilo: row.max_kilo, bench: true})-[:OFFERED_BY]->(p)
+"""
+
+_SEED_BOOKINGS = """
+UNWIND $rows AS row
+MATCH (c:User {id: row.customer_id})
+MATCH (p:User {id: row.provider_id})
+MATCH (cat:Category {id: row.category_id})
+CREATE (b:Booking {id: row.id, schedule_at: row.created_at, status: row.status, notes: row.notes,
+                   created_at: row.created_at, weight_kg: row.weight_kg, total_price: row.total_price, bench: true})
+CREATE (b)-[:BY_CUSTOMER]->(c)
+CREATE (b)-[:FOR_PROVIDER]->(p)
+CREATE (b)-[:OF_CATEGORY]->(cat)
+FOREACH (_ IN CASE WHEN row.receipt_id IS NULL THEN [] ELSE [1] END |
+  CREATE (o:Order {id: row.order_id, status: row.status, created_at: row.created_at, bench: true})-[:FROM_BOOKING]->(b)
+  CREATE (r:Receipt {id: row.receipt_id, subtotal: row.total_price, delivery_fee: 0.0,
+                     total: row.total_price, created_at: row.created_at, bench: true})-[:FOR_ORDER]->(o)
+  CREATE (r)-[:FOR_CUSTOMER]->(c)
+  CREATE (r)-[:FOR_PROVIDER]->(p)
+""" + set_snapshot("[{service_id: cat.id, service_name: cat.name, weight_kg: b.weight_kg}]") + """)
+"""
+
+_SEED_NOTIFICATIONS = """
+UNWIND $rows AS row
+MATCH (u:User {id: row.user_id})
+CREATE (n:Notification {id: row.id, type: row.type, message: row.message, created_at: row.created_at,
+                        read: row.read, booking_id: row.booking_id, bench: true})-[:FOR_USER]->(u)
+FOREACH (_ IN CASE WHEN row.read THEN [] ELSE [1] END |
+  SET u.unread_notifications = coalesce(u.unread_notifications, 0) + 1)
+"""
+
+
+def _batches(rows, size: int = BATCH_SIZE):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _write_batches(session, name: str, query: str, rows: list):
+    for batch in _batches(rows):
+        write(session, name, query, rows=batch, timeout=0)
+
+
+def _shop_name(rng: random.Random, i: int) -> str:
+    return f"{rng.choice(_SHOP_WORDS)} {rng.choice(_SHOP_WORDS)} Laundry {i}"
+
+
+def build_graph(volumes: Volumes) -> dict[str, list[dict]]:
+    """Rows for the benchmark graph. Same volumes and seed always produce the same graph."""
+    rng = random.Random(volumes.seed)
+    # One hash for every seeded user: seeding stays fast, logins still pay full verify cost
+    hashed = pwd_context.hash(BENCH_PASSWORD)
+    now = datetime.now(PH_TZ)
+
+    providers = [
+        {
+            "id": f"bench-p{i}",
+            "role": "provider",
+            "email": f"p{i}@bench.laundryapp.com",
+            "contact_number": f"0917{i:07d}",
+            "shop_name": _shop_name(rng, i),
+            "shop_address": f"{rng.randint(1, 999)} Rizal St, {rng.choice(_CITIES)}",
+            "provider_status": "approved",
+            "is_available": True,
+            "banned": False,
+            "email_verified": True,
+            "hashed_password": hashed,
+        }
+        for i in range(volumes.providers)
+    ]
+    customers = [
+        {
+            "id": f"bench-c{i}",
+            "role": "customer",
+            "email": f"c{i}@bench.laundryapp.com",
+            "contact_number": f"0918{i:07d}",
+            "full_name": f"Bench Customer {i}",
+            "address": f"{rng.randint(1, 999)} Mabini St, {rng.choice(_CITIES)}",
+            "banned": False,
+            "email_verified": True,
+            "hashed_password": hashed,
+        }
+        for i in range(volumes.customers)
+    ]
+    categories = []
+    for p in providers:
+        for k in range(volumes.categories_per_provider):
+            per_kilo = rng.random() < 0.5
+            categories.append({
+                "id": f"{p['id']}-cat{k}",
+                "provider_id": p["id"],
+                "name": rng.choice(["Wash & Fold", "Dry Clean", "Wash Dry Press", "Beddings", "Comforter"]),
+                "pricing_type": "per_kilo" if per_kilo else "fixed",
+                "price": float(rng.choice([35, 45, 60, 150, 200, 250])),
+                "min_kilo": None if per_kilo else 1.0,
+                "max_kilo": None if per_kilo else 8.0,
+            })
+    by_provider: dict[str, list[dict]] = {}
+    for cat in categories:
+        by_provider.setdefault(cat["provider_id"], []).append(cat)
+
+    bookings = []
+    notifications = []
+    for c in customers:
+        for k in range(volumes.bookings_per_customer):
+            p = rng.choice(providers)
+            cat = rng.choice(by_provider[p["id"]])
+            weight = round(rng.uniform(1, 12), 1)
+            status = rng.choice(_STATUSES)
+            bid = f"{c['id']}-b{k}"
+            with_receipt = status not in (BookingStatus.pending.value, BookingStatus.rejected.value)
+            bookings.append({
+                "id": bid,
+                "customer_id": c["id"],
+                "provider_id": p["id"],
+                "category_id": cat["id"],
+                "status": status,
+                "notes": None,
+                "created_at": (now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))).isoformat(),
+                "weight_kg": weight,
+                "total_price": cat["price"] * weight if cat["pricing_type"] == "per_kilo" else cat["price"],
+                "order_id": f"{bid}-o" if with_receipt else None,
+                "receipt_id": f"{bid}-r" if with_receipt else None,
+            })
+        for k in range(volumes.notifications_per_customer):
+            notifications.append({
+                "id": f"{c['id']}-n{k}",
+                "user_id": c["id"],
+                "type": "status_update",
+                "message": "Your laundry is now being processed",
+                "created_at": (now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))).isoformat(),
+                "read": rng.random() < 0.7,
+                "booking_id": f"{c['id']}-b{rng.randrange(max(1, volumes.bookings_per_customer))}",
+            })
+
+    return {"users": providers + customers, "categories": categories, "bookings": bookings, "notifications": notifications}
+
+
+def _summary(graph: dict[str, list[dict]]) -> str:
+    return ", ".join(f"{len(rows)} {kind}" for kind, rows in graph.items())
+
+
+def seed(volumes: Volumes):
+    """Write the benchmark graph to Neo4j."""
+    graph = build_graph(volumes)
+    with get_session() as session:
+        _write_batches(session, "bench.seed_users", _SEED_USERS, graph["users"])
+        _write_batches(session, "bench.seed_categories", _SEED_CATEGORIES, graph["categories"])
+        _write_batches(session, "bench.seed_bookings", _SEED_BOOKINGS, graph["bookings"])
+        _write_batches(session, "bench.seed_notifications", _SEED_NOTIFICATIONS, graph["notifications"])
+    print(f"Seeded {_summary(graph)}")
+
+
+def load_memory(volumes: Volumes):
+    """Serve the in-process app from the memory store, loaded with the benchmark graph."""
+    from repositories import memory_store
+
+    settings.data_backend = "memory"
+    graph = build_graph(volumes)
+    memory_store.clear()
+    memory_store.load(**graph)
+    print(f"Loaded {_summary(graph)} into the memory store")
+
+
+def reset():
+    """Delete every node created by seed()."""
+    deleted = 0
+    with get_session() as session:
+        for label in ["Notification", "Receipt", "Order", "Booking", "Category", "User"]:
+            while True:
+                rec = write_one(
+                    session,
+                    "bench.reset",
+                    f"MATCH (n:{label} {{bench: true}}) WITH n LIMIT $limit DETACH DELETE n RETURN count(*) AS c",
+                    limit=BATCH_SIZE,
+                    timeout=0,
+                )
+                if not rec or rec["c"] == 0:
+                    break
+                deleted += rec["c"]
+    print(f"Deleted {deleted} benchmark nodes")
+
+
+# --- Load generation -----------------------------------------------------------
+
+def _auth_header(user_id: str, role: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': user_id, 'role': role}, expires_minutes=24 * 60)}"}
+
+
+def _request(endpoint: str, volumes: Volumes, rng: random.Random) -> tuple[str, str, dict]:
+    c = rng.randrange(volumes.customers)
+    if endpoint == "bookings_mine":
+        return "GET", "/bookings/mine", {"headers": _auth_header(f"bench-c{c}", "customer")}
+    if endpoint == "notifications_mine":
+        return "GET", "/notifications/mine", {"headers": _auth_header(f"bench-c{c}", "customer")}
+    if endpoint == "receipts_mine":
+        return "GET", "/receipts/mine", {"headers": _auth_header(f"bench-c{c}", "customer")}
+    if endpoint == "auth_login":
+        return "POST", "/auth/login_json", {"json": {"email": f"c{c}@bench.laundryapp.com", "password": BENCH_PASSWORD}}
+    if endpoint == "providers_search":
+        return "GET", "/users/providers/search", {"params": {"q": rng.choice(_SHOP_WORDS)[:rng.randint(3, 5)]}}
+    raise ValueError(f"Unknown endpoint {endpoint}")
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def _drive(client: httpx.AsyncClient, endpoint: str, volumes: Volumes, concurrency: int,
+                 duration: float, warmup: float, seed: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    async def worker(n: int):
+        nonlocal errors
+        rng = random.Random(seed * 1000 + n)
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            method, url, kwargs = _request(endpoint, volumes, rng)
+            t0 = time.perf_counter()
+            try:
+                resp = await client.request(method, url, **kwargs)
+                ok = resp.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            t1 = time.perf_counter()
+            if t0 < measure_from:
+                continue
+            if ok:
+                latencies.append(t1 - t0)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - measure_from
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": _percentile(ms, 50),
+        "p95_ms": _percentile(ms, 95),
+        "p99_ms": _percentile(ms, 99),
+        "max_ms": ms[-1] if ms else 0.0,
+    }
+
+
+async def _run(args, volumes: Volumes) -> dict:
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        if args.backend == "memory":
+            load_memory(volumes)
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+    results: dict[str, dict] = {}
+    try:
+        for endpoint in args.endpoints:
+            results[endpoint] = {}
+            for concurrency in args.concurrency:
+                stats = await _drive(client, endpoint, volumes, concurrency, args.duration, args.warmup, volumes.seed)
+                results[endpoint][str(concurrency)] = stats
+                print(
+                    f"{endpoint:<20} c={concurrency:<4} {stats['throughput_rps']:8.1f} req/s  "
+                    f"p50 {stats['p50_ms']:7.1f}  p95 {stats['p95_ms']:7.1f}  p99 {stats['p99_ms']:7.1f} ms  "
+                    f"errors {stats['errors']}"
+                )
+    finally:
+        await client.aclose()
+        if not args.base_url:
+            await close_async_driver()
+    return results
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Regressions: p95 up or throughput down by more than `threshold` (fraction)."""
+    problems = []
+    for endpoint, levels in current["results"].items():
+        for level, stats in levels.items():
+            before = baseline.get("results", {}).get(endpoint, {}).get(level)
+            if not before:
+                continue
+            if before["p95_ms"] and stats["p95_ms"] > before["p95_ms"] * (1 + threshold):
+                problems.append(f"{endpoint} c={level}: p95 {before['p95_ms']:.1f} -> {stats['p95_ms']:.1f} ms")
+            if before["throughput_rps"] and stats["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+                problems.append(
+                    f"{endpoint} c={level}: throughput {before['throughput_rps']:.1f} -> {stats['throughput_rps']:.1f} req/s"
+                )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a benchmark graph and load-test the hot endpoints")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("seed", "run"):
+        p = sub.add_parser(name)
+        for field, default in asdict(Volumes()).items():
+            p.add_argument(f"--{field.replace('_', '-')}", type=int, default=default, dest=field)
+    sub.add_parser("reset")
+    run = sub.choices["run"]
+    run.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    run.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32, 128])
+    run.add_argument("--duration", type=float, default=10.0, help="measured seconds per endpoint and level")
+    run.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each measurement")
+    run.add_argument("--base-url", help="drive a running server instead of the in-process app")
+    run.add_argument("--backend", choices=["neo4j", "memory"], default="neo4j",
+                     help="data backend of the in-process app; memory is loaded from the volumes given")
+    run.add_argument("--output", help=f"results file (default {RESULTS_DIR}/<timestamp>.json)")
+    run.add_argument("--baseline", help="earlier results file to compare against")
+    run.add_argument("--threshold", type=float, default=0.10, help="allowed regression as a fraction")
+    args = parser.parse_args()
+    if args.command == "run" and args.base_url and args.backend == "memory":
+        parser.error("--backend memory drives the in-process app; start the server with DATA_BACKEND=memory instead")
+
+    if args.command == "reset":
+        reset()
+        close_driver()
+        return
+    volumes = Volumes(**{f: getattr(args, f) for f in asdict(Volumes())})
+    if args.command == "seed":
+        seed(volumes)
+        close_driver()
+        return
+
+    started_at = datetime.now(PH_TZ)
+    results = asyncio.run(_run(args, volumes))
+    report = {
+        "started_at": started_at.isoformat(),
+        "git_revision": _git_revision(),
+        "target": args.base_url or "in-process",
+        "backend": args.backend,
+        "volumes": asdict(volumes),
+        "duration": args.duration,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, started_at.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(report, json.load(f), args.threshold)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
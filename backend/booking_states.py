@@ -0,0 +1,363 @@
+"""Booking lifecycle state machine.
+
+Every transition is a single conditional write: the booking is write-locked,
+its current status compared against the transition's allowed sources, and only
+then are the new status, the side effects (Order/Receipt, notifications) and
+the updated projection produced - all in one Cypher round trip. Two concurrent
+accepts therefore serialize on the booking lock and the second one fails the
+status check instead of creating a second Receipt.
+
+The writes themselves live in the booking repositories (the Cypher in
+TRANSITION_QUERIES, or the same rules applied to the in-memory store);
+apply_transition owns the outcome handling and per-transition metrics.
+"""
+import math
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from fastapi import HTTPException
+
+from models import BookingStatus, BookingUpdateDetails, CategoryPricingType
+from receipt_snapshot import set_snapshot
+from rollups import add_receipt, move_booking
+
+PH_TZ = ZoneInfo('Asia/Manila')
+
+# Projection shared by every query that returns one booking with its parties;
+# expects `b`, `c`, `p` and `cat` to be bound.
+BOOKING_PUBLIC_RETURN = """
+       b { .id, .schedule_at, .status, .notes, .created_at, .weight_kg, .total_price } AS b,
+       c.id AS customer_id,
+       c.full_name AS customer_name,
+       c.contact_number AS customer_contact,
+       p.id AS provider_id,
+       p.shop_name AS provider_shop_name,
+       p.full_name AS provider_full_name,
+       p.shop_address AS provider_address,
+       p.contact_number AS provider_contact,
+       cat { .id, .name, .pricing_type } AS cat
+"""
+
+
+def booking_record_to_public(rec) -> dict:
+    b = rec["b"]
+    cat = rec["cat"]
+    return {
+        "id": b.get("id"),
+        "customer_id": rec["customer_id"],
+        "customer_name": rec.get("customer_name"),
+        "customer_contact": rec.get("customer_contact"),
+        "provider_id": rec["provider_id"],
+        "provider_shop_name": rec.get("provider_shop_name"),
+        "provider_full_name": rec.get("provider_full_name"),
+        "provider_address": rec.get("provider_address"),
+        "provider_contact": rec.get("provider_contact"),
+        "category_id": cat.get("id"),
+        "category_name": cat.get("name"),
+        "pricing_type": cat.get("pricing_type"),
+        "weight_kg": float(b.get("weight_kg")),
+        "total_price": float(b.get("total_price")),
+        "schedule_at": datetime.fromisoformat(b.get("schedule_at")),
+        "status": b.get("status"),
+        "notes": b.get("notes"),
+        "created_at": datetime.fromisoformat(b.get("created_at")),
+    }
+
+
+@dataclass(frozen=True)
+class Transition:
+    name: str
+    sources: tuple[str, ...]
+    target: str
+    illegal_detail: str
+    # Cypher run only when the transition is allowed; `b`, `c`, `p`, `cat` and
+    # `orders` (linked Order nodes) are bound, as are $now, $oid and $rid.
+    # Notifications are queued as outbox entries (see outbox.py).
+    effects: str
+    # Mirror the new status onto linked Order nodes
+    order_status: str | None = None
+
+
+_STATUS_UPDATE_NOTIFICATION = """
+  CREATE (:OutboxEntry {
+    id: randomUUID(),
+    kind: 'notification',
+    user_id: c.id,
+    type: 'status_update',
+    message: $message + ' - ' + cat.name,
+    created_at: $now,
+    booking_id: b.id,
+    available_at: timestamp()
+  })
+"""
+
+STATUS_MESSAGES = {
+    BookingStatus.confirmed.value: 'Your booking has been accepted. Please pay and deliver your laundry.',
+    BookingStatus.in_progress.value: 'Your laundry is now being processed',
+    BookingStatus.ready.value: 'Your laundry is ready for pickup!',
+    BookingStatus.completed.value: 'Your order has been completed. Thank you!',
+    BookingStatus.rejected.value: 'Your booking has been rejected',
+}
+
+TRANSITIONS: dict[str, Transition] = {
+    t.name: t
+    for t in [
+        Transition(
+            name="accept",
+            sources=(BookingStatus.pending.value,),
+            target=BookingStatus.confirmed.value,
+            illegal_detail="Only pending bookings can be accepted",
+            effects="""
+  CREATE (o:Order {id: $oid, status: 'confirmed', created_at: $now})-[:FROM_BOOKING]->(b)
+  CREATE (r:Receipt {
+    id: $rid,
+    subtotal: b.total_price,
+    delivery_fee: 0.0,
+    total: b.total_price,
+    created_at: $now
+  })-[:FOR_ORDER]->(o)
+  CREATE (r)-[:FOR_CUSTOMER]->(c)
+  CREATE (r)-[:FOR_PROVIDER]->(p)
+"""
+            + set_snapshot("[{service_id: cat.id, service_name: cat.name, weight_kg: b.weight_kg}]")
+            + add_receipt()
+            + """
+  CREATE (:OutboxEntry {
+    id: randomUUID(),
+    kind: 'notification',
+    user_id: c.id,
+    type: 'booking_accepted',
+    message: 'Your booking for ' + cat.name + ' has been accepted by ' + p.shop_name + '. Receipt generated. Please pay ₱' + toString(b.total_price) + ' in cash when you deliver your laundry.',
+    created_at: $now,
+    booking_id: b.id,
+    receipt_id: $rid,
+    available_at: timestamp()
+  })
+  CREATE (:OutboxEntry {
+    id: randomUUID(),
+    kind: 'notification',
+    user_id: p.id,
+    type: 'receipt_generated',
+    message: 'Receipt generated for ' + cat.name + ' booking from ' + c.full_name + '. Amount: ₱' + toString(b.total_price) + '. Waiting for customer payment and delivery.',
+    created_at: $now,
+    booking_id: b.id,
+    receipt_id: $rid,
+    available_at: timestamp()
+  })
+""",
+        ),
+        Transition(
+            name="reject",
+            sources=(BookingStatus.pending.value,),
+            target=BookingStatus.rejected.value,
+            illegal_detail="Only pending bookings can be rejected",
+            effects="""
+  CREATE (:OutboxEntry {
+    id: randomUUID(),
+    kind: 'notification',
+    user_id: c.id,
+    type: 'booking_rejected',
+    message: 'Your booking for ' + cat.name + ' has been rejected by ' + p.shop_name + '.',
+    created_at: $now,
+    booking_id: b.id,
+    available_at: timestamp()
+  })
+""",
+            order_status="cancelled",
+        ),
+        Transition(
+            name="confirm_payment",
+            sources=(BookingStatus.confirmed.value,),
+            target=BookingStatus.in_progress.value,
+            illegal_detail="Only confirmed bookings can be marked as paid",
+            effects="""
+  CREATE (:OutboxEntry {
+    id: randomUUID(),
+    kind: 'notification',
+    user_id: c.id,
+    type: 'payment_confirmed',
+    message: 'Payment confirmed! Your laundry for ' + cat.name + ' is now being processed.',
+    created_at: $now,
+    booking_id: b.id,
+    available_at: timestamp()
+  })
+""",
+            order_status="in_progress",
+        ),
+        Transition(
+            name="process",
+            sources=(BookingStatus.confirmed.value, BookingStatus.ready.value),
+            target=BookingStatus.in_progress.value,
+            illegal_detail="Only confirmed or ready bookings can be moved to in progress",
+            effects=_STATUS_UPDATE_NOTIFICATION,
+            order_status="in_progress",
+        ),
+        Transition(
+            name="mark_ready",
+            sources=(BookingStatus.in_progress.value,),
+            target=BookingStatus.ready.value,
+            illegal_detail="Only in-progress bookings can be marked as ready",
+            effects=_STATUS_UPDATE_NOTIFICATION,
+        ),
+        Transition(
+            name="complete",
+            sources=(BookingStatus.in_progress.value, BookingStatus.ready.value),
+            target=BookingStatus.completed.value,
+            illegal_detail="Only in-progress or ready bookings can be completed",
+            effects=_STATUS_UPDATE_NOTIFICATION,
+            order_status="completed",
+        ),
+    ]
+}
+
+# PATCH /bookings/{id}/status target -> transition. Accept/reject keep their
+# side effects (Order/Receipt, dedicated notifications) when reached this way.
+STATUS_UPDATE_TRANSITIONS = {
+    BookingStatus.confirmed.value: "accept",
+    BookingStatus.rejected.value: "reject",
+    BookingStatus.in_progress.value: "process",
+    BookingStatus.ready.value: "mark_ready",
+    BookingStatus.completed.value: "complete",
+}
+
+
+def _transition_query(t: Transition) -> str:
+    order_update = (
+        "  FOREACH (o IN orders | SET o.status = $order_status)\n" if t.order_status else ""
+    )
+    return (
+        """
+OPTIONAL MATCH (b:Booking {id: $id})-[:FOR_PROVIDER]->(p:User {id: $pid})
+// take the write lock before reading status so concurrent transitions serialize
+SET b._lock = true
+REMOVE b._lock
+WITH b, p, b.status AS previous
+OPTIONAL MATCH (b)-[:BY_CUSTOMER]->(c:User)
+OPTIONAL MATCH (b)-[:OF_CATEGORY]->(cat:Category)
+OPTIONAL MATCH (b)<-[:FROM_BOOKING]-(o:Order)
+WITH b, p, c, cat, previous, collect(o) AS orders,
+     b IS NOT NULL AND previous IN $sources AS allowed
+FOREACH (_ IN CASE WHEN allowed THEN [1] ELSE [] END |
+  SET b.status = $target
+"""
+        + order_update
+        + move_booking("previous", "$target")
+        + t.effects
+        + """)
+RETURN previous, allowed,
+"""
+        + BOOKING_PUBLIC_RETURN
+    )
+
+
+TRANSITION_QUERIES = {name: _transition_query(t) for name, t in TRANSITIONS.items()}
+
+_metrics_lock = threading.Lock()
+_metrics: dict[str, dict] = {}
+
+
+def _record(name: str, outcome: str, elapsed_ms: float):
+    with _metrics_lock:
+        m = _metrics.setdefault(
+            name,
+            {"count": 0, "applied": 0, "rejected": 0, "not_found": 0, "total_ms": 0.0, "max_ms": 0.0},
+        )
+        m["count"] += 1
+        m[outcome] += 1
+        m["total_ms"] += elapsed_ms
+        m["max_ms"] = max(m["max_ms"], elapsed_ms)
+
+
+def transition_metrics() -> dict[str, dict]:
+    """Snapshot of per-transition call counts, outcomes and latency (ms)."""
+    with _metrics_lock:
+        out = {}
+        for name, m in _metrics.items():
+            out[name] = dict(m, avg_ms=m["total_ms"] / m["count"] if m["count"] else 0.0)
+        return out
+
+
+async def apply_transition(bookings, name: str, booking_id: str, provider_id: str, message: str | None = None) -> dict:
+    """Run transition `name` for a provider's booking and return its public projection.
+
+    `bookings` is the request's BookingRepository. Raises 404 when the booking
+    does not exist for this provider and 400 when the booking's current status
+    does not allow the transition.
+    """
+    t = TRANSITIONS[name]
+    now = datetime.now(PH_TZ).isoformat()
+    params = {
+        "id": booking_id,
+        "pid": provider_id,
+        "sources": list(t.sources),
+        "target": t.target,
+        "order_status": t.order_status,
+        "message": message or STATUS_MESSAGES.get(t.target, f"Your booking status updated to {t.target}"),
+        "now": now,
+        "oid": str(uuid.uuid4()),
+        "rid": str(uuid.uuid4()),
+    }
+    started = time.perf_counter()
+    outcome = await bookings.transition(t, params)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if outcome is None:
+        _record(name, "not_found", elapsed_ms)
+        raise HTTPException(status_code=404, detail="Booking not found or not for this provider")
+    allowed, booking = outcome
+    if not allowed:
+        _record(name, "rejected", elapsed_ms)
+        raise HTTPException(status_code=400, detail=t.illegal_detail)
+    _record(name, "applied", elapsed_ms)
+    return booking
+
+
+def booking_total(pricing_type: str, price: float, max_kilo: float | None, weight_kg: float) -> float:
+    """per_kilo is price * weight; fixed is the flat price, multiplied per started batch once weight exceeds max_kilo."""
+    if pricing_type == CategoryPricingType.per_kilo.value:
+        return float(price) * weight_kg
+    if max_kilo is not None and weight_kg > float(max_kilo):
+        return float(price) * math.ceil(weight_kg / float(max_kilo))
+    return float(price)
+
+
+def plan_details_update(current: dict, payload: BookingUpdateDetails) -> tuple[dict, str]:
+    """Booking property updates and customer message for a provider's details edit.
+
+    `current` carries the booking's status, old_weight and old_total and its
+    category's pricing_type, price, min_kilo and max_kilo.
+    """
+    # Don't allow editing completed or rejected bookings
+    if current["status"] in [BookingStatus.completed.value, BookingStatus.rejected.value]:
+        raise HTTPException(status_code=400, detail="Cannot edit completed or rejected bookings")
+
+    # Prepare update fields
+    updates = {}
+    notification_parts = []
+
+    # Update weight and recalculate total if weight changed
+    if payload.weight_kg is not None:
+        old_weight = float(current["old_weight"])
+        new_weight = float(payload.weight_kg)
+
+        if new_weight != old_weight:
+            min_k = current["min_kilo"]
+            if current["pricing_type"] != CategoryPricingType.per_kilo.value and min_k is not None and new_weight < float(min_k):
+                raise HTTPException(status_code=400, detail=f"Weight must be at least {float(min_k)} kg for this service")
+            new_total = booking_total(current["pricing_type"], current["price"], current["max_kilo"], new_weight)
+
+            updates["weight_kg"] = new_weight
+            updates["total_price"] = new_total
+            notification_parts.append(f"Weight updated from {old_weight} kg to {new_weight} kg. New total: ₱{new_total:.2f}")
+
+    # Update notes if provided
+    if payload.notes is not None:
+        updates["notes"] = payload.notes
+        notification_parts.append(f"Notes updated: {payload.notes}")
+
+    if not updates:
+        raise HTTPException(status_code=400, detail="No updates provided")
+    return updates, "Provider updated your booking details: " + "; ".join(notification_parts)
@@ -29,6 +29,71 @@ class Settings(BaseModel):
     neo4j_user: str = os.getenv("NEO4J_USER") or os.getenv("NEO4J_USERNAME", "neo4j")
     neo4j_password: str = os.getenv("NEO4J_PASSWORD", "password")
     neo4j_database: str = os.getenv("NEO4J_DATABASE", "neo4j")
+    # Connection pool, shared settings for the sync and async drivers. The async
+    # driver multiplexes many in-flight queries per worker, so size the pool for that;
+    # acquisition timeout and lifetime are in seconds (keep lifetime below any LB idle cut-off)
+    neo4j_max_connection_pool_size: int = int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "100"))
+    neo4j_connection_acquisition_timeout: float = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "30"))
+    neo4j_max_connection_lifetime: float = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3000"))
+    # Managed-transaction retries (db.run_in_transaction): jittered exponential backoff
+    # from base to max delay, bounded by attempt count and an overall deadline (seconds)
+    neo4j_retry_attempts: int = int(os.getenv("NEO4J_RETRY_ATTEMPTS", "4"))
+    neo4j_retry_base_delay: float = float(os.getenv("NEO4J_RETRY_BASE_DELAY", "0.1"))
+    neo4j_retry_max_delay: float = float(os.getenv("NEO4J_RETRY_MAX_DELAY", "2.0"))
+    neo4j_retry_deadline: float = float(os.getenv("NEO4J_RETRY_DEADLINE", "10"))
+    # Server-side timeout per transaction attempt (seconds, 0 = server default)
+    neo4j_query_timeout: float = float(os.getenv("NEO4J_QUERY_TIMEOUT", "15"))
+    # "neo4j", or "memory" to serve the repository-backed routes from in-process
+    # dicts (profiling/load tests; not persisted, single worker only)
+    data_backend: str = os.getenv("DATA_BACKEND", "neo4j").lower()
+    # Apply pending schema migrations (constraints/indexes) when the app starts
+    schema_bootstrap_on_startup: bool = os.getenv("SCHEMA_BOOTSTRAP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+    # get_current_user cache; TTL is the longest a ban/profile change can go unseen by another worker
+    user_cache_ttl_seconds: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+    user_cache_max_entries: int = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+    # PBKDF2-SHA256 rounds for new hashes; stored hashes below this are upgraded on login
+    password_hash_rounds: int = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+    # Dedicated hashing pool size and the most jobs allowed to queue before shedding with 503
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    password_hash_max_pending: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+    # Server-sent events (GET /events/stream). "memory" fans out within one worker;
+    # "redis" relays through REDIS_URL so every uvicorn worker sees every event
+    events_broker: str = os.getenv("EVENTS_BROKER", "memory").lower()
+    redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    events_channel: str = os.getenv("EVENTS_CHANNEL", "laundry:events")
+    # Comment line sent on idle streams so proxies keep them open (seconds)
+    events_heartbeat_seconds: float = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "20"))
+    # Events buffered per stream; a client that falls further behind gets one "resync" event
+    events_queue_size: int = int(os.getenv("EVENTS_QUEUE_SIZE", "64"))
+
+    # Transactional outbox (outbox.py): notifications and emails are recorded with the
+    # business write and delivered by a background dispatcher. Every worker runs one;
+    # a lease in the database lets only one of them dispatch at a time
+    outbox_dispatcher_enabled: bool = os.getenv("OUTBOX_DISPATCHER_ENABLED", "true").lower() in ("1", "true", "yes")
+    outbox_poll_seconds: float = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+    outbox_batch_size: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    # Email delivery attempts before an entry is dead-lettered; retries back off
+    # exponentially (with jitter) from base to max seconds
+    outbox_max_attempts: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    outbox_retry_base_seconds: float = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "30"))
+    outbox_retry_max_seconds: float = float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "3600"))
+
+    # Address lookups (places.py). Nominatim allows about one request per second;
+    # a lookup that would wait longer than PLACES_MAX_WAIT_SECONDS for its turn gets a 503
+    places_cache_ttl_seconds: float = float(os.getenv("PLACES_CACHE_TTL_SECONDS", "86400"))
+    places_cache_max_entries: int = int(os.getenv("PLACES_CACHE_MAX_ENTRIES", "5000"))
+    places_rate_per_second: float = float(os.getenv("PLACES_RATE_PER_SECOND", "1"))
+    places_burst: float = float(os.getenv("PLACES_BURST", "1"))
+    places_max_wait_seconds: float = float(os.getenv("PLACES_MAX_WAIT_SECONDS", "3"))
+    # Offline index built by `python gazetteer.py build`; answered before Nominatim when set
+    places_gazetteer_path: str = os.getenv("PLACES_GAZETTEER_PATH", "")
+
+    # Streamed /bookings/export and /receipts/export: the read transaction stays open
+    # while the client downloads, so it gets its own server-side timeout (seconds)
+    export_timeout_seconds: float = float(os.getenv("EXPORT_TIMEOUT_SECONDS", "600"))
 
     cors_origins: List[str] = _get_list_env("CORS_ORIGINS", ["*"])
     
@@ -0,0 +1,520 @@
+"""Synthetic laundry graph for scale testing.
+
+Builds the same nodes, properties and relationships the routers create
+(User, Category-[:OFFERED_BY], Booking-[:BY_CUSTOMER|FOR_PROVIDER|OF_CATEGORY],
+Order-[:FROM_BOOKING], Receipt-[:FOR_ORDER|FOR_CUSTOMER|FOR_PROVIDER],
+Notification-[:FOR_USER], Review-[:BY_CUSTOMER|FOR_PROVIDER|FOR_BOOKING]) and
+streams them into Neo4j as UNWIND batches from a pool of parallel writers.
+
+Every row is a pure function of (seed, phase, chunk number), so a run is
+reproducible and chunks can be written in any order. Each chunk commits in the
+same transaction as a (:DatagenChunk) marker; an interrupted run resumes by
+skipping chunks whose marker exists. Later phases (notifications, reviews)
+regenerate the booking rows they need rather than reading them back.
+
+Point NEO4J_URI/NEO4J_DATABASE at a scratch database and raise
+NEO4J_MAX_CONNECTION_POOL_SIZE above --workers. Run from the backend directory:
+
+    python datagen.py --providers 10000 --customers 1000000 --bookings 20000000 --workers 8
+    python datagen.py --status
+"""
+import argparse
+import hashlib
+import math
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+from db import close_driver, execute_write, get_session, read, read_one, write
+from password_hashing import pwd_context
+from provider_search import SEARCHABLE_LABEL
+from receipt_snapshot import set_snapshot
+from rollups import REBUILD_FOR_PROVIDER
+from schema import apply_migrations
+from unread_counter import RECOUNT_UNREAD
+
+RUN_NODE_ID = "datagen"
+PASSWORD = "datagen-password"
+
+_WORDS = [
+    "Bubbles", "Fresh", "Clean", "Suds", "Sunshine", "Linen", "Spin", "Rinse",
+    "Sparkle", "Tide", "Breeze", "Lavender", "Cotton", "Express", "Quick", "Wash",
+]
+_FIRST_NAMES = ["Maria", "Jose", "Ana", "Juan", "Rosa", "Mark", "Grace", "Paolo", "Liza", "Carlo", "Joy", "Miguel"]
+_LAST_NAMES = ["Santos", "Reyes", "Cruz", "Bautista", "Garcia", "Mendoza", "Torres", "Flores", "Ramos", "Villanueva"]
+_CITIES = ["Quezon City", "Makati", "Pasig", "Taguig", "Manila", "Cebu City", "Davao City", "Iloilo City"]
+# Approximate (latitude, longitude) of each _CITIES entry
+_CITY_CENTERS = [(14.676, 121.044), (14.555, 121.024), (14.576, 121.085), (14.518, 121.051),
+                 (14.599, 120.984), (10.316, 123.885), (7.190, 125.455), (10.720, 122.562)]
+_CATEGORY_NAMES = ["Wash & Fold", "Dry Clean", "Wash Dry Press", "Beddings", "Comforter", "Delicates"]
+# Share of bookings by current status; pending/rejected bookings have no Order or Receipt
+_STATUS_WEIGHTS = {
+    "completed": 0.60, "ready": 0.05, "in_progress": 0.07, "confirmed": 0.08, "pending": 0.10, "rejected": 0.10,
+}
+_REVIEW_COMMENTS = [None, "Great service!", "Clothes smell fresh.", "A bit late but clean.", "Will book again.", "Okay lang."]
+
+
+@dataclass(frozen=True)
+class Plan:
+    seed: int = 1
+    providers: int = 10_000
+    customers: int = 1_000_000
+    bookings: int = 20_000_000
+    categories_per_provider: int = 3
+    review_rate: float = 0.3
+    chunk_size: int = 10_000
+    # Newest possible created_at; fixed so runs on different days match
+    anchor: str = "2025-12-31T23:59:59+08:00"
+    days: int = 730
+
+
+def _h(*parts) -> int:
+    return int.from_bytes(hashlib.blake2b(repr(parts).encode(), digest_size=8).digest(), "big")
+
+
+def _chunk_rng(plan: Plan, phase: str, chunk: int) -> random.Random:
+    return random.Random(_h(plan.seed, phase, chunk))
+
+
+def _chunks(total: int, size: int) -> int:
+    return math.ceil(total / size) if total > 0 else 0
+
+
+# --- Deterministic entities ------------------------------------------------------
+#
+# Names and prices are derived arithmetically from the index so any phase can
+# reconstruct them without reading the graph.
+
+def provider_id(i: int) -> str:
+    return f"gen-p{i}"
+
+
+def customer_id(i: int) -> str:
+    return f"gen-c{i}"
+
+
+def _shop_name(i: int) -> str:
+    return f"{_WORDS[i % 16]} {_WORDS[(i // 16) % 16]} Laundry {i}"
+
+
+def _full_name(i: int) -> str:
+    return f"{_FIRST_NAMES[i % 12]} {_LAST_NAMES[(i // 12) % 10]}"
+
+
+def _category(plan: Plan, p: int, k: int) -> dict:
+    h = _h(plan.seed, "category", p, k)
+    per_kilo = h % 2 == 0
+    return {
+        "id": f"gen-p{p}-cat{k}",
+        "provider_id": provider_id(p),
+        "name": _CATEGORY_NAMES[(h >> 8) % len(_CATEGORY_NAMES)],
+        "pricing_type": "per_kilo" if per_kilo else "fixed",
+        "price": float([35, 40, 45, 60][(h >> 16) % 4]) if per_kilo else float([150, 180, 200, 250][(h >> 16) % 4]),
+        "min_kilo": None if per_kilo else 1.0,
+        "max_kilo": None if per_kilo else 8.0,
+    }
+
+
+def _total_price(cat: dict, w: float) -> float:
+    # Same pricing as routes.bookings._CREATE_BOOKING_QUERY
+    if cat["pricing_type"] == "per_kilo":
+        return cat["price"] * w
+    if cat["max_kilo"] is not None and w > cat["max_kilo"]:
+        return cat["price"] * math.ceil(w / cat["max_kilo"])
+    return cat["price"]
+
+
+def _provider_location(plan: Plan, i: int) -> dict:
+    # Within ~5 km of the shop's city centre
+    h = _h(plan.seed, "location", i)
+    lat, lon = _CITY_CENTERS[i % len(_CITIES)]
+    return {
+        "latitude": lat + ((h & 0xFFFF) / 0xFFFF - 0.5) * 0.09,
+        "longitude": lon + (((h >> 16) & 0xFFFF) / 0xFFFF - 0.5) * 0.09,
+    }
+
+
+def _provider_rows(plan: Plan, chunk: int, hashed: str) -> list[dict]:
+    start = chunk * plan.chunk_size
+    return [
+        {
+            "id": provider_id(i),
+            "role": "provider",
+            "email": f"p{i}@gen.laundryapp.com",
+            "contact_number": f"0917{i:07d}",
+            "shop_name": _shop_name(i),
+            "shop_address": f"{1 + i % 999} Rizal St, {_CITIES[i % len(_CITIES)]}",
+            **_provider_location(plan, i),
+            "hashed_password": hashed,
+            "provider_status": "approved",
+            "banned": False,
+            "is_available": True,
+            "email_verified": True,
+        }
+        for i in range(start, min(start + plan.chunk_size, plan.providers))
+    ]
+
+
+def _customer_rows(plan: Plan, chunk: int, hashed: str) -> list[dict]:
+    start = chunk * plan.chunk_size
+    return [
+        {
+            "id": customer_id(i),
+            "role": "customer",
+            "email": f"c{i}@gen.laundryapp.com",
+            "contact_number": f"0918{i:07d}",
+            "full_name": _full_name(i),
+            "address": f"{1 + i % 999} Mabini St, {_CITIES[(i // 7) % len(_CITIES)]}",
+            "hashed_password": hashed,
+            "banned": False,
+            "email_verified": True,
+        }
+        for i in range(start, min(start + plan.chunk_size, plan.customers))
+    ]
+
+
+def _category_rows(plan: Plan, chunk: int) -> list[dict]:
+    start = chunk * plan.chunk_size
+    return [
+        _category(plan, p, k)
+        for p in range(start, min(start + plan.chunk_size, plan.providers))
+        for k in range(plan.categories_per_provider)
+    ]
+
+
+def _booking_rows(plan: Plan, chunk: int) -> list[dict]:
+    """Bookings of one chunk, customer-major so concurrent chunks touch disjoint customers."""
+    rng = _chunk_rng(plan, "bookings", chunk)
+    anchor = datetime.fromisoformat(plan.anchor)
+    statuses = list(_STATUS_WEIGHTS)
+    weights = list(_STATUS_WEIGHTS.values())
+    start = chunk * plan.chunk_size
+    rows = []
+    for i in range(start, min(start + plan.chunk_size, plan.bookings)):
+        c = i * plan.customers // plan.bookings
+        # Popular shops get most of the traffic
+        p = int(plan.providers * rng.random() ** 2)
+        cat = _category(plan, p, rng.randrange(plan.categories_per_provider))
+        w = round(rng.uniform(1.0, 12.0), 1)
+        status = rng.choices(statuses, weights)[0]
+        created = anchor - timedelta(seconds=rng.randrange(plan.days * 86400))
+        accepted = status not in ("pending", "rejected")
+        # Later lifecycle steps (accept, payment, ready, completed) follow minutes to hours apart
+        steps, at = [], created
+        for _ in range(4):
+            at += timedelta(minutes=20 + rng.randrange(240))
+            steps.append(at.isoformat())
+        rows.append({
+            "id": f"gen-b{i}",
+            "index": i,
+            "customer_id": customer_id(c),
+            "customer_name": _full_name(c),
+            "provider_id": provider_id(p),
+            "shop_name": _shop_name(p),
+            "category_id": cat["id"],
+            "category_name": cat["name"],
+            "status": status,
+            "notes": rng.choice([None, None, None, "Please separate whites", "Fold only, no hangers"]),
+            "created_at": created.isoformat(),
+            "step_at": steps,
+            "weight_kg": w,
+            "total_price": _total_price(cat, w),
+            "order_id": f"gen-o{i}" if accepted else None,
+            "order_status": {"confirmed": "confirmed", "completed": "completed"}.get(status, "in_progress") if accepted else None,
+            "receipt_id": f"gen-r{i}" if accepted else None,
+        })
+    return rows
+
+
+def _notification_rows(plan: Plan, chunk: int) -> list[dict]:
+    """The notifications the booking lifecycle would have sent for each booking."""
+    rows = []
+    read_rng = _chunk_rng(plan, "notifications", chunk)
+    for b in _booking_rows(plan, chunk):
+        cust, prov, cat, total = b["customer_id"], b["provider_id"], b["category_name"], b["total_price"]
+        sent = [
+            (cust, "booking_created", f"Your booking for {cat} at {b['shop_name']} has been submitted. Waiting for provider confirmation.", b["created_at"], None),
+            (prov, "new_booking", f"New booking received for {cat} from {b['customer_name']}. Total: ₱{total}", b["created_at"], None),
+        ]
+        status, steps = b["status"], b["step_at"]
+        if status == "rejected":
+            sent.append((cust, "booking_rejected", f"Your booking for {cat} has been rejected by {b['shop_name']}.", steps[0], None))
+        elif status != "pending":
+            sent.append((cust, "booking_accepted", f"Your booking for {cat} has been accepted by {b['shop_name']}. Receipt generated. Please pay ₱{total} in cash when you deliver your laundry.", steps[0], b["receipt_id"]))
+            sent.append((prov, "receipt_generated", f"Receipt generated for {cat} booking from {b['customer_name']}. Amount: ₱{total}. Waiting for customer payment and delivery.", steps[0], b["receipt_id"]))
+            if status in ("in_progress", "ready", "completed"):
+                sent.append((cust, "payment_confirmed", f"Payment confirmed! Your laundry for {cat} is now being processed.", steps[1], None))
+            if status in ("ready", "completed"):
+                sent.append((cust, "status_update", f"Your laundry is ready for pickup! - {cat}", steps[2], None))
+            if status == "completed":
+                sent.append((cust, "status_update", f"Your order has been completed. Thank you! - {cat}", steps[3], None))
+        for n, (user, kind, message, at, receipt_id) in enumerate(sent):
+            rows.append({
+                "id": f"{b['id']}-n{n}",
+                "user_id": user,
+                "type": kind,
+                "message": message,
+                "created_at": at,
+                # Older notifications have mostly been read
+                "read": read_rng.random() < 0.85,
+                "booking_id": b["id"],
+                "receipt_id": receipt_id,
+            })
+    return rows
+
+
+def _review_rows(plan: Plan, chunk: int) -> list[dict]:
+    rng = _chunk_rng(plan, "reviews", chunk)
+    rows = []
+    for b in _booking_rows(plan, chunk):
+        if b["status"] != "completed" or rng.random() >= plan.review_rate:
+            continue
+        rating = rng.choices([5, 4, 3, 2, 1], [0.55, 0.25, 0.1, 0.05, 0.05])[0]
+        rows.append({
+            "id": f"gen-rv{b['index']}",
+            "customer_id": b["customer_id"],
+            "provider_id": b["provider_id"],
+            "booking_id": b["id"],
+            "rating": rating,
+            "comment": rng.choice(_REVIEW_COMMENTS),
+            "created_at": b["step_at"][3],
+            "message": f"{b['customer_name']} left a {rating}-star review for your shop.",
+        })
+    return rows
+
+
+def _provider_id_rows(plan: Plan, chunk: int) -> list[dict]:
+    start = chunk * plan.chunk_size
+    return [{"id": provider_id(i)} for i in range(start, min(start + plan.chunk_size, plan.providers))]
+
+
+def _customer_id_rows(plan: Plan, chunk: int) -> list[dict]:
+    start = chunk * plan.chunk_size
+    return [{"id": customer_id(i)} for i in range(start, min(start + plan.chunk_size, plan.customers))]
+
+
+# --- Cypher per phase ------------------------------------------------------------
+
+_USERS = """
+UNWIND $rows AS row
+CREATE (u:User)
+SET u = row
+"""
+
+# Generated providers are all approved, hence searchable
+_PROVIDERS = f"""
+UNWIND $rows AS row
+CREATE (u:User:{SEARCHABLE_LABEL})
+SET u = row, u.location = point({{latitude: row.latitude, longitude: row.longitude}})
+REMOVE u.latitude, u.longitude
+"""
+
+_CATEGORIES = """
+UNWIND $rows AS row
+MATCH (p:User {id: row.provider_id})
+CREATE (:Category {id: row.id, name: row.name, pricing_type: row.pricing_type, price: row.price,
+                   min_kilo: row.min_kilo, max_kilo: row.max_kilo})-[:OFFERED_BY]->(p)
+"""
+
+_BOOKINGS = """
+UNWIND $rows AS row
+MATCH (c:User {id: row.customer_id})
+MATCH (p:User {id: row.provider_id})
+MATCH (cat:Category {id: row.category_id})
+CREATE (b:Booking {id: row.id, schedule_at: row.created_at, status: row.status, notes: row.notes,
+                   created_at: row.created_at, weight_kg: row.weight_kg, total_price: row.total_price})
+CREATE (b)-[:BY_CUSTOMER]->(c)
+CREATE (b)-[:FOR_PROVIDER]->(p)
+CREATE (b)-[:OF_CATEGORY]->(cat)
+FOREACH (_ IN CASE WHEN row.order_id IS NULL THEN [] ELSE [1] END |
+  CREATE (o:Order {id: row.order_id, status: row.order_status, created_at: row.step_at[0]})-[:FROM_BOOKING]->(b)
+  CREATE (r:Receipt {id: row.receipt_id, subtotal: row.total_price, delivery_fee: 0.0,
+                     total: row.total_price, created_at: row.step_at[0]})-[:FOR_ORDER]->(o)
+  CREATE (r)-[:FOR_CUSTOMER]->(c)
+  CREATE (r)-[:FOR_PROVIDER]->(p)
+""" + set_snapshot("[{service_id: cat.id, service_name: cat.name, weight_kg: b.weight_kg}]") + """)
+"""
+
+_NOTIFICATIONS = """
+UNWIND $rows AS row
+MATCH (u:User {id: row.user_id})
+CREATE (n:Notification {id: row.id, type: row.type, message: row.message, created_at: row.created_at,
+                        read: row.read, booking_id: row.booking_id})-[:FOR_USER]->(u)
+SET n.receipt_id = row.receipt_id
+"""
+
+_REVIEWS = """
+UNWIND $rows AS row
+MATCH (c:User {id: row.customer_id})
+MATCH (p:User {id: row.provider_id})
+MATCH (b:Booking {id: row.booking_id})
+CREATE (r:Review {id: row.id, rating: row.rating, comment: row.comment, created_at: row.created_at})-[:BY_CUSTOMER]->(c)
+CREATE (r)-[:FOR_PROVIDER]->(p)
+CREATE (r)-[:FOR_BOOKING]->(b)
+CREATE (:Notification {id: row.id + '-n', type: 'new_review', message: row.message,
+                       created_at: row.created_at, read: false})-[:FOR_USER]->(p)
+"""
+
+# Same aggregates routes.reviews keeps on the provider
+_RATINGS = """
+UNWIND $rows AS row
+MATCH (p:User {id: row.id})
+OPTIONAL MATCH (p)<-[:FOR_PROVIDER]-(r:Review)
+WITH p, count(r) AS total_reviews, avg(r.rating) AS avg_rating
+SET p.review_count = total_reviews,
+    p.avg_rating = coalesce(round(10 * avg_rating) / 10.0, 0.0)
+"""
+
+# The unread counter the notification writers keep on each user (unread_counter)
+_UNREAD = """
+UNWIND $rows AS row
+MATCH (u:User {id: row.id})
+""" + RECOUNT_UNREAD
+
+_SALES_ROLLUPS = """
+UNWIND $rows AS row
+MATCH (p:User {id: row.id})
+""" + REBUILD_FOR_PROVIDER
+
+
+def _phases(plan: Plan, hashed: str):
+    """(name, chunk count, row builder, query) in dependency order."""
+    booking_chunks = _chunks(plan.bookings, plan.chunk_size)
+    provider_chunks = _chunks(plan.providers, plan.chunk_size)
+    return [
+        ("providers", provider_chunks, lambda k: _provider_rows(plan, k, hashed), _PROVIDERS),
+        ("customers", _chunks(plan.customers, plan.chunk_size), lambda k: _customer_rows(plan, k, hashed), _USERS),
+        ("categories", provider_chunks, lambda k: _category_rows(plan, k), _CATEGORIES),
+        ("bookings", booking_chunks, lambda k: _booking_rows(plan, k), _BOOKINGS),
+        ("notifications", booking_chunks, lambda k: _notification_rows(plan, k), _NOTIFICATIONS),
+        ("reviews", booking_chunks, lambda k: _review_rows(plan, k), _REVIEWS),
+        ("ratings", provider_chunks, lambda k: _provider_id_rows(plan, k), _RATINGS),
+        ("unread_providers", provider_chunks, lambda k: _provider_id_rows(plan, k), _UNREAD),
+        ("unread_customers", _chunks(plan.customers, plan.chunk_size), lambda k: _customer_id_rows(plan, k), _UNREAD),
+        ("sales_rollups", provider_chunks, lambda k: _provider_id_rows(plan, k), _SALES_ROLLUPS),
+    ]
+
+
+# --- Writers -------------------------------------------------------------------
+
+def _write_chunk_tx(tx, query: str, rows: list[dict], marker: str):
+    tx.run(query, rows=rows).consume()
+    # Committed with the rows, so a chunk is either fully written and marked or neither
+    tx.run("CREATE (:DatagenChunk {id: $id})", id=marker).consume()
+
+
+def _write_chunk(phase: str, chunk: int, build, query: str) -> int:
+    rows = build(chunk)
+    if rows:
+        with get_session() as session:
+            execute_write(session, f"datagen.{phase}", _write_chunk_tx, query, rows, f"{phase}:{chunk}", timeout=0)
+    return len(rows)
+
+
+def _completed_chunks(phase: str) -> set[int]:
+    with get_session() as session:
+        records = read(
+            session,
+            "datagen.completed_chunks",
+            "MATCH (m:DatagenChunk) WHERE m.id STARTS WITH $prefix RETURN m.id AS id",
+            prefix=f"{phase}:",
+        )
+    return {int(r["id"].rsplit(":", 1)[1]) for r in records}
+
+
+def _run_phase(phase: str, n_chunks: int, build, query: str, workers: int):
+    done = _completed_chunks(phase)
+    todo = [k for k in range(n_chunks) if k not in done]
+    if not todo:
+        print(f"{phase:<16} complete ({n_chunks} chunks)")
+        return
+    print(f"{phase:<16} {len(todo)} of {n_chunks} chunks to write")
+    started = time.perf_counter()
+    written = 0
+    pending = set()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"datagen-{phase}") as pool:
+        for n, chunk in enumerate(todo, 1):
+            # Keep a bounded number of chunks built/in flight so memory stays flat
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                written += sum(f.result() for f in finished)
+            pending.add(pool.submit(_write_chunk, phase, chunk, build, query))
+            if n % max(1, workers * 4) == 0:
+                elapsed = time.perf_counter() - started
+                print(f"{phase:<16} {n}/{len(todo)} chunks, {written / elapsed:,.0f} rows/s")
+        for f in pending:
+            written += f.result()
+    elapsed = time.perf_counter() - started
+    print(f"{phase:<16} wrote {written:,} rows in {elapsed:,.1f}s ({written / elapsed:,.0f} rows/s)")
+
+
+def _check_run(plan: Plan, force: bool):
+    """Record the plan on first run; refuse to resume a run started with a different plan."""
+    params = asdict(plan)
+    with get_session() as session:
+        rec = read_one(session, "datagen.run", "MATCH (r:DatagenRun {id: $id}) RETURN r AS run", id=RUN_NODE_ID)
+        if rec:
+            stored = {k: rec["run"].get(k) for k in params}
+            if stored != params and not force:
+                raise SystemExit(f"Graph was generated with a different plan {stored}; pass --force to continue anyway")
+        write(session, "datagen.run", "MERGE (r:DatagenRun {id: $id}) SET r += $params", id=RUN_NODE_ID, params=params)
+
+
+def generate(plan: Plan, workers: int, force: bool = False):
+    apply_migrations()
+    _check_run(plan, force)
+    # One hash shared by every generated user; logins still pay the full verify cost
+    hashed = pwd_context.hash(PASSWORD)
+    for phase, n_chunks, build, query in _phases(plan, hashed):
+        _run_phase(phase, n_chunks, build, query, workers)
+
+
+def status():
+    with get_session() as session:
+        rec = read_one(session, "datagen.run", "MATCH (r:DatagenRun {id: $id}) RETURN r AS run", id=RUN_NODE_ID)
+        if not rec:
+            print("No generated graph")
+            return
+        plan = Plan(**{k: rec["run"][k] for k in asdict(Plan())})
+        print(f"Plan: {asdict(plan)}")
+    for phase, n_chunks, _, _ in _phases(plan, ""):
+        print(f"{phase:<16} {len(_completed_chunks(phase))}/{n_chunks} chunks")
+
+
+def main():
+    defaults = Plan()
+    parser = argparse.ArgumentParser(description="Generate a synthetic laundry graph in Neo4j")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--providers", type=int, default=defaults.providers)
+    parser.add_argument("--customers", type=int, default=defaults.customers)
+    parser.add_argument("--bookings", type=int, default=defaults.bookings)
+    parser.add_argument("--categories-per-provider", type=int, default=defaults.categories_per_provider)
+    parser.add_argument("--review-rate", type=float, default=defaults.review_rate, help="share of completed bookings reviewed")
+    parser.add_argument("--chunk-size", type=int, default=defaults.chunk_size, help="rows per UNWIND transaction")
+    parser.add_argument("--workers", type=int, default=4, help="parallel writer threads")
+    parser.add_argument("--force", action="store_true", help="resume even if the stored plan differs")
+    parser.add_argument("--status", action="store_true", help="show progress of the stored run and exit")
+    args = parser.parse_args()
+
+    try:
+        if args.status:
+            status()
+            return
+        plan = Plan(
+            seed=args.seed,
+            providers=args.providers,
+            customers=args.customers,
+            bookings=args.bookings,
+            categories_per_provider=args.categories_per_provider,
+            review_rate=args.review_rate,
+            chunk_size=args.chunk_size,
+        )
+        generate(plan, args.workers, args.force)
+    finally:
+        close_driver()
+
+
+if __name__ == "__main__":
+    main()
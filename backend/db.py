@@ -1,16 +1,33 @@
-from neo4j import GraphDatabase
+import asyncio
+import random
+import time
+
+from fastapi import Depends, HTTPException
+from neo4j import READ_ACCESS, WRITE_ACCESS, AsyncGraphDatabase, GraphDatabase, unit_of_work
+from neo4j.exceptions import DriverError, Neo4jError
 from config import settings
+from metrics import observe_query, observe_retry
+from query_stats import counting, current_stats
 
 _driver = None
+_async_driver = None
+
+def _driver_config() -> dict:
+    return {
+        "auth": (settings.neo4j_user, settings.neo4j_password),  # Aura uses tuple auth
+        "max_connection_pool_size": settings.neo4j_max_connection_pool_size,
+        "connection_acquisition_timeout": settings.neo4j_connection_acquisition_timeout,
+        "max_connection_lifetime": settings.neo4j_max_connection_lifetime,
+        # Managed transactions are retried by run_in_transaction below; a negative
+        # budget makes the driver surface the first retryable error instead of
+        # running its own fixed 30s retry loop underneath ours.
+        "max_transaction_retry_time": -1.0,
+    }
 
 def get_driver():
     global _driver
     if _driver is None:
-        _driver = GraphDatabase.driver(
-            settings.neo4j_uri,
-            auth=(settings.neo4j_user, settings.neo4j_password),  # Aura uses tuple auth
-            max_connection_pool_size=10,
-        )
+        _driver = GraphDatabase.driver(settings.neo4j_uri, **_driver_config())
     return _driver
 
 def get_session():
@@ -22,3 +39,275 @@ def close_driver():
     if _driver:
         _driver.close()
         _driver = None
+
+def get_async_driver():
+    """Driver for `async def` routes; created lazily inside the running event loop."""
+    global _async_driver
+    if _async_driver is None:
+        _async_driver = AsyncGraphDatabase.driver(settings.neo4j_uri, **_driver_config())
+    return _async_driver
+
+def get_async_session(read_only: bool = False):
+    """Async counterpart of get_session(); use as `async with get_async_session() as session`.
+
+    read_only routes the session's explicit transactions (astream) to readers.
+    """
+    return get_async_driver().session(
+        database=settings.neo4j_database,
+        default_access_mode=READ_ACCESS if read_only else WRITE_ACCESS,
+    )
+
+def _pool_usage(driver) -> dict:
+    # The driver exposes no public pool API; read its pool defensively
+    pool = getattr(driver, "_pool", None)
+    in_use = idle = 0
+    for connections in list(getattr(pool, "connections", {}).values()):
+        for connection in list(connections):
+            if connection.in_use:
+                in_use += 1
+            else:
+                idle += 1
+    return {"in_use": in_use, "idle": idle, "max": settings.neo4j_max_connection_pool_size}
+
+def pool_stats() -> dict[str, dict]:
+    """Connections in use/idle for each driver created so far."""
+    drivers = {"sync": _driver, "async": _async_driver}
+    return {name: _pool_usage(d) for name, d in drivers.items() if d is not None}
+
+async def get_request_session():
+    """FastAPI dependency: one async session per request, or None with DATA_BACKEND=memory.
+
+    Dependencies are cached per request, so get_current_user, the route, its
+    repositories and any helper it passes the session to all share this session.
+    """
+    if settings.data_backend == "memory":
+        yield None
+        return
+    async with get_async_session() as session:
+        yield session
+
+async def get_db(session=Depends(get_request_session)):
+    """FastAPI dependency for routes that still run Cypher directly (orders, services)."""
+    if session is None:
+        raise HTTPException(status_code=503, detail="This endpoint requires DATA_BACKEND=neo4j")
+    return session
+
+async def close_async_driver():
+    global _async_driver
+    if _async_driver:
+        await _async_driver.close()
+        _async_driver = None
+
+
+# --- Data access -----------------------------------------------------------
+#
+# Every query goes through a managed transaction (execute_read/execute_write) so
+# reads can be routed to followers and the whole unit of work is replayed on a
+# transient failure. `name` is a stable label for the query ("bookings.list_mine")
+# attached as transaction metadata, so it shows up in SHOW TRANSACTIONS and logs.
+# The a-prefixed helpers (aread, awrite_one, ...) are the same API for async
+# sessions: `work` is then a coroutine function taking an AsyncManagedTransaction.
+
+READ = "READ"
+WRITE = "WRITE"
+
+
+def _backoff_delay(attempt: int) -> float:
+    # Exponential backoff with full jitter
+    cap = min(settings.neo4j_retry_max_delay, settings.neo4j_retry_base_delay * (2 ** (attempt - 1)))
+    return random.uniform(0, cap)
+
+
+def _retry_delay(error: Exception, attempt: int, deadline: float) -> float | None:
+    """Seconds to wait before retry number `attempt`, or None to give up."""
+    if not error.is_retryable():
+        return None
+    delay = _backoff_delay(attempt)
+    if attempt >= settings.neo4j_retry_attempts or time.monotonic() + delay > deadline:
+        return None
+    return delay
+
+
+def _unit(work, name: str, timeout: float | None):
+    stats = current_stats()
+    if stats is not None:
+        stats.transactions += 1
+        work = counting(work, stats)
+    timeout = settings.neo4j_query_timeout if timeout is None else timeout
+    return unit_of_work(timeout=timeout or None, metadata={"query": name})(work)
+
+
+def _record_attempt(name: str, access_mode: str, started: float, result, error: Exception | None):
+    elapsed = time.perf_counter() - started
+    observe_query(name, access_mode, elapsed, result, error)
+    stats = current_stats()
+    if stats is not None:
+        stats.db_seconds += elapsed
+
+
+def _record_retry(name: str):
+    observe_retry(name)
+    stats = current_stats()
+    if stats is not None:
+        stats.retries += 1
+
+
+def run_in_transaction(session, access_mode: str, name: str, work, *args, timeout: float | None = None, **kwargs):
+    """Run `work(tx, *args, **kwargs)` as a managed transaction with retries.
+
+    Retryable errors (connection resets, leader switches, deadlocks) are retried
+    with jittered exponential backoff until NEO4J_RETRY_ATTEMPTS or the
+    NEO4J_RETRY_DEADLINE budget is spent. `timeout` (default NEO4J_QUERY_TIMEOUT)
+    is enforced server-side per attempt.
+    """
+    unit = _unit(work, name, timeout)
+    execute = session.execute_read if access_mode == READ else session.execute_write
+    deadline = time.monotonic() + settings.neo4j_retry_deadline
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        result = error = None
+        try:
+            result = execute(unit, *args, **kwargs)
+            return result
+        except (DriverError, Neo4jError) as e:
+            error = e
+            attempt += 1
+            delay = _retry_delay(e, attempt, deadline)
+            if delay is None:
+                raise
+        finally:
+            _record_attempt(name, access_mode, started, result, error)
+        _record_retry(name)
+        time.sleep(delay)
+
+
+async def arun_in_transaction(session, access_mode: str, name: str, work, *args, timeout: float | None = None, **kwargs):
+    """run_in_transaction for an AsyncSession; `work` must be a coroutine function."""
+    unit = _unit(work, name, timeout)
+    execute = session.execute_read if access_mode == READ else session.execute_write
+    deadline = time.monotonic() + settings.neo4j_retry_deadline
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        result = error = None
+        try:
+            result = await execute(unit, *args, **kwargs)
+            return result
+        except (DriverError, Neo4jError) as e:
+            error = e
+            attempt += 1
+            delay = _retry_delay(e, attempt, deadline)
+            if delay is None:
+                raise
+        finally:
+            _record_attempt(name, access_mode, started, result, error)
+        _record_retry(name)
+        await asyncio.sleep(delay)
+
+
+def execute_read(session, name: str, work, *args, **kwargs):
+    return run_in_transaction(session, READ, name, work, *args, **kwargs)
+
+
+def execute_write(session, name: str, work, *args, **kwargs):
+    return run_in_transaction(session, WRITE, name, work, *args, **kwargs)
+
+
+def _fetch_all(tx, query: str, parameters: dict):
+    return list(tx.run(query, parameters))
+
+
+def _fetch_one(tx, query: str, parameters: dict):
+    return tx.run(query, parameters).single()
+
+
+def read(session, name: str, query: str, parameters: dict | None = None, *, timeout: float | None = None, **kwparameters) -> list:
+    """Run a read query and return all records."""
+    return execute_read(session, name, _fetch_all, query, {**(parameters or {}), **kwparameters}, timeout=timeout)
+
+
+def read_one(session, name: str, query: str, parameters: dict | None = None, *, timeout: float | None = None, **kwparameters):
+    """Run a read query and return its first record, or None."""
+    return execute_read(session, name, _fetch_one, query, {**(parameters or {}), **kwparameters}, timeout=timeout)
+
+
+def write(session, name: str, query: str, parameters: dict | None = None, *, timeout: float | None = None, **kwparameters) -> list:
+    """Run a write query and return all records."""
+    return execute_write(session, name, _fetch_all, query, {**(parameters or {}), **kwparameters}, timeout=timeout)
+
+
+def write_one(session, name: str, query: str, parameters: dict | None = None, *, timeout: float | None = None, **kwparameters):
+    """Run a write query and return its first record, or None."""
+    return execute_write(session, name, _fetch_one, query, {**(parameters or {}), **kwparameters}, timeout=timeout)
+
+
+async def aexecute_read(session, name: str, work, *args, **kwargs):
+    return await arun_in_transaction(session, READ, name, work, *args, **kwargs)
+
+
+async def aexecute_write(session, name: str, work, *args, **kwargs):
+    return await arun_in_transaction(session, WRITE, name, work, *args, **kwargs)
+
+
+async def _afetch_all(tx, query: str, parameters: dict):
+    result = await tx.run(query, parameters)
+    return [record async for record in result]
+
+
+async def _afetch_one(tx, query: str, parameters: dict):
+    result = await tx.run(query, parameters)
+    return await result.single()
+
+
+async def aread(session, name: str, query: str, parameters: dict | None = None, *, timeout: float | None = None, **kwparameters) -> list:
+    """Async read(): run a read query and return all records."""
+    return await aexecute_read(session, name, _afetch_all, query, {**(parameters or {}), **kwparameters}, timeout=timeout)
+
+
+async def aread_one(session, name: str, query: str, parameters: dict | None = None, *, timeout: float | None = None, **kwparameters):
+    """Async read_one(): run a read query and return its first record, or None."""
+    return await aexecute_read(session, name, _afetch_one, query, {**(parameters or {}), **kwparameters}, timeout=timeout)
+
+
+async def awrite(session, name: str, query: str, parameters: dict | None = None, *, timeout: float | None = None, **kwparameters) -> list:
+    """Async write(): run a write query and return all records."""
+    return await aexecute_write(session, name, _afetch_all, query, {**(parameters or {}), **kwparameters}, timeout=timeout)
+
+
+async def awrite_one(session, name: str, query: str, parameters: dict | None = None, *, timeout: float | None = None, **kwparameters):
+    """Async write_one(): run a write query and return its first record, or None."""
+    return await aexecute_write(session, name, _afetch_one, query, {**(parameters or {}), **kwparameters}, timeout=timeout)
+
+
+async def astream(session, name: str, query: str, parameters: dict | None = None, *, timeout: float | None = None, **kwparameters):
+    """Async generator over a read query's records, pulled from the server in
+    fetch-size batches as they are consumed, so memory stays flat however many match.
+
+    Runs as one explicit transaction on `session` (open it read_only to route
+    to a reader) without retries: records already handed out cannot be taken
+    back, so a failure mid-stream is raised to the consumer.
+    """
+    stats = current_stats()
+    if stats is not None:
+        stats.transactions += 1
+        stats.queries += 1
+    timeout = settings.neo4j_query_timeout if timeout is None else timeout
+    started = time.perf_counter()
+    rows = 0
+    error = None
+    try:
+        tx = await session.begin_transaction(metadata={"query": name}, timeout=timeout or None)
+        async with tx:
+            result = await tx.run(query, {**(parameters or {}), **kwparameters})
+            async for record in result:
+                rows += 1
+                yield record
+    except (DriverError, Neo4jError) as e:
+        error = e
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        observe_query(name, READ, elapsed, error=error, rows=rows)
+        if stats is not None:
+            stats.db_seconds += elapsed
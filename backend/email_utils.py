@@ -1,23 +1,10 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
 from config import settings
 from jose import jwt
 from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
 from typing import Optional
 
-# Email configuration
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.mail_username,
-    MAIL_PASSWORD=settings.mail_password,
-    MAIL_FROM=settings.mail_from,
-    MAIL_PORT=settings.mail_port,
-    MAIL_SERVER=settings.mail_server,
-    MAIL_FROM_NAME=settings.mail_from_name,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
-)
-
 def create_verification_token(email: str, expires_hours: int = 24) -> str:
     """Create a JWT token for email verification"""
     expire = datetime.utcnow() + timedelta(hours=expires_hours)
@@ -36,8 +23,12 @@ def verify_verification_token(token: str) -> Optional[str]:
     except Exception:
         return None
 
-async def send_verification_email(email: str, token: str):
-    """Send verification email to user"""
+def mail_configured() -> bool:
+    """Without SMTP credentials emails are printed to the console (development mode)."""
+    return bool(settings.mail_username and settings.mail_password)
+
+def render_verification_email(email: str, token: str) -> tuple[str, str]:
+    """Subject and HTML body of the verification email"""
     verification_url = f"{settings.frontend_url}/verify-email?token={token}"
     
     html_content = f"""
@@ -81,23 +72,34 @@ async def send_verification_email(email: str, token: str):
         </body>
     </html>
     """
-    
-    message = MessageSchema(
-        subject="Verify Your Email - LaundryApp",
-        recipients=[email],
-        body=html_content,
-        subtype=MessageType.html
-    )
-    
-    # Only send email if credentials are configured
-    if settings.mail_username and settings.mail_password:
-        fm = FastMail(conf)
-        await fm.send_message(message)
-    else:
-        # For development: print the verification URL
-        print(f"\n{'='*60}")
-        print(f"EMAIL VERIFICATION (Development Mode)")
-        print(f"{'='*60}")
-        print(f"To: {email}")
-        print(f"Verification URL: {verification_url}")
-        print(f"{'='*60}\n")
+    return "Verify Your Email - LaundryApp", html_content
+
+def print_verification_email(email: str, token: str):
+    """Development mode: print the verification URL instead of sending"""
+    verification_url = f"{settings.frontend_url}/verify-email?token={token}"
+    print(f"\n{'='*60}")
+    print(f"EMAIL VERIFICATION (Development Mode)")
+    print(f"{'='*60}")
+    print(f"To: {email}")
+    print(f"Verification URL: {verification_url}")
+    print(f"{'='*60}\n")
+
+# Outbox email templates: name -> (renderer, development-mode printer), both
+# called with the recipient and the entry's payload as keyword arguments
+TEMPLATES = {
+    "verification": (render_verification_email, print_verification_email),
+}
+
+def build_message(to: str, template: str, payload: dict) -> EmailMessage:
+    render, _ = TEMPLATES[template]
+    subject, html = render(to, **payload)
+    message = EmailMessage()
+    message["From"] = formataddr((settings.mail_from_name, settings.mail_from))
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(html, subtype="html")
+    return message
+
+def print_email(to: str, template: str, payload: dict):
+    _, show = TEMPLATES[template]
+    show(to, **payload)
@@ -0,0 +1,182 @@
+"""Booking and notification events pushed to clients over server-sent events.
+
+Routes call booking_changed() after their write has committed and the outbox
+dispatcher publishes a notification event per Notification it creates; GET
+/events/stream delivers the events addressed to the caller. Events are small
+hints ({"type": "booking", "booking_id", "status", "action"} or
+{"type": "notification", "notification_type", "booking_id"}); clients refetch
+what they display.
+
+Each worker keeps one EventHub mapping user id -> subscriber queues, so an idle
+stream costs a bounded queue and one suspended coroutine: no Neo4j session, no
+polling. The broker decides how a published event reaches the hub of every
+worker:
+
+- memory (default): straight into this worker's hub. Correct for one worker.
+- redis: PUBLISH on EVENTS_CHANNEL; each worker holds a single SUBSCRIBE
+  connection and hands messages to its own hub. Needs the `redis` package.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from typing import Iterable, Protocol
+
+from config import settings
+from metrics import EVENTS_OVERFLOWS, EVENTS_PUBLISHED, EVENTS_SUBSCRIBERS
+
+# Replaces the backlog of a client that stopped reading; it should refetch everything
+RESYNC = {"type": "resync"}
+
+
+class EventHub:
+    """This worker's open streams, keyed by user id. Used from the event loop only."""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._queues: defaultdict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._queues[user_id].add(queue)
+        EVENTS_SUBSCRIBERS.inc()
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        queues = self._queues.get(user_id)
+        if queues is None or queue not in queues:
+            return
+        queues.discard(queue)
+        EVENTS_SUBSCRIBERS.dec()
+        if not queues:
+            del self._queues[user_id]
+
+    def deliver(self, user_ids: Iterable[str], event: dict):
+        for user_id in user_ids:
+            for queue in self._queues.get(user_id, ()):
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(RESYNC)
+                    EVENTS_OVERFLOWS.inc()
+
+
+class EventBroker(Protocol):
+    async def start(self) -> None: ...
+
+    async def publish(self, user_ids: list[str], event: dict) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class InProcessBroker:
+    def __init__(self, hub: EventHub):
+        self.hub = hub
+
+    async def start(self):
+        pass
+
+    async def publish(self, user_ids: list[str], event: dict):
+        self.hub.deliver(user_ids, event)
+
+    async def close(self):
+        pass
+
+
+class RedisBroker:
+    """One pub/sub channel shared by all workers; each filters for its own subscribers."""
+
+    def __init__(self, hub: EventHub, url: str, channel: str):
+        self.hub = hub
+        self.url = url
+        self.channel = channel
+        self._client = None
+        self._listener: asyncio.Task | None = None
+
+    async def start(self):
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("EVENTS_BROKER=redis requires the redis package (pip install redis)")
+        self._client = aioredis.Redis.from_url(self.url)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    payload = json.loads(message["data"])
+                    self.hub.deliver(payload["to"], payload["event"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Streams stay open; events published while disconnected are lost
+                print(f"Warning: events subscription to {self.channel} failed, retrying: {e}")
+                await asyncio.sleep(1)
+
+    async def publish(self, user_ids: list[str], event: dict):
+        await self._client.publish(self.channel, json.dumps({"to": user_ids, "event": event}, separators=(",", ":")))
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+hub = EventHub(settings.events_queue_size)
+broker: EventBroker = (
+    RedisBroker(hub, settings.redis_url, settings.events_channel)
+    if settings.events_broker == "redis"
+    else InProcessBroker(hub)
+)
+
+
+async def start():
+    await broker.start()
+
+
+async def close():
+    await broker.close()
+
+
+async def publish(user_ids: Iterable[str | None], event: dict):
+    """Send `event` to every open stream of the given users. Never raises: the write already committed."""
+    recipients = sorted({user_id for user_id in user_ids if user_id})
+    if not recipients:
+        return
+    EVENTS_PUBLISHED.labels(event["type"]).inc()
+    try:
+        await broker.publish(recipients, event)
+    except Exception as e:
+        print(f"Warning: failed to publish {event['type']} event: {e}")
+
+
+async def booking_changed(booking: dict, action: str):
+    """Tell both parties about `booking`. Notification events come from the
+    outbox dispatcher once it has materialized the notifications."""
+    await publish(
+        [booking["customer_id"], booking["provider_id"]],
+        {"type": "booking", "action": action, "booking_id": booking["id"], "status": booking["status"]},
+    )
+
+
+async def stream(user_id: str):
+    """SSE body for one client: its events as they arrive, a comment line when idle."""
+    queue = hub.subscribe(user_id)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.events_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+    finally:
+        hub.unsubscribe(user_id, queue)
@@ -0,0 +1,169 @@
+"""Streamed CSV / NDJSON downloads for GET /bookings/export and /receipts/export.
+
+Providers reconcile their cash takings from these instead of paging through
+/bookings/mine and /receipts/mine in the browser. The response body is an
+async generator: rows come from the repository's export(), which on Neo4j
+pulls them off the result cursor (db.astream) one fetch batch at a time, are
+encoded, optionally gzipped, and handed to the server in CHUNK_BYTES pieces
+as fast as the client reads them. Nothing holds more than a chunk, so a
+ten-year history downloads in the same memory as a ten-row one.
+
+The body runs after the route has returned, on its own read-only session
+(open_repositories) rather than the request's. Status and headers go out
+before the first row, so a failure mid-stream can only cut the download
+short: the client sees a truncated transfer (and a gzip download a corrupt
+archive) rather than a partial file that looks complete.
+"""
+import asyncio
+import csv
+import io
+import json
+import time
+import zlib
+from contextlib import aclosing
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Callable
+
+from fastapi.responses import StreamingResponse
+
+from metrics import EXPORT_DURATION, EXPORT_ROWS
+from repositories import Repositories, open_repositories
+
+# Encoded bytes gathered before a write to the client
+CHUNK_BYTES = 64 * 1024
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.ndjson: "application/x-ndjson",
+}
+
+BOOKING_COLUMNS = (
+    "id", "created_at", "schedule_at", "status",
+    "customer_id", "customer_name", "customer_contact",
+    "provider_id", "provider_shop_name",
+    "category_id", "category_name", "pricing_type",
+    "weight_kg", "total_price", "notes",
+)
+
+RECEIPT_COLUMNS = (
+    "id", "created_at", "order_id",
+    "customer_id", "customer_name", "customer_contact", "customer_address",
+    "provider_id", "provider_name", "provider_contact", "provider_address",
+    "items", "subtotal", "delivery_fee", "total",
+)
+
+
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        # Receipt line items: "Wash & Fold (6 kg); Dry Clean (2.5 kg)"
+        value = "; ".join(f"{item.get('service_name')} ({item.get('weight_kg'):g} kg)" for item in value)
+    if isinstance(value, str) and value[:1] in _FORMULA_PREFIXES:
+        # Names and notes are user input; keep spreadsheets from running them as formulas
+        return "'" + value
+    return value
+
+
+async def _encode(rows: AsyncIterator[dict], columns: tuple[str, ...], fmt: ExportFormat, compress: bool):
+    buffer = io.StringIO()
+    if fmt is ExportFormat.csv:
+        writer = csv.writer(buffer)
+        # BOM so Excel reads the names as UTF-8
+        buffer.write("\ufeff")
+        writer.writerow(columns)
+
+        def write(row):
+            writer.writerow([_csv_cell(row.get(column)) for column in columns])
+    else:
+        def write(row):
+            buffer.write(json.dumps({column: row.get(column) for column in columns}, default=_json_default, ensure_ascii=False))
+            buffer.write("\n")
+
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def take() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return gzip.compress(data) if gzip is not None else data
+
+    async for row in rows:
+        write(row)
+        if buffer.tell() >= CHUNK_BYTES:
+            chunk = take()
+            if chunk:
+                yield chunk
+    chunk = take()
+    if gzip is not None:
+        chunk += gzip.flush()
+    if chunk:
+        yield chunk
+
+
+def export_response(
+    kind: str,
+    columns: tuple[str, ...],
+    fmt: ExportFormat,
+    compress: bool,
+    rows_of: Callable[[Repositories], AsyncIterator[dict]],
+) -> StreamingResponse:
+    """A download of `rows_of(repos)`, called once the body starts on its own session.
+
+    With `compress` the file itself is gzipped (name.csv.gz, application/gzip),
+    not the transfer, so it is saved compressed.
+    """
+    filename = f"{kind}-{datetime.now().strftime('%Y%m%d')}.{fmt.value}" + (".gz" if compress else "")
+
+    async def body():
+        started = time.perf_counter()
+        outcome = "error"
+        rows = 0
+        try:
+            async with open_repositories(read_only=True) as repos:
+                async with aclosing(rows_of(repos)) as source:
+                    async def counted():
+                        nonlocal rows
+                        async for row in source:
+                            rows += 1
+                            yield row
+
+                    async for chunk in _encode(counted(), columns, fmt, compress):
+                        yield chunk
+            outcome = "ok"
+        except asyncio.CancelledError:
+            # Client went away; the session and its transaction are closed on the way out
+            outcome = "disconnected"
+            raise
+        finally:
+            EXPORT_ROWS.labels(kind, fmt.value).inc(rows)
+            EXPORT_DURATION.labels(kind, outcome).observe(time.perf_counter() - started)
+
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip" if compress else MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+            # Let nginx pass chunks through instead of buffering the whole file
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -0,0 +1,205 @@
+"""Offline Philippine address gazetteer for /places/autocomplete.
+
+An optional local index of provinces, cities/municipalities, barangays and
+streets. places.search() answers from it first and only asks Nominatim when
+it has no match, so most keystrokes never leave the process. Results have the
+same shape as Nominatim's (place_id, lat, lon, display_name, type,
+addresstype, name, address{...}), which AddressAutocomplete already renders.
+
+Build the index once from a CSV extract (OSM or PSGC joined with coordinates)
+with the columns
+
+    name,kind,lat,lon,barangay,city,province,postcode
+
+where kind is province, city, municipality, barangay or street and the
+barangay/city/province/postcode columns name the place's parents (blank where
+they do not apply):
+
+    python gazetteer.py build ph_places.csv ph_gazetteer.idx
+
+and point PLACES_GAZETTEER_PATH at the output. The file is one sorted array
+of records, memory-mapped read-only, so it costs page cache rather than
+Python heap, and workers share it:
+
+    magic (8 bytes) | count (u64) | count + 1 record offsets (u64) | records
+
+Each record is `key \\t rank \\t json`. The key is the normalized display text
+("poblacion makati city metro manila"); a query is normalized the same way and
+looked up by binary search for the first key it prefixes. Up to SCAN_LIMIT
+keys in that range are ranked (bigger places first, then shorter keys) and
+only the returned ones have their JSON decoded.
+"""
+import argparse
+import csv
+import json
+import mmap
+import re
+import struct
+import unicodedata
+
+MAGIC = b"PHGAZ\x00\x01\x00"
+_HEADER = struct.Struct("<8sQ")
+_OFFSET = struct.Struct("<Q")
+
+# Lower ranks are listed first
+KIND_RANK = {"province": 0, "city": 1, "municipality": 1, "barangay": 2, "street": 3}
+# Prefix matches considered per lookup before ranking
+SCAN_LIMIT = 256
+
+_WORD = re.compile(r"[0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    """Lower-case ASCII words separated by single spaces ("Parañaque" -> "paranaque")."""
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return " ".join(_WORD.findall(folded.lower()))
+
+
+def _place(row: dict, place_id: int) -> dict:
+    """Nominatim-shaped result for a CSV row."""
+    kind = row["kind"]
+    name = row["name"].strip()
+    address = {}
+    if kind == "street":
+        address["road"] = name
+    if kind == "barangay":
+        address["suburb"] = name
+    elif row.get("barangay"):
+        address["suburb"] = row["barangay"].strip()
+    if kind in ("city", "municipality"):
+        address[kind if kind == "city" else "town"] = name
+    elif row.get("city"):
+        address["city"] = row["city"].strip()
+    if kind == "province":
+        address["state"] = name
+    elif row.get("province"):
+        address["state"] = row["province"].strip()
+    if row.get("postcode"):
+        address["postcode"] = row["postcode"].strip()
+    address["country"] = "Philippines"
+    address["country_code"] = "ph"
+    display = [name] + [v for k, v in address.items() if k not in ("road", "country_code", "postcode") and v != name]
+    return {
+        "place_id": f"gaz-{place_id}",
+        "lat": str(row["lat"]).strip(),
+        "lon": str(row["lon"]).strip(),
+        "display_name": ", ".join(display),
+        "class": "highway" if kind == "street" else "place",
+        "type": kind,
+        "addresstype": "road" if kind == "street" else kind,
+        "name": name,
+        "address": address,
+    }
+
+
+def build(csv_path: str, out_path: str) -> int:
+    """Write the index for `csv_path` to `out_path`; returns the number of records."""
+    records: dict[bytes, bytes] = {}
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            kind = (row.get("kind") or "").strip().lower()
+            if kind not in KIND_RANK or not (row.get("name") or "").strip() or not row.get("lat") or not row.get("lon"):
+                continue
+            row["kind"] = kind
+            place = _place(row, i)
+            key = normalize(place["display_name"])
+            # First occurrence wins for duplicate display names
+            if key and key.encode() not in records:
+                payload = json.dumps(place, ensure_ascii=False, separators=(",", ":"))
+                records[key.encode()] = f"{KIND_RANK[kind]}\t{payload}".encode()
+    keys = sorted(records)
+    with open(out_path, "wb") as out:
+        out.write(_HEADER.pack(MAGIC, len(keys)))
+        offset = 0
+        for key in keys:
+            out.write(_OFFSET.pack(offset))
+            offset += len(key) + 1 + len(records[key])
+        out.write(_OFFSET.pack(offset))
+        for key in keys:
+            out.write(key + b"\t" + records[key])
+    return len(keys)
+
+
+class Gazetteer:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a gazetteer index")
+        self._offsets_at = _HEADER.size
+        self._data_at = self._offsets_at + (self.count + 1) * _OFFSET.size
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def _record(self, i: int) -> tuple[int, int]:
+        start = _OFFSET.unpack_from(self._mm, self._offsets_at + i * _OFFSET.size)[0]
+        end = _OFFSET.unpack_from(self._mm, self._offsets_at + (i + 1) * _OFFSET.size)[0]
+        return self._data_at + start, self._data_at + end
+
+    def _key(self, i: int) -> tuple[bytes, int, int]:
+        start, end = self._record(i)
+        tab = self._mm.find(b"\t", start, end)
+        return self._mm[start:tab], tab + 1, end
+
+    def lookup(self, q: str, limit: int) -> list[dict]:
+        """Places whose display text starts with `q`, best first."""
+        prefix = normalize(q).encode()
+        if not prefix:
+            return []
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid)[0] < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        candidates = []
+        for i in range(lo, min(lo + SCAN_LIMIT, self.count)):
+            key, rest, end = self._key(i)
+            if not key.startswith(prefix):
+                break
+            rank = self._mm[rest:rest + 1]
+            candidates.append((int(rank), len(key), rest + 2, end))
+        if not candidates:
+            self.misses += 1
+            return []
+        self.hits += 1
+        candidates.sort()
+        return [json.loads(self._mm[start:end]) for _, _, start, end in candidates[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline Philippine address gazetteer")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="build an index from a CSV extract")
+    build_cmd.add_argument("csv", help="name,kind,lat,lon,barangay,city,province,postcode")
+    build_cmd.add_argument("out", help="index file to write (PLACES_GAZETTEER_PATH)")
+    lookup_cmd = sub.add_parser("lookup", help="query an index")
+    lookup_cmd.add_argument("index")
+    lookup_cmd.add_argument("q")
+    lookup_cmd.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(f"Wrote {build(args.csv, args.out)} places to {args.out}")
+    else:
+        gazetteer = Gazetteer(args.index)
+        try:
+            for place in gazetteer.lookup(args.q, args.limit):
+                print(place["display_name"])
+        finally:
+            gazetteer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Great-circle distances and a grid index of points, for the memory backend.
+
+Neo4j answers GET /users/providers/nearby from the `provider_location` point
+index; GeoGrid plays that part for DATA_BACKEND=memory so a lookup only looks
+at the cells around the search circle.
+"""
+import math
+from collections import defaultdict
+
+# Mean Earth radius, as used by Neo4j's point.distance for WGS-84 points
+EARTH_RADIUS_M = 6_371_008.8
+
+# ~11 km of latitude per cell
+CELL_DEGREES = 0.1
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Haversine distance in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cell(lat: float, lon: float) -> tuple[int, int]:
+    return math.floor(lat / CELL_DEGREES), math.floor(lon / CELL_DEGREES)
+
+
+class GeoGrid:
+    """Ids bucketed by CELL_DEGREES cell of their (lat, lon)."""
+
+    def __init__(self):
+        self._cells: defaultdict[tuple[int, int], set[str]] = defaultdict(set)
+        self._points: dict[str, tuple[float, float]] = {}
+
+    def __len__(self):
+        return len(self._points)
+
+    def put(self, id: str, lat: float, lon: float):
+        self.remove(id)
+        self._points[id] = (lat, lon)
+        self._cells[_cell(lat, lon)].add(id)
+
+    def remove(self, id: str):
+        point = self._points.pop(id, None)
+        if point is None:
+            return
+        cell = _cell(*point)
+        self._cells[cell].discard(id)
+        if not self._cells[cell]:
+            del self._cells[cell]
+
+    def within(self, lat: float, lon: float, radius_m: float) -> list[tuple[str, float]]:
+        """(id, distance in meters) of every point within `radius_m`, nearest first."""
+        dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+        # Longitude degrees shrink towards the poles; clamp to keep the box finite
+        dlon = dlat / max(math.cos(math.radians(lat)), 0.01)
+        lat_lo, lon_lo = _cell(lat - dlat, lon - dlon)
+        lat_hi, lon_hi = _cell(lat + dlat, lon + dlon)
+        hits = []
+        for i in range(lat_lo, lat_hi + 1):
+            for j in range(lon_lo, lon_hi + 1):
+                for id in self._cells.get((i, j), ()):
+                    d = distance_m(lat, lon, *self._points[id])
+                    if d <= radius_m:
+                        hits.append((id, d))
+        hits.sort(key=lambda hit: hit[1])
+        return hits
@@ -4,7 +4,11 @@ from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from config import settings
-from db import close_driver, get_driver
+from db import close_async_driver, close_driver, get_driver
+from query_stats import QueryStatsMiddleware
+from metrics import MetricsMiddleware, router as metrics_router
+from schema import bootstrap as bootstrap_schema
+from password_hashing import shutdown as shutdown_password_hashing
 from auth import router as auth_router
 from users import router as users_router
 from services import router as services_router
@@ -14,9 +18,14 @@ from receipts import router as receipts_router
 from routes.admin import router as admin_router
 from routes.bookings import router as bookings_router
 from routes.categories import router as categories_router
+from routes.events import router as events_router
 from routes.places import router as places_router
 from routes.reviews import router as reviews_router
+from routes.reports import router as reports_router
 from oauth import router as oauth_router
+import events
+from outbox import dispatcher as outbox_dispatcher
+import places
 from dotenv import load_dotenv
 import os
 
@@ -30,6 +39,12 @@ app.add_middleware(
     max_age=3600,  # Session expires after 1 hour
 )
 
+# Route latency histograms and status codes for GET /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Per-request Neo4j query count and DB time (X-DB-Queries / Server-Timing headers)
+app.add_middleware(QueryStatsMiddleware)
+
 # CORS for local development (when running React dev server separately)
 app.add_middleware(
     CORSMiddleware,
@@ -56,8 +71,11 @@ app.include_router(bookings_router)
 app.include_router(admin_router)
 app.include_router(categories_router)
 app.include_router(notifications_router)
+app.include_router(events_router)
 app.include_router(places_router)
 app.include_router(reviews_router)
+app.include_router(reports_router)
+app.include_router(metrics_router)
 
 # Serve static files (React build)
 try:
@@ -72,6 +90,9 @@ except RuntimeError:
 
 @app.on_event("startup")
 def startup_event():
+    if settings.data_backend == "memory":
+        print("DATA_BACKEND=memory: serving from the in-process store, Neo4j is not used")
+        return
     # Proactively verify Neo4j connectivity at startup for clear errors
     try:
         get_driver().verify_connectivity()
@@ -80,6 +101,24 @@ def startup_event():
         print(f"Warning: Neo4j connection failed at startup: {e}")
         # Re-raise so the app fails fast with a clear log
         raise
+    if settings.schema_bootstrap_on_startup:
+        try:
+            bootstrap_schema()
+        except Exception as e:
+            # Existing data may violate a new constraint; keep serving and surface it in logs
+            print(f"Warning: Neo4j schema bootstrap failed: {e}")
+
+@app.on_event("startup")
+async def start_events():
+    await events.start()
+
+@app.on_event("startup")
+async def start_outbox_dispatcher():
+    await outbox_dispatcher.start()
+
+@app.on_event("startup")
+async def start_places_client():
+    await places.start()
 
 # Health check endpoint for Render
 @app.get("/health")
@@ -117,7 +156,7 @@ async def catch_all(path_name: str, request: Request):
     # Don't catch API routes - let them return proper 404 JSON
     # Only block actual API endpoints, not frontend routes
     # API routes have specific patterns like /api_prefix/endpoint
-    api_prefixes = ("auth/", "oauth/", "users/", "services/", "orders/", "receipts/", "bookings/", "admin/", "categories/", "notifications/", "places/", "reviews/")
+    api_prefixes = ("auth/", "oauth/", "users/", "services/", "orders/", "receipts/", "bookings/", "admin/", "categories/", "notifications/", "events/", "places/", "reviews/", "reports/")
     static_files = ("static", "assets", "logo.png", "favicon.ico", "health", "docs", "openapi.json")
     
     # Check if it's an API route (has slash after prefix) or static file
@@ -131,5 +170,10 @@ async def catch_all(path_name: str, request: Request):
     return {"message": "API is running. Build frontend and place in static/ folder."}
 
 @app.on_event("shutdown")
-def shutdown_event():
-    close_driver()
\ No newline at end of file
+async def shutdown_event():
+    await outbox_dispatcher.close()
+    await events.close()
+    await places.close()
+    await close_async_driver()
+    close_driver()
+    shutdown_password_hashing()
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""Prometheus metrics, served in text format on GET /metrics.
+
+- HTTP: latency histogram and request counter per route template and status,
+  recorded by MetricsMiddleware.
+- Neo4j: latency, rows returned, retries and errors per stable query name
+  ("bookings.list_mine"), recorded by the db.py transaction helpers.
+- Events: open /events/stream subscribers on this worker, events published
+  by type and streams that overflowed and were told to resync.
+- Outbox: entries delivered, retried and dead-lettered by kind.
+- Places: address lookups by cache result, shed lookups and Nominatim latency.
+- Exports: rows streamed by kind and format, and how long each download took.
+- Saturation: driver pool connections in use/idle, AnyIO threadpool
+  occupancy and waiting tasks, and password hashing queue depth; sampled
+  when /metrics is scraped.
+
+Route labels use the matched path template (/bookings/{booking_id}/accept),
+never the raw path, so label cardinality stays bounded.
+"""
+import time
+
+import anyio.to_thread
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+router = APIRouter(tags=["metrics"])
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP responses by route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+NEO4J_QUERY_DURATION = Histogram(
+    "neo4j_query_duration_seconds",
+    "Neo4j transaction latency per attempt by query name",
+    ["query", "mode"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+NEO4J_QUERY_ROWS = Histogram(
+    "neo4j_query_rows",
+    "Rows handed back to the caller by query name",
+    ["query"],
+    buckets=(0, 1, 5, 10, 25, 50, 100, 250, 1000),
+)
+NEO4J_QUERY_RETRIES = Counter("neo4j_query_retries_total", "Retried transaction attempts by query name", ["query"])
+NEO4J_QUERY_ERRORS = Counter("neo4j_query_errors_total", "Failed transactions by query name and error type", ["query", "error"])
+
+NEO4J_POOL_IN_USE = Gauge("neo4j_pool_connections_in_use", "Driver connections checked out", ["driver"])
+NEO4J_POOL_IDLE = Gauge("neo4j_pool_connections_idle", "Driver connections idle in the pool", ["driver"])
+NEO4J_POOL_MAX = Gauge("neo4j_pool_connections_max", "Configured driver pool size", ["driver"])
+
+THREADPOOL_BUSY = Gauge("threadpool_busy_threads", "AnyIO worker threads running sync handlers/dependencies")
+THREADPOOL_LIMIT = Gauge("threadpool_max_threads", "AnyIO worker thread limit")
+THREADPOOL_WAITING = Gauge("threadpool_waiting_tasks", "Tasks queued for an AnyIO worker thread")
+PASSWORD_HASH_QUEUED = Gauge("password_hash_queued", "Password hash jobs waiting for a worker")
+PASSWORD_HASH_REJECTED = Gauge("password_hash_rejected", "Password hash jobs shed with 503 since start")
+
+EVENTS_SUBSCRIBERS = Gauge("events_subscribers", "Open /events/stream connections on this worker")
+EVENTS_PUBLISHED = Counter("events_published_total", "Events handed to the broker by type", ["type"])
+EVENTS_OVERFLOWS = Counter("events_overflows_total", "Event queues that overflowed and were replaced by a resync")
+
+OUTBOX_ENTRIES = Counter("outbox_entries_total", "Outbox entries processed by kind and outcome", ["kind", "outcome"])
+OUTBOX_BATCH_DURATION = Histogram(
+    "outbox_batch_duration_seconds",
+    "Time to deliver one outbox batch by kind",
+    ["kind"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+PLACES_LOOKUPS = Counter("places_lookups_total", "Address lookups by source (gazetteer, or cache hit, miss, coalesced)", ["result"])
+PLACES_SHED = Counter("places_shed_total", "Address lookups refused because the Nominatim rate limit was saturated")
+PLACES_UPSTREAM_DURATION = Histogram(
+    "places_upstream_duration_seconds",
+    "Nominatim request latency by HTTP status (or timeout/error)",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+EXPORT_ROWS = Counter("export_rows_total", "Rows streamed by /bookings/export and /receipts/export", ["kind", "format"])
+EXPORT_DURATION = Histogram(
+    "export_duration_seconds",
+    "Time to stream one export to the client by kind and outcome",
+    ["kind", "outcome"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+
+
+def _rows(result) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+def observe_query(name: str, mode: str, seconds: float, result=None, error: Exception | None = None,
+                  rows: int | None = None):
+    """`rows` overrides the count taken from `result`, for streamed results."""
+    NEO4J_QUERY_DURATION.labels(name, mode).observe(seconds)
+    if error is not None:
+        NEO4J_QUERY_ERRORS.labels(name, type(error).__name__).inc()
+    else:
+        NEO4J_QUERY_ROWS.labels(name).observe(_rows(result) if rows is None else rows)
+
+
+def observe_retry(name: str):
+    NEO4J_QUERY_RETRIES.labels(name).inc()
+
+
+def _sample_saturation():
+    # Imported here: db imports this module for the query hooks
+    from db import pool_stats
+    from password_hashing import executor_stats
+
+    for driver, stats in pool_stats().items():
+        NEO4J_POOL_IN_USE.labels(driver).set(stats["in_use"])
+        NEO4J_POOL_IDLE.labels(driver).set(stats["idle"])
+        NEO4J_POOL_MAX.labels(driver).set(stats["max"])
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    THREADPOOL_BUSY.set(limiter.borrowed_tokens)
+    THREADPOOL_LIMIT.set(limiter.total_tokens)
+    THREADPOOL_WAITING.set(limiter.statistics().tasks_waiting)
+    hashing = executor_stats()
+    PASSWORD_HASH_QUEUED.set(hashing["queued"])
+    PASSWORD_HASH_REJECTED.set(hashing["rejected"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    _sample_saturation()
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency and status per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            # Unmatched paths (static files, probes) share one label
+            label = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, label).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, label, str(status)).inc()
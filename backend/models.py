@@ -1,7 +1,7 @@
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr, Field
 from enum import Enum
-from datetime import datetime
+from datetime import date, datetime
 
 class UserRole(str, Enum):
     admin = "admin"
@@ -128,6 +128,11 @@ class OrderPublic(BaseModel):
     total_cost: float
     created_at: datetime
 
+class OrderPage(BaseModel):
+    items: List[OrderPublic]
+    # Pass back as ?cursor= to fetch the next (older) page; None on the last page
+    next_cursor: Optional[str] = None
+
 # Auth / security inputs
 class ChangePasswordRequest(BaseModel):
     current_password: str
@@ -187,6 +192,11 @@ class BookingPublic(BaseModel):
     notes: Optional[str] = None
     created_at: datetime
 
+class BookingPage(BaseModel):
+    items: List[BookingPublic]
+    # Pass back as ?cursor= to fetch the next (older) page; None on the last page
+    next_cursor: Optional[str] = None
+
 class BookingLineItem(BaseModel):
     category_id: str
     category_name: str
@@ -215,13 +225,21 @@ class ReceiptPublic(BaseModel):
     # Optional enriched fields for provider/customer visibility
     customer_name: Optional[str] = None
     customer_contact: Optional[str] = None
+    customer_address: Optional[str] = None
     provider_name: Optional[str] = None
+    provider_contact: Optional[str] = None
+    provider_address: Optional[str] = None
     items: Optional[list[dict]] = None
     subtotal: float
     delivery_fee: float
     total: float
     created_at: datetime
 
+class ReceiptPage(BaseModel):
+    items: List[ReceiptPublic]
+    # Pass back as ?cursor= to fetch the next (older) page; None on the last page
+    next_cursor: Optional[str] = None
+
 # Reviews
 class ReviewCreate(BaseModel):
     provider_id: str
@@ -238,3 +256,42 @@ class ReviewPublic(BaseModel):
     rating: int
     comment: Optional[str] = None
     created_at: datetime
+
+# Notifications
+class NotificationPublic(BaseModel):
+    id: str
+    type: str
+    message: str
+    created_at: datetime
+    read: bool = False
+    receipt_id: Optional[str] = None
+    booking_id: Optional[str] = None
+
+class NotificationPage(BaseModel):
+    items: List[NotificationPublic]
+    # Pass back as ?cursor= to fetch the next (older) page; None on the last page
+    next_cursor: Optional[str] = None
+
+# Reports
+class SalesGranularity(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+class SalesBucket(BaseModel):
+    # First day of the period (Monday for weeks); days are Philippine time
+    period_start: date
+    # Bookings created in the period, by current status
+    bookings: dict[str, int]
+    receipts: int
+    revenue: float
+    kg: float
+    avg_ticket: float
+
+class SalesReport(BaseModel):
+    provider_id: str
+    granularity: SalesGranularity
+    date_from: date
+    date_to: date
+    buckets: List[SalesBucket]
+    totals: SalesBucket
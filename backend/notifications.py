@@ -1,35 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
-from models import UserPublic
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from models import NotificationPage, UserPublic
 from auth import get_current_user
-from db import get_session
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from repositories import Repositories, get_repos
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
-@router.get("/mine")
-def list_my_notifications(current_user: UserPublic = Depends(get_current_user)):
-    with get_session() as session:
-        result = session.run(
-            """
-            MATCH (n:Notification)-[:FOR_USER]->(u:User {id: $uid})
-            RETURN n { .id, .type, .message, .created_at, .read, .receipt_id, .booking_id } AS n
-            ORDER BY n.created_at DESC
-            """,
-            uid=current_user.id,
-        )
-        return [rec["n"] for rec in result]
+@router.get("/mine", response_model=NotificationPage)
+async def list_my_notifications(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: UserPublic = Depends(get_current_user),
+    repos: Repositories = Depends(get_repos),
+):
+    """Newest-first page of the caller's notifications; pass `next_cursor` back as `cursor` for older ones."""
+    items, next_cursor = await repos.notifications.list_page(current_user.id, limit=limit, cursor=cursor)
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/unread_count")
+async def get_unread_count(current_user: UserPublic = Depends(get_current_user), repos: Repositories = Depends(get_repos)):
+    """Served from the counter on the user, not by counting notifications."""
+    return {"unread_count": await repos.notifications.unread_count(current_user.id)}
+
+@router.patch("/read_all")
+async def mark_all_notifications_read(current_user: UserPublic = Depends(get_current_user), repos: Repositories = Depends(get_repos)):
+    return {"marked": await repos.notifications.mark_all_read(current_user.id), "unread_count": 0}
 
 @router.patch("/{notif_id}/read")
-def mark_notification_read(notif_id: str, current_user: UserPublic = Depends(get_current_user)):
-    with get_session() as session:
-        rec = session.run(
-            """
-            MATCH (n:Notification {id: $id})-[:FOR_USER]->(u:User {id: $uid})
-            SET n.read = true
-            RETURN n { .id, .type, .message, .created_at, .read } AS n
-            """,
-            id=notif_id,
-            uid=current_user.id,
-        ).single()
-        if not rec:
-            raise HTTPException(status_code=404, detail="Notification not found")
-        return rec["n"]
+async def mark_notification_read(notif_id: str, current_user: UserPublic = Depends(get_current_user), repos: Repositories = Depends(get_repos)):
+    notification = await repos.notifications.mark_read(notif_id, current_user.id)
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return notification
@@ -1,11 +1,10 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
 from authlib.integrations.starlette_client import OAuth
 from config import settings
-from db import get_session
+from repositories import Repositories, get_repos
 from auth import create_access_token
 from models import UserRole
-import uuid
 import httpx
 
 router = APIRouter(prefix="/oauth", tags=["oauth"])
@@ -33,57 +32,9 @@ oauth.register(
 )
 
 
-def get_or_create_oauth_user(email: str, full_name: str, provider: str, provider_id: str):
+async def get_or_create_oauth_user(repos: Repositories, email: str, full_name: str, provider: str, provider_id: str):
     """Get existing user or create new customer account from OAuth"""
-    with get_session() as session:
-        # Check if user exists
-        result = session.run(
-            """
-            MATCH (u:User {email: $email})
-            RETURN u { .id, .role, .email, .contact_number, .full_name, .address, 
-                      .shop_name, .shop_address, .provider_status, .banned, .is_available } AS user
-            """,
-            email=email
-        ).single()
-        
-        if result:
-            # User exists, return their info
-            return result["user"]
-        
-        # Create new customer account
-        user_id = str(uuid.uuid4())
-        session.run(
-            """
-            CREATE (u:User {
-                id: $id,
-                role: 'customer',
-                email: $email,
-                contact_number: 'Not provided',
-                full_name: $full_name,
-                address: 'Not provided',
-                banned: false,
-                email_verified: true,
-                oauth_provider: $provider,
-                oauth_id: $provider_id
-            })
-            RETURN u
-            """,
-            id=user_id,
-            email=email,
-            full_name=full_name,
-            provider=provider,
-            provider_id=provider_id
-        )
-        
-        return {
-            "id": user_id,
-            "role": "customer",
-            "email": email,
-            "contact_number": "Not provided",
-            "full_name": full_name,
-            "address": "Not provided",
-            "banned": False
-        }
+    return await repos.users.get_or_create_oauth(email, full_name, provider, provider_id)
 
 
 @router.get("/google/login")
@@ -94,7 +45,7 @@ async def google_login(request: Request):
 
 
 @router.get("/google/callback")
-async def google_callback(request: Request):
+async def google_callback(request: Request, repos: Repositories = Depends(get_repos)):
     """Handle Google OAuth callback"""
     try:
         token = await oauth.google.authorize_access_token(request)
@@ -108,7 +59,7 @@ async def google_callback(request: Request):
         google_id = user_info.get('sub')
         
         # Get or create user
-        user = get_or_create_oauth_user(email, name, 'google', google_id)
+        user = await get_or_create_oauth_user(repos, email, name, 'google', google_id)
         
         # Check if banned
         if user.get('banned'):
@@ -141,7 +92,7 @@ async def facebook_login(request: Request):
 
 
 @router.get("/facebook/callback")
-async def facebook_callback(request: Request):
+async def facebook_callback(request: Request, repos: Repositories = Depends(get_repos)):
     """Handle Facebook OAuth callback"""
     try:
         token = await oauth.facebook.authorize_access_token(request)
@@ -165,7 +116,7 @@ async def facebook_callback(request: Request):
         facebook_id = user_info.get('id')
         
         # Get or create user
-        user = get_or_create_oauth_user(email, name, 'facebook', facebook_id)
+        user = await get_or_create_oauth_user(repos, email, name, 'facebook', facebook_id)
         
         # Check if banned
         if user.get('banned'):
@@ -1,90 +1,51 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
-from models import OrderCreate, OrderUpdate, OrderPublic, UserPublic, UserRole
+from zoneinfo import ZoneInfo
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from models import OrderCreate, OrderUpdate, OrderPage, OrderPublic, UserPublic, UserRole
 from auth import get_current_user
-from db import get_session
+from neo4j import AsyncSession
+from db import get_db, aexecute_write, aread, aread_one
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, keyset_filters
 import uuid
 
+# Philippine timezone
+PH_TZ = ZoneInfo('Asia/Manila')
+
+def get_ph_now():
+    """Get current time in Philippine timezone"""
+    return datetime.now(PH_TZ)
+
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
-def _calculate_total(session, items):
-    total = 0.0
-    for item in items:
-        rec = session.run("MATCH (s:Service {id: $id}) RETURN s.price_per_kg AS price", id=item.service_id).single()
-        if not rec:
-            raise HTTPException(status_code=400, detail=f"Service not found: {item.service_id}")
-        price = rec["price"]
-        total += price * item.weight_kg
-    return total
+# Prices `$items` ({service_id, weight_kg}) in one subquery: the ids that match no
+# Service, and the total of those that do. One row even when $items is empty.
+_PRICE_ITEMS = """
+CALL {
+  UNWIND coalesce($items, []) AS it
+  OPTIONAL MATCH (s:Service {id: it.service_id})
+  RETURN collect(CASE WHEN s IS NULL THEN it.service_id END) AS missing,
+         toFloat(sum(s.price_per_kg * it.weight_kg)) AS total
+}
+"""
 
-@router.post("/", response_model=OrderPublic)
-def create_order(payload: OrderCreate, current_user: UserPublic = Depends(get_current_user)):
-    if current_user.role != UserRole.customer:
-        raise HTTPException(status_code=403, detail="Only customers can create orders")
-    # use session bound to configured database
-    order_id = str(uuid.uuid4())
-    created_at = datetime.utcnow()
-    with get_session() as session:
-        # validate provider exists
-        prov = session.run("MATCH (p:User {id: $pid, role: 'provider'}) RETURN p", pid=payload.provider_id).single()
-        if not prov:
-            raise HTTPException(status_code=400, detail="Provider not found")
-        total = _calculate_total(session, payload.items)
-        session.run(
-            """
-            MATCH (c:User {id: $cid, role: 'customer'}), (p:User {id: $pid, role: 'provider'})
-            CREATE (o:Order {
-                id: $id, status: 'pending', delivery_option: $delivery_option, notes: $notes,
-                total_cost: $total_cost, created_at: $created_at
-            })-[:PLACED_BY]->(c)
-            WITH o, p
-            CREATE (o)-[:FOR_PROVIDER]->(p)
-            """,
-            cid=current_user.id,
-            pid=payload.provider_id,
-            id=order_id,
-            delivery_option=payload.delivery_option.value,
-            notes=payload.notes,
-            total_cost=total,
-            created_at=created_at.isoformat(),
-        )
-        # attach items as relationships for traceability
-        for it in payload.items:
-            session.run(
-                """
-                MATCH (o:Order {id: $oid}), (s:Service {id: $sid})
-                CREATE (o)-[:HAS_ITEM {weight_kg: $w}]->(s)
-                """,
-                oid=order_id, sid=it.service_id, w=it.weight_kg
-            )
-    return get_order(order_id, current_user)
-
-
-def _order_to_public(session, oid: str):
-    rec = session.run(
-        """
-        MATCH (o:Order {id: $id})-[:PLACED_BY]->(c:User)
-        MATCH (o)-[:FOR_PROVIDER]->(p:User)
-        OPTIONAL MATCH (o)-[hi:HAS_ITEM]->(s:Service)
-        RETURN o { .id, .status, .delivery_option, .notes, .total_cost, .created_at },
-               c.id AS customer_id, 
-               p.id AS provider_id,
-               p.shop_name AS provider_shop_name,
-               p.full_name AS provider_full_name,
-               p.shop_address AS provider_address,
-               p.contact_number AS provider_contact,
-               collect({service_id: s.id, weight_kg: hi.weight_kg}) AS items
-        """,
-        id=oid,
-    ).single()
-    if not rec:
-        return None
-    o = rec[0]
-    items = [
-        {"service_id": it.get("service_id"), "weight_kg": it.get("weight_kg")}
-        for it in rec["items"] if it.get("service_id") is not None
-    ]
+# Everything OrderPublic needs about `o`, `c` (customer) and `p` (provider);
+# items come from a pattern comprehension, so no row per item.
+_ORDER_FIELDS = """
+       o { .id, .status, .delivery_option, .notes, .total_cost, .created_at } AS o,
+       c.id AS customer_id,
+       p.id AS provider_id,
+       p.shop_name AS provider_shop_name,
+       p.full_name AS provider_full_name,
+       p.shop_address AS provider_address,
+       p.contact_number AS provider_contact,
+       [(o)-[hi:HAS_ITEM]->(s:Service) | {service_id: s.id, weight_kg: hi.weight_kg}] AS items
+"""
+
+
+def _order_to_public(rec) -> dict:
+    o = rec["o"]
     return {
         "id": o.get("id"),
         "customer_id": rec["customer_id"],
@@ -93,7 +54,7 @@ def _order_to_public(session, oid: str):
         "provider_full_name": rec.get("provider_full_name"),
         "provider_address": rec.get("provider_address"),
         "provider_contact": rec.get("provider_contact"),
-        "items": items,
+        "items": [{"service_id": it["service_id"], "weight_kg": it["weight_kg"]} for it in rec["items"]],
         "delivery_option": o.get("delivery_option"),
         "notes": o.get("notes"),
         "status": o.get("status"),
@@ -101,63 +62,183 @@ def _order_to_public(session, oid: str):
         "created_at": datetime.fromisoformat(o.get("created_at")),
     }
 
+
+def _check_services(missing: list[str]):
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Service not found: {missing[0]}")
+
+
+def _check_access(current_user: UserPublic, data: dict):
+    # customers only own their orders; providers only see orders for them
+    if current_user.role == UserRole.customer and data["customer_id"] != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if current_user.role == UserRole.provider and data["provider_id"] != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+
+# Validates, prices and writes the order with all its items, then reads it back:
+# one round trip however many items. Nothing is written unless the provider and
+# every service exist.
+_CREATE_ORDER_QUERY = """
+MATCH (c:User {id: $cid, role: 'customer'})
+OPTIONAL MATCH (p:User {id: $pid, role: 'provider'})
+""" + _PRICE_ITEMS + """
+WITH c, p, missing, total, p IS NOT NULL AND size(missing) = 0 AS ok
+CALL {
+  WITH c, p, total, ok
+  WITH c, p, total WHERE ok
+  CREATE (o:Order {
+    id: $id, status: 'pending', delivery_option: $delivery_option, notes: $notes,
+    total_cost: total, created_at: $created_at
+  })-[:PLACED_BY]->(c)
+  CREATE (o)-[:FOR_PROVIDER]->(p)
+  WITH o
+  UNWIND $items AS it
+  MATCH (s:Service {id: it.service_id})
+  CREATE (o)-[:HAS_ITEM {weight_kg: it.weight_kg}]->(s)
+}
+OPTIONAL MATCH (o:Order {id: $id})
+RETURN p IS NOT NULL AS provider_found, missing,
+""" + _ORDER_FIELDS
+
+
+async def _create_order_tx(tx, order_id: str, customer_id: str, payload: OrderCreate, created_at: datetime):
+    result = await tx.run(
+        _CREATE_ORDER_QUERY,
+        cid=customer_id,
+        pid=payload.provider_id,
+        id=order_id,
+        items=[it.model_dump() for it in payload.items],
+        delivery_option=payload.delivery_option.value,
+        notes=payload.notes,
+        created_at=created_at.isoformat(),
+    )
+    rec = await result.single()
+    if not rec:
+        raise HTTPException(status_code=403, detail="Only customers can create orders")
+    if not rec["provider_found"]:
+        raise HTTPException(status_code=400, detail="Provider not found")
+    _check_services(rec["missing"])
+    return _order_to_public(rec)
+
+
+@router.post("/", response_model=OrderPublic)
+async def create_order(payload: OrderCreate, current_user: UserPublic = Depends(get_current_user), session: AsyncSession = Depends(get_db)):
+    if current_user.role != UserRole.customer:
+        raise HTTPException(status_code=403, detail="Only customers can create orders")
+    order_id = str(uuid.uuid4())
+    return await aexecute_write(session, "orders.create", _create_order_tx, order_id, current_user.id, payload, get_ph_now())
+
+
+@router.get("/mine/list", response_model=OrderPage)
+async def list_my_orders(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    current_user: UserPublic = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    """Newest-first page of the caller's orders with their items and provider.
+
+    One query per page. date_from/date_to bound created_at; pass `next_cursor`
+    back as `cursor` to continue with older orders.
+    """
+    rel = "PLACED_BY" if current_user.role == UserRole.customer else "FOR_PROVIDER"
+    where, params = keyset_filters("o", cursor, date_from, date_to)
+    records = await aread(
+        session,
+        "orders.list_mine",
+        f"""
+        MATCH (o:Order)-[:{rel}]->(:User {{id: $id}})
+        {"WHERE " + " AND ".join(where) if where else ""}
+        WITH o ORDER BY o.created_at DESC, o.id DESC LIMIT $limit
+        MATCH (o)-[:PLACED_BY]->(c:User)
+        MATCH (o)-[:FOR_PROVIDER]->(p:User)
+        RETURN {_ORDER_FIELDS}
+        ORDER BY o.created_at DESC, o.id DESC
+        """,
+        params,
+        id=current_user.id,
+        # One extra row tells us whether there is a next page
+        limit=limit + 1,
+    )
+    items = [_order_to_public(rec) for rec in records[:limit]]
+    next_cursor = None
+    if len(records) > limit:
+        last = records[limit - 1]["o"]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+
 @router.get("/{order_id}", response_model=OrderPublic)
-def get_order(order_id: str, current_user: UserPublic = Depends(get_current_user)):
-    with get_session() as session:
-        data = _order_to_public(session, order_id)
-        if not data:
-            raise HTTPException(status_code=404, detail="Order not found")
-        # authorization: customers only own their orders; providers only see orders for them
-        if current_user.role == UserRole.customer and data["customer_id"] != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized")
-        if current_user.role == UserRole.provider and data["provider_id"] != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized")
-        return data
-
-@router.get("/mine/list", response_model=list[OrderPublic])
-def list_my_orders(current_user: UserPublic = Depends(get_current_user)):
-    with get_session() as session:
-        if current_user.role == UserRole.customer:
-            q = (
-                "MATCH (o:Order)-[:PLACED_BY]->(c:User {id: $id}) RETURN o.id AS id ORDER BY o.created_at DESC"
-            )
-        else:
-            q = (
-                "MATCH (o:Order)-[:FOR_PROVIDER]->(p:User {id: $id}) RETURN o.id AS id ORDER BY o.created_at DESC"
-            )
-        ids = [r["id"] for r in session.run(q, id=current_user.id)]
-        out: list[OrderPublic] = []
-        for oid in ids:
-            data = _order_to_public(session, oid)
-            if not data:
-                # Order might have been deleted or is incomplete; skip
-                continue
-            out.append(OrderPublic(**data))
-        return out
+async def get_order(order_id: str, current_user: UserPublic = Depends(get_current_user), session: AsyncSession = Depends(get_db)):
+    rec = await aread_one(
+        session,
+        "orders.get",
+        """
+        MATCH (o:Order {id: $id})-[:PLACED_BY]->(c:User)
+        MATCH (o)-[:FOR_PROVIDER]->(p:User)
+        RETURN
+        """ + _ORDER_FIELDS,
+        id=order_id,
+    )
+    if not rec:
+        raise HTTPException(status_code=404, detail="Order not found")
+    data = _order_to_public(rec)
+    _check_access(current_user, data)
+    return data
+
+
+# Checks access, prices the new items, replaces them and applies the other
+# fields in one statement; the order is locked first so concurrent updates
+# don't interleave their item replacements. Nothing is written unless the
+# caller may update the order and every service exists.
+_UPDATE_ORDER_QUERY = """
+OPTIONAL MATCH (o:Order {id: $id})-[:PLACED_BY]->(c:User)
+OPTIONAL MATCH (o)-[:FOR_PROVIDER]->(p:User)
+SET o._lock = true
+REMOVE o._lock
+WITH o, c, p,
+     CASE $role WHEN 'customer' THEN c.id = $uid WHEN 'provider' THEN p.id = $uid ELSE true END AS authorized
+""" + _PRICE_ITEMS + """
+WITH o, c, p, authorized, missing, total,
+     o IS NOT NULL AND coalesce(authorized, false) AND size(missing) = 0 AS ok
+CALL {
+  WITH o, total, ok
+  WITH o, total WHERE ok AND $items IS NOT NULL
+  SET o.total_cost = total
+  WITH o
+  OPTIONAL MATCH (o)-[old:HAS_ITEM]->()
+  DELETE old
+  WITH DISTINCT o
+  UNWIND $items AS it
+  MATCH (s:Service {id: it.service_id})
+  CREATE (o)-[:HAS_ITEM {weight_kg: it.weight_kg}]->(s)
+}
+FOREACH (_ IN CASE WHEN ok THEN [1] ELSE [] END | SET o += $updates)
+RETURN o IS NOT NULL AS found, coalesce(authorized, false) AS authorized, missing,
+""" + _ORDER_FIELDS
+
+
+async def _update_order_tx(tx, order_id: str, payload: OrderUpdate, current_user: UserPublic):
+    result = await tx.run(
+        _UPDATE_ORDER_QUERY,
+        id=order_id,
+        role=current_user.role.value,
+        uid=current_user.id,
+        items=None if payload.items is None else [it.model_dump() for it in payload.items],
+        updates=payload.model_dump(mode="json", exclude_none=True, exclude={"items"}),
+    )
+    rec = await result.single()
+    if not rec or not rec["found"]:
+        raise HTTPException(status_code=404, detail="Order not found")
+    if not rec["authorized"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    _check_services(rec["missing"])
+    return _order_to_public(rec)
+
 
 @router.patch("/{order_id}", response_model=OrderPublic)
-def update_order(order_id: str, payload: OrderUpdate, current_user: UserPublic = Depends(get_current_user)):
-    with get_session() as session:
-        data = _order_to_public(session, order_id)
-        if not data:
-            raise HTTPException(status_code=404, detail="Order not found")
-        if current_user.role == UserRole.customer and data["customer_id"] != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized")
-        if current_user.role == UserRole.provider and data["provider_id"] != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized")
-        # update items implies recalculation
-        if payload.items is not None:
-            # delete existing item rels
-            session.run("MATCH (:Order {id: $id})-[r:HAS_ITEM]->() DELETE r", id=order_id)
-            for it in payload.items:
-                session.run(
-                    "MATCH (o:Order {id: $oid}), (s:Service {id: $sid}) CREATE (o)-[:HAS_ITEM {weight_kg: $w}]->(s)",
-                    oid=order_id, sid=it.service_id, w=it.weight_kg
-                )
-            new_total = _calculate_total(session, payload.items)
-            session.run("MATCH (o:Order {id: $id}) SET o.total_cost = $t", id=order_id, t=new_total)
-        # update other fields
-        updates = {k: v for k, v in payload.model_dump(exclude_none=True, exclude={"items"}).items()}
-        if updates:
-            session.run("MATCH (o:Order {id: $id}) SET o += $u", id=order_id, u=updates)
-        return get_order(order_id, current_user)
+async def update_order(order_id: str, payload: OrderUpdate, current_user: UserPublic = Depends(get_current_user), session: AsyncSession = Depends(get_db)):
+    return await aexecute_write(session, "orders.update", _update_order_tx, order_id, payload, current_user)
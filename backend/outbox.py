@@ -0,0 +1,178 @@
+"""Transactional outbox for notifications and emails.
+
+Request handlers do not create Notification nodes or talk to SMTP. The write
+that causes a side effect also creates an (:OutboxEntry) in the same
+transaction, so the side effect is recorded exactly when the business change
+commits; OutboxDispatcher delivers it in the background:
+
+- kind 'notification' (user_id, type, message, created_at, booking_id,
+  receipt_id): materialized as a Notification, with the user's unread counter
+  bumped and the entry deleted, in one transaction per batch. SSE
+  `notification` events are published once that transaction commits.
+- kind 'email' (to, template, payload as JSON): claimed in batches and sent
+  over a single SMTP connection per batch. Failures are retried with jittered
+  exponential backoff; after OUTBOX_MAX_ATTEMPTS, or on a permanent (5xx)
+  rejection, the entry is dead-lettered (status 'dead') and listed by
+  GET /admin/outbox until an admin requeues it.
+
+`available_at` (epoch ms) is when an entry is next due: a claimed email is
+hidden until its claim expires, so a crashed dispatcher's batch is picked up
+again. Every worker runs a dispatcher; a lease on (:OutboxLease) lets only
+one of them dispatch at a time. Idle workers poll with one indexed read.
+"""
+import asyncio
+import json
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime
+
+import aiosmtplib
+
+import email_utils
+import events
+from config import settings
+from metrics import OUTBOX_BATCH_DURATION, OUTBOX_ENTRIES
+from pagination import PH_TZ
+from repositories import Repositories, open_repositories
+
+LEASE_MS = 30_000
+# How long a claimed email batch stays hidden from other claims
+EMAIL_CLAIM_MS = 120_000
+SMTP_TIMEOUT_SECONDS = 30
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def email_entry(to: str, template: str, **payload) -> dict:
+    """OutboxEntry properties for an email; `template` is a key of email_utils.TEMPLATES."""
+    return {
+        "id": str(uuid.uuid4()),
+        "kind": "email",
+        "to": to,
+        "template": template,
+        "payload": json.dumps(payload),
+        "attempts": 0,
+        "created_at": datetime.now(PH_TZ).isoformat(),
+        "available_at": now_ms(),
+    }
+
+
+def retry_at(attempts: int, now: int) -> int | None:
+    """When a failed entry is due again, or None once its attempts are used up."""
+    if attempts >= settings.outbox_max_attempts:
+        return None
+    delay = min(settings.outbox_retry_max_seconds, settings.outbox_retry_base_seconds * 2 ** (attempts - 1))
+    return now + int(delay * random.uniform(0.5, 1.0) * 1000)
+
+
+def _is_permanent(error: Exception) -> bool:
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(e.code >= 500 for e in error.recipients)
+    return isinstance(error, aiosmtplib.SMTPResponseException) and error.code >= 500
+
+
+class OutboxDispatcher:
+    def __init__(self):
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        if settings.outbox_dispatcher_enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Entries stay queued; the next tick retries
+                print(f"Warning: outbox dispatch failed: {e}")
+            await asyncio.sleep(settings.outbox_poll_seconds)
+
+    async def run_once(self):
+        """Deliver everything due now, if this worker holds (or can take) the lease."""
+        async with open_repositories() as repos:
+            now = now_ms()
+            if not await repos.outbox.has_due(now):
+                return
+            if not await repos.outbox.acquire_lease(self.holder, now, now + LEASE_MS):
+                return
+            await self._deliver_notifications(repos)
+            await self._send_emails(repos)
+
+    async def _deliver_notifications(self, repos: Repositories):
+        while True:
+            started = time.perf_counter()
+            delivered = await repos.outbox.deliver_notifications(now_ms(), settings.outbox_batch_size)
+            if not delivered:
+                return
+            OUTBOX_BATCH_DURATION.labels("notification").observe(time.perf_counter() - started)
+            OUTBOX_ENTRIES.labels("notification", "delivered").inc(len(delivered))
+            for item in delivered:
+                await events.publish(
+                    [item["user_id"]],
+                    {"type": "notification", "notification_type": item["type"], "booking_id": item["booking_id"]},
+                )
+            if len(delivered) < settings.outbox_batch_size:
+                return
+
+    async def _send_emails(self, repos: Repositories):
+        now = now_ms()
+        entries = await repos.outbox.claim_emails(now, settings.outbox_batch_size, now + EMAIL_CLAIM_MS)
+        if not entries:
+            return
+        started = time.perf_counter()
+        sent: list[str] = []
+        failed: list[tuple[dict, Exception]] = []
+        if not email_utils.mail_configured():
+            for entry in entries:
+                email_utils.print_email(entry["to"], entry["template"], json.loads(entry["payload"]))
+                sent.append(entry["id"])
+        else:
+            try:
+                async with aiosmtplib.SMTP(
+                    hostname=settings.mail_server,
+                    port=settings.mail_port,
+                    username=settings.mail_username,
+                    password=settings.mail_password,
+                    start_tls=True,
+                    timeout=SMTP_TIMEOUT_SECONDS,
+                ) as smtp:
+                    for entry in entries:
+                        message = email_utils.build_message(entry["to"], entry["template"], json.loads(entry["payload"]))
+                        try:
+                            await smtp.send_message(message)
+                            sent.append(entry["id"])
+                        except (aiosmtplib.SMTPRecipientsRefused, aiosmtplib.SMTPResponseException) as e:
+                            # Rejected message; the connection is still usable
+                            failed.append((entry, e))
+            except Exception as e:
+                # Connect/login failure or dropped connection: retry everything not yet handled
+                handled = set(sent) | {entry["id"] for entry, _ in failed}
+                failed.extend((entry, e) for entry in entries if entry["id"] not in handled)
+
+        await repos.outbox.complete(sent)
+        now = now_ms()
+        failures = []
+        for entry, error in failed:
+            available_at = None if _is_permanent(error) else retry_at(entry["attempts"], now)
+            failures.append({"id": entry["id"], "error": f"{type(error).__name__}: {error}"[:500], "available_at": available_at})
+            OUTBOX_ENTRIES.labels("email", "retried" if available_at is not None else "dead").inc()
+        await repos.outbox.fail(failures)
+        OUTBOX_ENTRIES.labels("email", "sent").inc(len(sent))
+        OUTBOX_BATCH_DURATION.labels("email").observe(time.perf_counter() - started)
+
+
+dispatcher = OutboxDispatcher()
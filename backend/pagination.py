@@ -0,0 +1,59 @@
+"""Opaque keyset cursors for list endpoints ordered by (created_at DESC, id DESC)."""
+import base64
+import json
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from fastapi import HTTPException
+
+PH_TZ = ZoneInfo('Asia/Manila')
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Matches rows strictly after the cursor position; `alias` is the paged node.
+KEYSET_PREDICATE = (
+    "({alias}.created_at < $cursor_created_at"
+    " OR ({alias}.created_at = $cursor_created_at AND {alias}.id < $cursor_id))"
+)
+
+
+def encode_cursor(created_at: str | datetime, id: str) -> str:
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps([created_at, id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(created_at, str) or not isinstance(id, str):
+            raise ValueError(cursor)
+        return created_at, id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def to_ph_iso(dt: datetime) -> str:
+    """Normalise a filter bound to the Philippine-time ISO strings stored on nodes."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=PH_TZ)
+    return dt.astimezone(PH_TZ).isoformat()
+
+
+def keyset_filters(alias: str, cursor: str | None, date_from: datetime | None, date_to: datetime | None) -> tuple[list[str], dict]:
+    """WHERE fragments and parameters for cursor and created_at range filters."""
+    where: list[str] = []
+    params: dict = {}
+    if date_from is not None:
+        where.append(f"{alias}.created_at >= $date_from")
+        params["date_from"] = to_ph_iso(date_from)
+    if date_to is not None:
+        where.append(f"{alias}.created_at <= $date_to")
+        params["date_to"] = to_ph_iso(date_to)
+    if cursor:
+        params["cursor_created_at"], params["cursor_id"] = decode_cursor(cursor)
+        where.append(KEYSET_PREDICATE.format(alias=alias))
+    return where, params
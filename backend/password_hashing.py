@@ -0,0 +1,74 @@
+"""Password hashing off the event loop and off the shared AnyIO threadpool.
+
+PBKDF2 is CPU-bound (hashlib releases the GIL while it runs), so hashes and
+verifications are sent to a small dedicated thread pool. At most
+PASSWORD_HASH_MAX_PENDING jobs may be queued or running; beyond that callers get
+a 503 instead of piling up behind a login spike.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from config import settings
+
+# Use PBKDF2-SHA256 to avoid bcrypt backend issues on some Windows setups.
+# Hashes with fewer rounds than configured are flagged for a rehash on next login.
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.password_hash_rounds,
+    pbkdf2_sha256__min_rounds=settings.password_hash_rounds,
+)
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="pwhash",
+)
+_lock = threading.Lock()
+_pending = 0
+_completed = 0
+_rejected = 0
+
+
+async def _submit(fn, *args):
+    global _pending, _completed, _rejected
+    with _lock:
+        if _pending >= settings.password_hash_max_pending:
+            _rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy, please try again")
+        _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        with _lock:
+            _pending -= 1
+            _completed += 1
+
+
+async def hash_password(password: str) -> str:
+    return await _submit(pwd_context.hash, password)
+
+
+async def verify_and_update(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify a password; the second item is a fresh hash when parameters changed."""
+    return await _submit(pwd_context.verify_and_update, password, hashed_password)
+
+
+def executor_stats() -> dict:
+    with _lock:
+        pending = _pending
+        return {
+            "workers": settings.password_hash_workers,
+            "max_pending": settings.password_hash_max_pending,
+            "pending": pending,
+            "queued": max(0, pending - settings.password_hash_workers),
+            "completed": _completed,
+            "rejected": _rejected,
+        }
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,334 @@
+"""Address lookups against OpenStreetMap Nominatim, restricted to the Philippines.
+
+GET /places/autocomplete proxies search(); registration and profile updates
+call geocode() to turn a provider's shop_address into coordinates for
+GET /users/providers/nearby. Providers registered before that have none;
+`python places.py` geocodes them, one request per second as Nominatim's usage
+policy asks.
+
+Every lookup goes through the process-wide NominatimClient:
+
+- one pooled httpx.AsyncClient, opened and closed with the app (start/close),
+  so keystrokes reuse a kept-alive TLS connection;
+- an LRU + TTL cache keyed by the normalized query and result limit;
+- single flight: concurrent lookups of the same key share one upstream call;
+- a token bucket (PLACES_RATE_PER_SECOND, PLACES_BURST). A call that would
+  wait longer than PLACES_MAX_WAIT_SECONDS for a token is shed with 503
+  instead of piling up behind the limit.
+
+With PLACES_GAZETTEER_PATH set, search() first looks the query up in the
+offline gazetteer (gazetteer.py) and only falls back to Nominatim when that
+has no match.
+
+Hits, misses, coalesced lookups, sheds and upstream latency are exported on
+/metrics; GET /admin/metrics/places reports the cache hit ratio.
+"""
+import argparse
+import asyncio
+import time
+from collections import OrderedDict
+
+import httpx
+from fastapi import HTTPException
+
+from config import settings
+from db import close_driver, get_session, read, write
+from gazetteer import Gazetteer
+from metrics import PLACES_LOOKUPS, PLACES_SHED, PLACES_UPSTREAM_DURATION
+
+NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/search"
+# Required by Nominatim
+USER_AGENT = "LaundryBookingApp/1.0"
+TIMEOUT_SECONDS = 10.0
+# Geocoding sits on the registration / profile path; give up sooner there
+GEOCODE_TIMEOUT_SECONDS = 5.0
+
+
+def normalize(q: str) -> str:
+    """Cache key form of a query: lower case, single spaces, no trailing separators."""
+    return " ".join(q.lower().split()).strip(" ,;")
+
+
+class QueryCache:
+    """LRU + TTL of lookup results. Used from the event loop only."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: tuple) -> list[dict] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: tuple, results: list[dict]):
+        if not self.enabled:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class TokenBucket:
+    """`rate` tokens per second up to `burst`. acquire() reserves the next token,
+    sleeping until it is due, or refuses when that is more than `max_wait` away."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self.waiting = 0
+
+    async def acquire(self, max_wait: float) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # Tokens below zero are reservations made by callers still sleeping
+        wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+        if wait > max_wait:
+            return False
+        self._tokens -= 1
+        if wait > 0:
+            self.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self.waiting -= 1
+        return True
+
+
+class NominatimClient:
+    def __init__(self):
+        self.cache = QueryCache(settings.places_cache_ttl_seconds, settings.places_cache_max_entries)
+        self.bucket = TokenBucket(settings.places_rate_per_second, settings.places_burst)
+        self._client: httpx.AsyncClient | None = None
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.shed = 0
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=4),
+        )
+
+    async def start(self):
+        if self._client is None:
+            self._client = self._new_client()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def search(self, q: str, limit: int, timeout: float) -> list[dict]:
+        key = (normalize(q), limit)
+        results = self.cache.get(key)
+        if results is not None:
+            self.hits += 1
+            PLACES_LOOKUPS.labels("hit").inc()
+            return results
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            PLACES_LOOKUPS.labels("miss").inc()
+            task = asyncio.create_task(self._fetch(key, timeout))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+            PLACES_LOOKUPS.labels("coalesced").inc()
+        # A caller that goes away must not cancel the lookup others are waiting on
+        return await asyncio.shield(task)
+
+    def _finished(self, key: tuple, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # Marks the error retrieved even if every caller has gone away
+            task.exception()
+
+    async def _fetch(self, key: tuple, timeout: float) -> list[dict]:
+        q, limit = key
+        if not await self.bucket.acquire(settings.places_max_wait_seconds):
+            self.shed += 1
+            PLACES_SHED.inc()
+            raise HTTPException(
+                status_code=503,
+                detail="Address lookup is busy, please try again",
+                headers={"Retry-After": "1"},
+            )
+        params = {
+            "q": f"{q},Philippines",
+            "format": "json",
+            "addressdetails": "1",
+            "limit": str(limit),
+            "countrycodes": "ph",
+        }
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            if self._client is not None:
+                response = await self._client.get(NOMINATIM_SEARCH_URL, params=params, timeout=timeout)
+            else:
+                # Outside the app (python places.py): a client per call is fine
+                async with self._new_client() as client:
+                    response = await client.get(NOMINATIM_SEARCH_URL, params=params, timeout=timeout)
+            outcome = str(response.status_code)
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            raise HTTPException(status_code=504, detail="Request to Nominatim API timed out")
+        except httpx.RequestError as e:
+            raise HTTPException(status_code=502, detail=f"Error connecting to Nominatim API: {str(e)}")
+        finally:
+            PLACES_UPSTREAM_DURATION.labels(outcome).observe(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail="Failed to fetch from Nominatim API")
+        results = response.json()
+        self.cache.put(key, results)
+        return results
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "cache_size": len(self.cache),
+            "cache_max_entries": self.cache.max_entries,
+            "cache_ttl_seconds": self.cache.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.cache.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "in_flight": len(self._inflight),
+            "rate_limit_waiting": self.bucket.waiting,
+            "shed": self.shed,
+        }
+
+
+nominatim = NominatimClient()
+gazetteer: Gazetteer | None = None
+
+
+def _open_gazetteer():
+    global gazetteer
+    if gazetteer is not None or not settings.places_gazetteer_path:
+        return
+    try:
+        gazetteer = Gazetteer(settings.places_gazetteer_path)
+        print(f"Loaded address gazetteer with {len(gazetteer)} places")
+    except Exception as e:
+        # Autocomplete still works, just every lookup goes to Nominatim
+        print(f"Warning: could not open gazetteer {settings.places_gazetteer_path}: {e}")
+
+
+async def start():
+    _open_gazetteer()
+    await nominatim.start()
+
+
+async def close():
+    global gazetteer
+    await nominatim.close()
+    if gazetteer is not None:
+        gazetteer.close()
+        gazetteer = None
+
+
+def stats() -> dict:
+    result = nominatim.stats()
+    if gazetteer is not None:
+        result["gazetteer"] = {"places": len(gazetteer), "hits": gazetteer.hits, "misses": gazetteer.misses}
+    return result
+
+
+async def search(q: str, limit: int = 5, timeout: float = TIMEOUT_SECONDS) -> list[dict]:
+    """Nominatim-shaped results (with lat/lon as strings); HTTPException on upstream failure."""
+    if gazetteer is not None:
+        results = gazetteer.lookup(q, limit)
+        if results:
+            PLACES_LOOKUPS.labels("gazetteer").inc()
+            return results
+    return await nominatim.search(q, limit, timeout)
+
+
+async def geocode(address: str | None) -> tuple[float, float] | None:
+    """(latitude, longitude) of the best match for `address`, or None. Never raises."""
+    if not address or not address.strip():
+        return None
+    try:
+        results = await search(address.strip(), limit=1, timeout=GEOCODE_TIMEOUT_SECONDS)
+        if not results:
+            return None
+        return float(results[0]["lat"]), float(results[0]["lon"])
+    except Exception as e:
+        # A provider without coordinates is just left out of nearby searches
+        print(f"Warning: geocoding {address!r} failed: {e}")
+        return None
+
+
+def backfill_provider_locations(limit: int | None = None, delay: float = 1.0) -> tuple[int, int]:
+    """Geocode providers with a shop_address but no location; returns (located, tried)."""
+    with get_session() as session:
+        rows = read(
+            session,
+            "places.providers_without_location",
+            """
+            MATCH (u:User {role: 'provider'})
+            WHERE u.location IS NULL AND u.shop_address IS NOT NULL
+            RETURN u.id AS id, u.shop_address AS address
+            ORDER BY u.id
+            """ + ("LIMIT $limit" if limit else ""),
+            limit=limit,
+        )
+        located = 0
+        for i, row in enumerate(rows):
+            if i:
+                time.sleep(delay)
+            location = asyncio.run(geocode(row["address"]))
+            if location is None:
+                continue
+            write(
+                session,
+                "places.set_provider_location",
+                "MATCH (u:User {id: $id}) SET u.location = point({latitude: $lat, longitude: $lon})",
+                id=row["id"],
+                lat=location[0],
+                lon=location[1],
+            )
+            located += 1
+    return located, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geocode providers that have no coordinates yet")
+    parser.add_argument("--limit", type=int, default=None, help="geocode at most this many providers")
+    parser.add_argument("--delay", type=float, default=1.0, help="seconds between Nominatim requests")
+    args = parser.parse_args()
+    try:
+        located, tried = backfill_provider_locations(args.limit, args.delay)
+        print(f"Located {located} of {tried} providers")
+    finally:
+        close_driver()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Provider search for GET /users/providers/search.
+
+Only approved providers are searchable. On Neo4j they carry the
+`:SearchableProvider` label (set and removed with provider_status, see
+Neo4jUserRepository.set_provider_status) and the `provider_search` full-text
+index covers shop_name, shop_address and email of those nodes alone, so a
+query never touches customers. lucene_query() turns what the user typed into
+a query where every word must match, as a whole word, a prefix, or (for words
+of 4+ characters) within an edit or two; shop-name hits rank highest.
+
+The memory backend keeps a TrigramIndex with the same matching rules, updated
+by MemoryStore whenever a provider is added, approved, edited or removed.
+Either way a search costs roughly the number of matching words, not the number
+of providers.
+"""
+import heapq
+import re
+from collections import defaultdict
+
+SEARCHABLE_LABEL = "SearchableProvider"
+FULLTEXT_INDEX = "provider_search"
+
+# Relative weight of a hit in each field
+FIELD_WEIGHTS = {"shop_name": 3.0, "shop_address": 1.5, "email": 1.0}
+
+# Query words considered; more only add noise to a search box
+MAX_WORDS = 6
+
+_WORD = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text: str | None) -> list[str]:
+    return _WORD.findall((text or "").lower())
+
+
+def _max_edits(word: str) -> int:
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def lucene_query(term: str) -> str | None:
+    """Full-text query for `term`, or None when it has no searchable words.
+
+    Words are [0-9a-z]+ only, so nothing needs escaping, and lower case keeps
+    them from being read as AND/OR/NOT.
+    """
+    words = tokenize(term)[:MAX_WORDS]
+    if not words:
+        return None
+    clauses = []
+    for word in words:
+        options = [f"shop_name:{word}^{FIELD_WEIGHTS['shop_name'] * 2:g}", f"{word}^2", f"{word}*"]
+        if edits := _max_edits(word):
+            options.append(f"{word}~{edits}")
+        clauses.append("+(" + " ".join(options) + ")")
+    return " ".join(clauses)
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _prefix_trigrams(word: str) -> set[str]:
+    # Start-padded only: every one of them also occurs in any word `word` is a prefix of
+    return _trigrams("  " + word)
+
+
+def _word_trigrams(word: str) -> set[str]:
+    return _trigrams("  " + word + " ")
+
+
+class TrigramIndex:
+    """Approved providers' searchable words, for the memory backend.
+
+    Postings go from trigram to vocabulary word and from word to the providers
+    (with their best field weight) that contain it, so a lookup scores the
+    words sharing trigrams with the query rather than every provider.
+    """
+
+    def __init__(self):
+        self._words_by_trigram: defaultdict[str, set[str]] = defaultdict(set)
+        self._docs_by_word: defaultdict[str, dict[str, float]] = defaultdict(dict)
+        self._words_by_doc: dict[str, dict[str, float]] = {}
+
+    def __len__(self):
+        return len(self._words_by_doc)
+
+    def __contains__(self, doc_id: str):
+        return doc_id in self._words_by_doc
+
+    def add(self, doc_id: str, fields: dict):
+        """Index (or re-index) a provider's FIELD_WEIGHTS fields."""
+        self.remove(doc_id)
+        words: dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for word in tokenize(fields.get(field)):
+                words[word] = max(weight, words.get(word, 0.0))
+        self._words_by_doc[doc_id] = words
+        for word, weight in words.items():
+            docs = self._docs_by_word[word]
+            if not docs:
+                for trigram in _word_trigrams(word):
+                    self._words_by_trigram[trigram].add(word)
+            docs[doc_id] = weight
+
+    def remove(self, doc_id: str):
+        words = self._words_by_doc.pop(doc_id, None)
+        if not words:
+            return
+        for word in words:
+            docs = self._docs_by_word[word]
+            docs.pop(doc_id, None)
+            if docs:
+                continue
+            del self._docs_by_word[word]
+            for trigram in _word_trigrams(word):
+                vocabulary = self._words_by_trigram[trigram]
+                vocabulary.discard(word)
+                if not vocabulary:
+                    del self._words_by_trigram[trigram]
+
+    def _word_scores(self, query_word: str) -> dict[str, float]:
+        """Vocabulary words matching `query_word`: 1 exact, 0.8 prefix, below that by similarity."""
+        full = _word_trigrams(query_word)
+        candidates = set()
+        for trigram in _prefix_trigrams(query_word) | full:
+            candidates.update(self._words_by_trigram.get(trigram, ()))
+        fuzzy = _max_edits(query_word) > 0
+        scores = {}
+        for word in candidates:
+            if word == query_word:
+                scores[word] = 1.0
+            elif word.startswith(query_word):
+                scores[word] = 0.8
+            elif fuzzy:
+                candidate = _word_trigrams(word)
+                dice = 2 * len(full & candidate) / (len(full) + len(candidate))
+                if dice >= 0.5:
+                    scores[word] = 0.6 * dice
+        return scores
+
+    def search(self, term: str, limit: int) -> list[tuple[str, float]]:
+        """(provider id, score) best first; every query word has to match."""
+        totals: dict[str, float] | None = None
+        for query_word in tokenize(term)[:MAX_WORDS]:
+            best: dict[str, float] = {}
+            for word, score in self._word_scores(query_word).items():
+                for doc_id, weight in self._docs_by_word[word].items():
+                    if totals is None or doc_id in totals:
+                        best[doc_id] = max(best.get(doc_id, 0.0), score * weight)
+            totals = best if totals is None else {doc_id: totals[doc_id] + s for doc_id, s in best.items()}
+            if not totals:
+                return []
+        if not totals:
+            return []
+        return heapq.nsmallest(limit, totals.items(), key=lambda item: (-item[1], item[0]))
@@ -0,0 +1,111 @@
+"""Per-request Neo4j round-trip accounting.
+
+QueryStatsMiddleware gives every HTTP request a RequestStats that the db.py
+transaction helpers fill in: statements sent, transactions run, retries and
+wall-clock time spent in Neo4j. Each response carries the totals in
+`X-DB-Queries` and a `Server-Timing: db;dur=...` entry (shown in the browser's
+network panel), and the totals are aggregated per route template for
+GET /admin/metrics/db-requests.
+"""
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from starlette.datastructures import MutableHeaders
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    transactions: int = 0
+    retries: int = 0
+    db_seconds: float = 0.0
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("neo4j_request_stats", default=None)
+
+
+def current_stats() -> RequestStats | None:
+    """Stats of the request being served, or None outside a request."""
+    return _current.get()
+
+
+class _CountingTx:
+    """Transaction proxy that counts statements sent through run()."""
+
+    def __init__(self, tx, stats: RequestStats):
+        self._tx = tx
+        self._stats = stats
+
+    def run(self, query, parameters=None, **kwparameters):
+        self._stats.queries += 1
+        return self._tx.run(query, parameters, **kwparameters)
+
+    def __getattr__(self, name):
+        return getattr(self._tx, name)
+
+
+def counting(work, stats: RequestStats):
+    """Wrap a transaction function so its statements are counted; works for sync and async."""
+    def counted(tx, *args, **kwargs):
+        return work(_CountingTx(tx, stats), *args, **kwargs)
+    return counted
+
+
+_routes_lock = threading.Lock()
+_routes: dict[str, dict] = {}
+
+
+def _record_route(key: str, stats: RequestStats):
+    db_ms = stats.db_seconds * 1000
+    with _routes_lock:
+        m = _routes.setdefault(
+            key,
+            {"requests": 0, "queries": 0, "max_queries": 0, "transactions": 0, "retries": 0, "db_ms": 0.0, "max_db_ms": 0.0},
+        )
+        m["requests"] += 1
+        m["queries"] += stats.queries
+        m["max_queries"] = max(m["max_queries"], stats.queries)
+        m["transactions"] += stats.transactions
+        m["retries"] += stats.retries
+        m["db_ms"] += db_ms
+        m["max_db_ms"] = max(m["max_db_ms"], db_ms)
+
+
+def route_stats() -> dict[str, dict]:
+    """Snapshot of per-route request counts, queries per request and DB time (ms)."""
+    with _routes_lock:
+        out = {}
+        for key, m in _routes.items():
+            n = m["requests"]
+            out[key] = dict(m, avg_queries=m["queries"] / n, avg_db_ms=m["db_ms"] / n)
+        return out
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware, so streaming responses are not buffered."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Queries", str(stats.queries))
+                headers.append("Server-Timing", f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"')
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            if route is not None and stats.transactions:
+                _record_route(f"{scope['method']} {route.path}", stats)
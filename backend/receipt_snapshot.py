@@ -0,0 +1,109 @@
+"""Receipt snapshots: what was bought, from whom, by whom, at what price.
+
+A Receipt is written once, when a booking is accepted or an order's receipt is
+first generated, and carries everything it renders as its own properties: the
+order id, both parties' names, contacts and addresses, and the line items. So
+reading a receipt is one node lookup with no traversal, and renaming a service
+or moving house later does not rewrite past receipts. The one later write is
+a provider's weigh-in (update_details), which corrects the weight and total of
+the booking's receipt.
+
+Neo4j properties cannot hold maps, so line items are stored as parallel lists
+(item_service_ids, item_service_names, item_weights_kg). The memory backend
+stores the same properties so both share to_public().
+"""
+from datetime import datetime
+
+# Properties returned by reads; everything a receipt renders
+PROPERTIES = (
+    "id", "order_id", "subtotal", "delivery_fee", "total", "created_at",
+    "customer_id", "customer_name", "customer_contact", "customer_address",
+    "provider_id", "provider_name", "provider_contact", "provider_address",
+    "item_service_ids", "item_service_names", "item_weights_kg",
+)
+
+# Map projection of a snapshotted receipt, e.g. `RETURN r {RETURN_PROJECTION} AS r`
+RETURN_PROJECTION = "{" + ", ".join("." + p for p in PROPERTIES) + "}"
+
+
+def set_snapshot(items: str) -> str:
+    """SET clause writing the snapshot onto `r`; expects `o`, `c` (customer) and `p`
+    (provider) bound. `items` is a Cypher list of {service_id, service_name, weight_kg}."""
+    return f"""
+  SET r.order_id = o.id,
+      r.customer_id = c.id, r.customer_name = c.full_name,
+      r.customer_contact = c.contact_number, r.customer_address = c.address,
+      r.provider_id = p.id, r.provider_name = p.shop_name,
+      r.provider_contact = p.contact_number, r.provider_address = p.shop_address,
+      r.item_service_ids = [it IN {items} | it.service_id],
+      r.item_service_names = [it IN {items} | coalesce(it.service_name, '')],
+      r.item_weights_kg = [it IN {items} | toFloat(it.weight_kg)]
+"""
+
+
+# Snapshot for a receipt written before snapshots existed; expects `r` bound.
+# Used by the schema backfill. Orders made from a booking have no HAS_ITEM;
+# their one line comes from the booking.
+BACKFILL_SNAPSHOT = """
+MATCH (r)-[:FOR_ORDER]->(o:Order)
+MATCH (r)-[:FOR_CUSTOMER]->(c:User)
+MATCH (r)-[:FOR_PROVIDER]->(p:User)
+CALL {
+  WITH o
+  OPTIONAL MATCH (o)-[hi:HAS_ITEM]->(s:Service)
+  RETURN collect(CASE WHEN s IS NULL THEN null
+                      ELSE {service_id: s.id, weight_kg: hi.weight_kg, service_name: s.name} END) AS service_items
+}
+CALL {
+  WITH o
+  OPTIONAL MATCH (o)-[:FROM_BOOKING]->(b:Booking)-[:OF_CATEGORY]->(cat:Category)
+  RETURN collect(CASE WHEN cat IS NULL THEN null
+                      ELSE {service_id: cat.id, weight_kg: b.weight_kg, service_name: cat.name} END)[..1] AS booking_items
+}
+WITH r, o, c, p, CASE WHEN size(service_items) > 0 THEN service_items ELSE booking_items END AS items
+""" + set_snapshot("items")
+
+
+def snapshot(order_id: str, customer: dict, provider: dict, items: list[dict]) -> dict:
+    """The properties set_snapshot() writes, for the memory backend."""
+    return {
+        "order_id": order_id,
+        "customer_id": customer["id"],
+        "customer_name": customer.get("full_name"),
+        "customer_contact": customer.get("contact_number"),
+        "customer_address": customer.get("address"),
+        "provider_id": provider["id"],
+        "provider_name": provider.get("shop_name"),
+        "provider_contact": provider.get("contact_number"),
+        "provider_address": provider.get("shop_address"),
+        "item_service_ids": [it["service_id"] for it in items],
+        "item_service_names": [it.get("service_name") or "" for it in items],
+        "item_weights_kg": [float(it["weight_kg"]) for it in items],
+    }
+
+
+def to_public(r: dict) -> dict:
+    """ReceiptPublic fields of a snapshotted receipt."""
+    items = [
+        {"service_id": service_id, "service_name": service_name, "weight_kg": weight_kg}
+        for service_id, service_name, weight_kg in zip(
+            r.get("item_service_ids") or [], r.get("item_service_names") or [], r.get("item_weights_kg") or []
+        )
+    ]
+    return {
+        "id": r["id"],
+        "order_id": r["order_id"],
+        "customer_id": r["customer_id"],
+        "customer_name": r.get("customer_name"),
+        "customer_contact": r.get("customer_contact"),
+        "customer_address": r.get("customer_address"),
+        "provider_id": r["provider_id"],
+        "provider_name": r.get("provider_name"),
+        "provider_contact": r.get("provider_contact"),
+        "provider_address": r.get("provider_address"),
+        "items": items,
+        "subtotal": float(r["subtotal"]),
+        "delivery_fee": float(r["delivery_fee"]),
+        "total": float(r["total"]),
+        "created_at": datetime.fromisoformat(r["created_at"]),
+    }
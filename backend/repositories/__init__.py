@@ -0,0 +1,67 @@
+"""Repository layer between the routers and the data store.
+
+Routes take `repos: Repositories = Depends(get_repos)` and call
+`repos.bookings.list_page(...)` etc. DATA_BACKEND selects the implementation:
+
+- neo4j (default): repositories.graph, bound to the request's AsyncSession.
+- memory: repositories.memory, one process-wide store of indexed dicts, for
+  profiling and load-testing the Python side of the API without a database.
+"""
+from contextlib import asynccontextmanager
+
+from fastapi import Depends
+
+from config import settings
+from db import get_async_session, get_request_session
+from repositories.base import (
+    BookingRepository,
+    CategoryRepository,
+    NotificationRepository,
+    ProviderRepository,
+    ReceiptRepository,
+    ReportRepository,
+    Repositories,
+    ReviewRepository,
+    UserRepository,
+)
+from repositories.graph import Neo4jRepositories
+from repositories.memory import MemoryRepositories, MemoryStore, memory_repositories, memory_store
+
+
+async def get_repos(session=Depends(get_request_session)) -> Repositories:
+    """FastAPI dependency: the configured repositories for this request."""
+    if session is None:
+        return memory_repositories
+    return Neo4jRepositories(session)
+
+
+@asynccontextmanager
+async def open_repositories(read_only: bool = False):
+    """Repositories outside a request's dependencies, e.g. for a check before a
+    long-lived response that should not hold a session open, or for the body
+    of a streamed response (read_only sends its reads to a reader)."""
+    if settings.data_backend == "memory":
+        yield memory_repositories
+        return
+    async with get_async_session(read_only) as session:
+        yield Neo4jRepositories(session)
+
+
+__all__ = [
+    "BookingRepository",
+    "CategoryRepository",
+    "MemoryRepositories",
+    "MemoryStore",
+    "Neo4jRepositories",
+    "NotificationRepository",
+    "ProviderRepository",
+    "ReceiptRepository",
+    "ReportRepository",
+    "Repositories",
+    "ReviewRepository",
+    "UserRepository",
+    "get_repos",
+    "memory_repositories",
+    "memory_store",
+    "open_repositories",
+]
@@ -0,0 +1,187 @@
+"""Data-access interfaces the routers depend on.
+
+Each aggregate has one repository; `Repositories` bundles them for a request.
+Methods return the same plain dicts / models the routes already serialise, so
+a route reads the same whichever backend is configured (DATA_BACKEND).
+Domain errors that the old inline queries raised as HTTPException (a review
+for someone else's booking, an illegal edit) are still raised that way from
+inside the repository, keeping checks and writes in one unit of work.
+"""
+from typing import AsyncIterator, Protocol
+
+from booking_states import Transition
+from models import BookingUpdateDetails, UserPublic
+
+
+class UserRepository(Protocol):
+    async def get(self, user_id: str) -> UserPublic | None: ...
+
+    async def get_login_record(self, email: str) -> tuple[UserPublic, str | None] | None:
+        """(user, hashed_password) for a login attempt, or None."""
+
+    async def email_exists(self, email: str) -> bool: ...
+
+    async def create(self, props: dict, email: dict | None = None) -> bool:
+        """Create a user from `props`, queueing the outbox `email` entry in the same
+        write; False (and nothing queued) when the email is already taken."""
+
+    async def update_profile(self, user_id: str, updates: dict) -> UserPublic | None: ...
+
+    async def set_location(self, user_id: str, location: tuple[float, float] | None) -> None:
+        """Store (latitude, longitude) as the user's point, or clear it."""
+
+    async def get_password_hash(self, user_id: str) -> str | None: ...
+
+    async def set_password_hash(self, user_id: str, hashed_password: str) -> None: ...
+
+    async def toggle_availability(self, user_id: str) -> bool | None:
+        """Flip a provider's is_available flag and return the new value."""
+
+    async def mark_email_verified(self, email: str) -> bool: ...
+
+    async def email_verified(self, email: str) -> bool | None:
+        """Verification flag for an email, or None when no such user exists."""
+
+    async def get_or_create_oauth(self, email: str, full_name: str, provider: str, provider_id: str) -> dict: ...
+
+    async def set_provider_status(self, provider_id: str, status: str) -> bool: ...
+
+    async def set_banned(self, user_id: str, banned: bool) -> bool: ...
+
+    async def delete(self, user_id: str) -> None: ...
+
+    async def list_all(self) -> list[dict]: ...
+
+    async def list_pending_providers(self) -> list[dict]: ...
+
+
+class ProviderRepository(Protocol):
+    async def list_approved(self) -> list[dict]: ...
+
+    async def search(self, term: str, limit: int) -> list[dict]:
+        """Approved providers matching `term` (see provider_search), best match first."""
+
+    async def nearby(self, lat: float, lon: float, radius_m: float, limit: int) -> list[dict]:
+        """Approved providers within `radius_m` of (lat, lon), nearest first, with distance_km."""
+
+
+class CategoryRepository(Protocol):
+    async def create(self, provider_id: str, category: dict) -> dict | None: ...
+
+    async def list_for_provider(self, provider_id: str) -> list[dict]: ...
+
+    async def update(self, category_id: str, provider_id: str, updates: dict) -> dict | None: ...
+
+    async def delete(self, category_id: str, provider_id: str) -> bool: ...
+
+
+class BookingRepository(Protocol):
+    async def get(self, booking_id: str) -> dict | None: ...
+
+    async def create(self, params: dict) -> dict | None:
+        """Validate, price and create a booking with its notifications.
+
+        Returns None when the customer does not exist, else
+        {"error": str | None, "min_kilo": float | None, "booking": dict | None}.
+        """
+
+    async def list_page(self, role: str, user_id: str, *, limit: int, cursor: str | None, status: str | None,
+                        date_from, date_to) -> tuple[list[dict], str | None]:
+        """Newest-first page of bookings visible to the user and the next cursor."""
+
+    def export(self, role: str, user_id: str, *, status: str | None, date_from, date_to) -> AsyncIterator[dict]:
+        """Every booking list_page would return, oldest first, streamed rather than collected."""
+
+    async def transition(self, t: Transition, params: dict) -> tuple[bool, dict] | None:
+        """Apply `t` with booking_states.apply_transition's params: (allowed, booking) or None if not found."""
+
+    async def update_details(self, booking_id: str, provider_id: str, payload: BookingUpdateDetails) -> dict: ...
+
+
+class NotificationRepository(Protocol):
+    async def list_page(self, user_id: str, *, limit: int, cursor: str | None) -> tuple[list[dict], str | None]:
+        """Newest-first page of the user's notifications and the next cursor."""
+
+    async def unread_count(self, user_id: str) -> int:
+        """The user's unread counter (see unread_counter); no notification scan."""
+
+    async def mark_read(self, notification_id: str, user_id: str) -> dict | None: ...
+
+    async def mark_all_read(self, user_id: str) -> int:
+        """Mark every unread notification read in one write; returns how many changed."""
+
+
+class ReceiptRepository(Protocol):
+    async def list_page(self, role: str, user_id: str, *, limit: int, cursor: str | None,
+                        date_from, date_to) -> tuple[list[dict], str | None]:
+        """Newest-first page of the user's receipts, with items and both parties, and the next cursor."""
+
+    def export(self, role: str, user_id: str, *, status: str | None, date_from, date_to) -> AsyncIterator[dict]:
+        """The user's receipts oldest first, streamed; `status` filters on the order's status."""
+
+
+class ReviewRepository(Protocol):
+    async def create(self, params: dict) -> dict: ...
+
+    async def update(self, review_id: str, customer_id: str, updates: dict) -> dict: ...
+
+    async def get(self, review_id: str) -> dict | None: ...
+
+    async def list_for_provider(self, provider_id: str) -> list[dict]: ...
+
+    async def provider_stats(self, provider_id: str) -> dict | None:
+        """total_reviews, average_rating and five_star..one_star counts."""
+
+    async def id_for_booking(self, booking_id: str) -> str | None: ...
+
+
+class OutboxRepository(Protocol):
+    """OutboxEntry storage for outbox.OutboxDispatcher; times are epoch milliseconds."""
+
+    async def enqueue(self, entry: dict) -> None: ...
+
+    async def has_due(self, now: int) -> bool: ...
+
+    async def acquire_lease(self, holder: str, now: int, until: int) -> bool:
+        """Take or extend the dispatcher lease; False while another holder's lease is live."""
+
+    async def deliver_notifications(self, now: int, limit: int) -> list[dict]:
+        """Turn due notification entries into Notifications (bumping unread counters)
+        and delete them, in one write. Returns {"user_id", "type", "booking_id"} per entry."""
+
+    async def claim_emails(self, now: int, limit: int, until: int) -> list[dict]:
+        """Due email entries, hidden from further claims until `until` and with attempts incremented."""
+
+    async def complete(self, ids: list[str]) -> None: ...
+
+    async def fail(self, failures: list[dict]) -> None:
+        """Record {"id", "error", "available_at"} per entry; available_at None dead-letters it."""
+
+    async def stats(self) -> list[dict]:
+        """{"kind", "status", "count"} rows; status is pending or dead."""
+
+    async def list_dead(self, limit: int) -> list[dict]: ...
+
+    async def requeue(self, entry_id: str, now: int) -> bool:
+        """Make a dead-lettered entry due again with a fresh attempt budget."""
+
+
+class ReportRepository(Protocol):
+    async def sales_rollups(self, provider_id: str, day_from: str, day_to: str) -> list[dict]:
+        """The provider's daily rollup rows ({"day", *rollups.COUNTERS}) between the
+        'YYYY-MM-DD' bounds, oldest first; days without activity have none."""
+
+
+class Repositories(Protocol):
+    users: UserRepository
+    providers: ProviderRepository
+    categories: CategoryRepository
+    bookings: BookingRepository
+    notifications: NotificationRepository
+    receipts: ReceiptRepository
+    reviews: ReviewRepository
+    outbox: OutboxRepository
+    reports: ReportRepository
+
+    async def stats(self) -> dict:
+        """Totals for the admin dashboard: users, providers, bookings."""
@@ -0,0 +1,1087 @@
+"""Neo4j repositories: the Cypher the routers used to run inline.
+
+All of them share the request's AsyncSession and go through the db.py
+managed-transaction helpers, so query names, retries, metrics and the
+per-request query counts are unchanged.
+"""
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from booking_states import (
+    BOOKING_PUBLIC_RETURN,
+    PH_TZ,
+    TRANSITION_QUERIES,
+    Transition,
+    booking_record_to_public,
+    plan_details_update,
+)
+from config import settings
+from db import aexecute_read, aexecute_write, aread, aread_one, astream, awrite, awrite_one
+from models import BookingStatus, BookingUpdateDetails, UserPublic, UserRole
+from pagination import encode_cursor, keyset_filters
+import receipt_snapshot
+from provider_search import FULLTEXT_INDEX, SEARCHABLE_LABEL, lucene_query
+from rollups import LABEL as ROLLUP_LABEL, PROJECTION as ROLLUP_PROJECTION, adjust_receipt, move_booking
+from unread_counter import add_unread, decrement_unread
+
+_USER_PUBLIC = """u { .id, .role, .email, .contact_number, .full_name, .address, .shop_name, .shop_address,
+      .provider_status, .banned, .is_available }"""
+
+_PROVIDER_PUBLIC = "u { .id, .email, .contact_number, .shop_name, .shop_address, .is_available }"
+
+_CATEGORY_PUBLIC = "c { .id, .name, .pricing_type, .price, .min_kilo, .max_kilo, provider_id: p.id }"
+
+
+class Neo4jUserRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def get(self, user_id: str) -> UserPublic | None:
+        rec = await aread_one(self.session, "users.get", f"MATCH (u:User {{id: $id}}) RETURN {_USER_PUBLIC} AS user", id=user_id)
+        return UserPublic(**rec["user"]) if rec else None
+
+    async def get_login_record(self, email: str) -> tuple[UserPublic, str | None] | None:
+        # User and password hash in one query
+        rec = await aread_one(
+            self.session,
+            "auth.login_record",
+            """
+            MATCH (u:User {email: $email})
+            RETURN u { .id, .role, .email, .contact_number,
+                       .full_name, .address, .shop_name, .shop_address,
+                       .provider_status, .banned, .is_available, .email_verified } AS user,
+                   u.hashed_password AS hashed_password
+            """,
+            email=email,
+        )
+        if not rec:
+            return None
+        return UserPublic(**rec["user"]), rec["hashed_password"]
+
+    async def email_exists(self, email: str) -> bool:
+        rec = await aread_one(self.session, "users.email_exists", "MATCH (u:User {email: $email}) RETURN u.id AS id", email=email)
+        return rec is not None
+
+    async def create(self, props: dict, email: dict | None = None) -> bool:
+        # Creates the user only if the email is still free; returns no row otherwise
+        rec = await awrite_one(
+            self.session,
+            "users.create",
+            """
+            CALL { MATCH (e:User {email: $email}) RETURN count(e) AS existing }
+            WITH existing WHERE existing = 0
+            CREATE (u:User)
+            SET u = $props
+            FOREACH (_ IN CASE WHEN $outbox IS NULL THEN [] ELSE [1] END |
+              CREATE (o:OutboxEntry) SET o = $outbox)
+            RETURN u.id AS id
+            """,
+            email=props["email"],
+            props=props,
+            outbox=email,
+        )
+        return rec is not None
+
+    async def update_profile(self, user_id: str, updates: dict) -> UserPublic | None:
+        rec = await awrite_one(
+            self.session,
+            "users.update_profile",
+            f"MATCH (u:User {{id: $id}}) SET u += $updates RETURN {_USER_PUBLIC} AS user",
+            id=user_id,
+            updates=updates,
+        )
+        return UserPublic(**rec["user"]) if rec else None
+
+    async def set_location(self, user_id: str, location: tuple[float, float] | None) -> None:
+        await awrite(
+            self.session,
+            "users.set_location",
+            """
+            MATCH (u:User {id: $id})
+            SET u.location = CASE WHEN $lat IS NULL THEN null ELSE point({latitude: $lat, longitude: $lon}) END
+            """,
+            id=user_id,
+            lat=location[0] if location else None,
+            lon=location[1] if location else None,
+        )
+
+    async def get_password_hash(self, user_id: str) -> str | None:
+        rec = await aread_one(self.session, "users.password_hash", "MATCH (u:User {id: $id}) RETURN u.hashed_password AS hp", id=user_id)
+        return rec["hp"] if rec else None
+
+    async def set_password_hash(self, user_id: str, hashed_password: str) -> None:
+        await awrite(self.session, "users.set_password_hash", "MATCH (u:User {id: $id}) SET u.hashed_password = $hp", id=user_id, hp=hashed_password)
+
+    async def toggle_availability(self, user_id: str) -> bool | None:
+        rec = await awrite_one(
+            self.session,
+            "users.toggle_availability",
+            """
+            MATCH (u:User {id: $id})
+            SET u.is_available = NOT coalesce(u.is_available, true)
+            RETURN u.is_available AS is_available
+            """,
+            id=user_id,
+        )
+        return rec["is_available"] if rec else None
+
+    async def mark_email_verified(self, email: str) -> bool:
+        rec = await awrite_one(
+            self.session,
+            "users.verify_email",
+            "MATCH (u:User {email: $email}) SET u.email_verified = true RETURN u.id AS id",
+            email=email,
+        )
+        return rec is not None
+
+    async def email_verified(self, email: str) -> bool | None:
+        rec = await aread_one(
+            self.session,
+            "users.verification_status",
+            "MATCH (u:User {email: $email}) RETURN u.email_verified AS verified",
+            email=email,
+        )
+        if not rec:
+            return None
+        return bool(rec["verified"])
+
+    async def get_or_create_oauth(self, email: str, full_name: str, provider: str, provider_id: str) -> dict:
+        # MERGE makes lookup-or-create one round trip and safe to retry
+        rec = await awrite_one(
+            self.session,
+            "oauth.get_or_create_user",
+            f"""
+            MERGE (u:User {{email: $email}})
+            ON CREATE SET
+                u.id = $id,
+                u.role = 'customer',
+                u.contact_number = 'Not provided',
+                u.full_name = $full_name,
+                u.address = 'Not provided',
+                u.banned = false,
+                u.email_verified = true,
+                u.oauth_provider = $provider,
+                u.oauth_id = $provider_id
+            RETURN {_USER_PUBLIC} AS user
+            """,
+            id=str(uuid.uuid4()),
+            email=email,
+            full_name=full_name,
+            provider=provider,
+            provider_id=provider_id,
+        )
+        return rec["user"]
+
+    async def set_provider_status(self, provider_id: str, status: str) -> bool:
+        rec = await awrite_one(
+            self.session,
+            "admin.set_provider_status",
+            f"""
+            MATCH (u:User {{id: $id, role: 'provider'}})
+            SET u.provider_status = $status
+            FOREACH (_ IN CASE WHEN $status = 'approved' THEN [1] ELSE [] END | SET u:{SEARCHABLE_LABEL})
+            FOREACH (_ IN CASE WHEN $status = 'approved' THEN [] ELSE [1] END | REMOVE u:{SEARCHABLE_LABEL})
+            RETURN u.id AS id
+            """,
+            id=provider_id,
+            status=status,
+        )
+        return rec is not None
+
+    async def set_banned(self, user_id: str, banned: bool) -> bool:
+        rec = await awrite_one(
+            self.session,
+            "admin.ban_user" if banned else "admin.unban_user",
+            "MATCH (u:User {id: $id}) SET u.banned = $banned RETURN u.id AS id",
+            id=user_id,
+            banned=banned,
+        )
+        return rec is not None
+
+    async def delete(self, user_id: str) -> None:
+        await awrite(self.session, "admin.delete_user", "MATCH (u:User {id: $id}) DETACH DELETE u", id=user_id)
+
+    async def list_all(self) -> list[dict]:
+        result = await aread(
+            self.session,
+            "admin.list_users",
+            """
+            MATCH (u:User)
+            RETURN u { .id, .email, .contact_number, .role, .full_name, .address, .shop_name, .shop_address, .provider_status, .banned } AS u
+            ORDER BY u.role, coalesce(u.full_name,u.shop_name,u.email)
+            """,
+        )
+        return [r["u"] for r in result]
+
+    async def list_pending_providers(self) -> list[dict]:
+        result = await aread(
+            self.session,
+            "admin.pending_providers",
+            """
+            MATCH (u:User {role: 'provider'})
+            WHERE coalesce(u.provider_status,'pending') = 'pending'
+            RETURN u { .id, .email, .contact_number, .shop_name, .shop_address, .provider_status } AS u
+            ORDER BY u.shop_name
+            """,
+        )
+        return [r["u"] for r in result]
+
+
+class Neo4jProviderRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def list_approved(self) -> list[dict]:
+        result = await aread(
+            self.session,
+            "users.approved_providers",
+            f"""
+            MATCH (u:User {{role: 'provider'}})
+            WHERE u.provider_status = 'approved'
+            RETURN {_PROVIDER_PUBLIC} AS provider
+            ORDER BY u.shop_name
+            """,
+        )
+        return [r["provider"] for r in result]
+
+    async def search(self, term: str, limit: int) -> list[dict]:
+        query = lucene_query(term)
+        if query is None:
+            return []
+        result = await aread(
+            self.session,
+            "users.search_providers",
+            f"""
+            CALL db.index.fulltext.queryNodes('{FULLTEXT_INDEX}', $q, {{limit: $limit}}) YIELD node AS u, score
+            RETURN {_PROVIDER_PUBLIC} AS provider
+            ORDER BY score DESC, u.shop_name
+            """,
+            q=query,
+            limit=limit,
+        )
+        return [r["provider"] for r in result]
+
+    async def nearby(self, lat: float, lon: float, radius_m: float, limit: int) -> list[dict]:
+        # The distance predicate on :SearchableProvider(location) is a provider_location index seek
+        result = await aread(
+            self.session,
+            "users.nearby_providers",
+            f"""
+            WITH point({{latitude: $lat, longitude: $lon}}) AS here
+            MATCH (u:{SEARCHABLE_LABEL})
+            WHERE point.distance(u.location, here) <= $radius
+            WITH u, point.distance(u.location, here) AS distance
+            ORDER BY distance, u.shop_name
+            LIMIT $limit
+            RETURN u {{ .id, .email, .contact_number, .shop_name, .shop_address, .is_available,
+                       latitude: u.location.latitude, longitude: u.location.longitude,
+                       distance_km: round(distance / 1000.0, 2) }} AS provider
+            """,
+            lat=lat,
+            lon=lon,
+            radius=radius_m,
+            limit=limit,
+        )
+        return [r["provider"] for r in result]
+
+
+class Neo4jCategoryRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def create(self, provider_id: str, category: dict) -> dict | None:
+        rec = await awrite_one(
+            self.session,
+            "categories.create",
+            f"""
+            MATCH (p:User {{id: $pid, role: 'provider'}})
+            CREATE (c:Category {{
+              id: $id, name: $name, pricing_type: $pricing_type, price: $price,
+              min_kilo: $min_kilo, max_kilo: $max_kilo
+            }})-[:OFFERED_BY]->(p)
+            RETURN {_CATEGORY_PUBLIC} AS category
+            """,
+            {**category, "pid": provider_id},
+        )
+        return rec["category"] if rec else None
+
+    async def list_for_provider(self, provider_id: str) -> list[dict]:
+        result = await aread(
+            self.session,
+            "categories.list_by_provider",
+            f"""
+            MATCH (c:Category)-[:OFFERED_BY]->(p:User {{id: $pid}})
+            RETURN {_CATEGORY_PUBLIC} AS category
+            ORDER BY c.name
+            """,
+            pid=provider_id,
+        )
+        return [r["category"] for r in result]
+
+    async def update(self, category_id: str, provider_id: str, updates: dict) -> dict | None:
+        rec = await awrite_one(
+            self.session,
+            "categories.update",
+            f"""
+            MATCH (c:Category {{id: $id}})-[:OFFERED_BY]->(p:User {{id: $pid}})
+            SET c += $updates
+            RETURN {_CATEGORY_PUBLIC} AS category
+            """,
+            id=category_id,
+            pid=provider_id,
+            updates=updates,
+        )
+        return rec["category"] if rec else None
+
+    async def delete(self, category_id: str, provider_id: str) -> bool:
+        rec = await awrite_one(
+            self.session,
+            "categories.delete",
+            "MATCH (c:Category {id: $id})-[:OFFERED_BY]->(p:User {id: $pid}) DETACH DELETE c RETURN 1 AS ok",
+            id=category_id,
+            pid=provider_id,
+        )
+        return rec is not None
+
+
+# Validates provider and category, prices the booking, creates it with both
+# notifications' outbox entries and returns the public projection - all in one round trip.
+# Pricing mirrors booking_states.booking_total.
+_CREATE_BOOKING_QUERY = """
+MATCH (c:User {id: $cid, role: 'customer'})
+OPTIONAL MATCH (p:User {id: $pid, role: 'provider'})
+OPTIONAL MATCH (cat:Category {id: $catid})-[:OFFERED_BY]->(p)
+WITH c, p, cat,
+     CASE
+       WHEN p IS NULL THEN 'provider_not_found'
+       WHEN coalesce(p.provider_status, '') <> 'approved' THEN 'provider_not_approved'
+       WHEN NOT coalesce(p.is_available, true) THEN 'provider_closed'
+       WHEN cat IS NULL THEN 'category_not_found'
+       WHEN cat.pricing_type <> 'per_kilo' AND cat.min_kilo IS NOT NULL AND $w < cat.min_kilo THEN 'below_min_kilo'
+     END AS error
+WITH c, p, cat, error,
+     CASE
+       WHEN cat IS NULL THEN NULL
+       WHEN cat.pricing_type = 'per_kilo' THEN toFloat(cat.price) * $w
+       WHEN cat.max_kilo IS NOT NULL AND $w > cat.max_kilo THEN toFloat(cat.price) * ceil($w / cat.max_kilo)
+       ELSE toFloat(cat.price)
+     END AS total
+FOREACH (_ IN CASE WHEN error IS NULL THEN [1] ELSE [] END |
+  CREATE (b:Booking {
+    id: $id, schedule_at: $schedule_at, status: 'pending', notes: $notes, created_at: $created_at,
+    weight_kg: $w, total_price: total
+  })
+  CREATE (b)-[:BY_CUSTOMER]->(c)
+  CREATE (b)-[:FOR_PROVIDER]->(p)
+  CREATE (b)-[:OF_CATEGORY]->(cat)
+""" + move_booking("null", "'pending'") + """
+  CREATE (:OutboxEntry {
+    id: randomUUID(),
+    kind: 'notification',
+    user_id: c.id,
+    type: 'booking_created',
+    message: 'Your booking for ' + cat.name + ' at ' + p.shop_name + ' has been submitted. Waiting for provider confirmation.',
+    created_at: $created_at,
+    booking_id: $id,
+    available_at: timestamp()
+  })
+  CREATE (:OutboxEntry {
+    id: randomUUID(),
+    kind: 'notification',
+    user_id: p.id,
+    type: 'new_booking',
+    message: 'New booking received for ' + cat.name + ' from ' + c.full_name + '. Total: ₱' + toString(total),
+    created_at: $created_at,
+    booking_id: $id,
+    available_at: timestamp()
+  })
+)
+WITH c, p, cat, error
+OPTIONAL MATCH (b:Booking {id: $id})
+RETURN error, cat.min_kilo AS min_kilo,
+""" + BOOKING_PUBLIC_RETURN
+
+
+async def _single(tx, query: str, params: dict):
+    result = await tx.run(query, params)
+    return await result.single()
+
+
+async def _update_details_tx(tx, booking_id: str, provider_id: str, payload: BookingUpdateDetails, now: str):
+    # Check booking exists and belongs to provider
+    result = await tx.run(
+        """
+        MATCH (b:Booking {id: $id})-[:FOR_PROVIDER]->(p:User {id: $pid})
+        MATCH (b)-[:OF_CATEGORY]->(cat:Category)
+        RETURN b.status AS status, b.weight_kg AS old_weight, b.total_price AS old_total,
+               cat.pricing_type AS pricing_type, cat.price AS price,
+               cat.min_kilo AS min_kilo, cat.max_kilo AS max_kilo
+        """,
+        id=booking_id,
+        pid=provider_id,
+    )
+    check = await result.single()
+    if not check:
+        raise HTTPException(status_code=404, detail="Booking not found or not for this provider")
+    updates, message = plan_details_update(check, payload)
+
+    # Update the booking, notify the customer, keep any receipt (confirmed+ bookings)
+    # in step with the weighed-in total and weight and return the projection - one statement
+    result = await tx.run(
+        """
+        MATCH (b:Booking {id: $bid})-[:FOR_PROVIDER]->(p:User {id: $pid})
+        MATCH (b)-[:BY_CUSTOMER]->(c:User)
+        MATCH (b)-[:OF_CATEGORY]->(cat:Category)
+        SET b += $updates
+        CREATE (:OutboxEntry {
+          id: randomUUID(),
+          kind: 'notification',
+          user_id: c.id,
+          type: 'booking_updated',
+          message: $message,
+          created_at: $now,
+          booking_id: $bid,
+          available_at: timestamp()
+        })
+        WITH b, c, p, cat
+        CALL {
+          WITH b, p
+          OPTIONAL MATCH (b)<-[:FROM_BOOKING]-(:Order)<-[:FOR_ORDER]-(r:Receipt)
+          FOREACH (_ IN CASE WHEN r IS NOT NULL AND $new_total IS NOT NULL THEN [1] ELSE [] END |
+        """
+        + adjust_receipt("$new_total - r.total", "b.weight_kg - reduce(kg = 0.0, w IN coalesce(r.item_weights_kg, []) | kg + w)")
+        + """
+            SET r.subtotal = $new_total, r.total = $new_total, r.item_weights_kg = [b.weight_kg])
+          RETURN count(r) AS receipts
+        }
+        RETURN """ + BOOKING_PUBLIC_RETURN,
+        bid=booking_id,
+        pid=provider_id,
+        updates=updates,
+        message=message,
+        now=now,
+        new_total=updates.get("total_price"),
+    )
+    rec = await result.single()
+    return booking_record_to_public(rec)
+
+
+def _bookings_visible_to(role: str) -> str:
+    # Anchor on the user's own relationship; admins scan Booking via its indexes
+    if role == UserRole.customer:
+        return "MATCH (b:Booking)-[:BY_CUSTOMER]->(:User {id: $id})"
+    if role == UserRole.provider:
+        return "MATCH (b:Booking)-[:FOR_PROVIDER]->(:User {id: $id})"
+    return "MATCH (b:Booking)"
+
+
+class Neo4jBookingRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def get(self, booking_id: str) -> dict | None:
+        rec = await aread_one(
+            self.session,
+            "bookings.get",
+            """
+            MATCH (b:Booking {id: $id})-[:BY_CUSTOMER]->(c:User)
+            MATCH (b)-[:FOR_PROVIDER]->(p:User)
+            MATCH (b)-[:OF_CATEGORY]->(cat:Category)
+            RETURN """ + BOOKING_PUBLIC_RETURN,
+            id=booking_id,
+        )
+        return booking_record_to_public(rec) if rec else None
+
+    async def create(self, params: dict) -> dict | None:
+        # Managed transaction: the booking and both notifications commit together or not at all
+        rec = await aexecute_write(self.session, "bookings.create", _single, _CREATE_BOOKING_QUERY, params)
+        if not rec:
+            return None
+        return {
+            "error": rec["error"],
+            "min_kilo": rec["min_kilo"],
+            "booking": booking_record_to_public(rec) if rec["error"] is None else None,
+        }
+
+    async def list_page(self, role: str, user_id: str, *, limit: int, cursor: str | None, status: str | None,
+                        date_from, date_to) -> tuple[list[dict], str | None]:
+        match = _bookings_visible_to(role)
+        where, params = keyset_filters("b", cursor, date_from, date_to)
+        if status is not None:
+            where.append("b.status = $status")
+            params["status"] = status
+        params.update(id=user_id, limit=limit + 1)
+        # Page on the Booking alone, then expand parties for the rows actually returned
+        q = (
+            match
+            + ("\nWHERE " + " AND ".join(where) if where else "")
+            + """
+            WITH b ORDER BY b.created_at DESC, b.id DESC LIMIT $limit
+            MATCH (b)-[:BY_CUSTOMER]->(c:User)
+            MATCH (b)-[:FOR_PROVIDER]->(p:User)
+            MATCH (b)-[:OF_CATEGORY]->(cat:Category)
+            RETURN """
+            + BOOKING_PUBLIC_RETURN
+            + "ORDER BY b.created_at DESC, b.id DESC"
+        )
+        records = await aread(self.session, "bookings.list_mine", q, params)
+        items = [booking_record_to_public(rec) for rec in records[:limit]]
+        next_cursor = None
+        if len(records) > limit:
+            last = records[limit - 1]["b"]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+        return items, next_cursor
+
+    async def export(self, role: str, user_id: str, *, status: str | None, date_from, date_to):
+        where, params = keyset_filters("b", None, date_from, date_to)
+        if status is not None:
+            where.append("b.status = $status")
+            params["status"] = status
+        params["id"] = user_id
+        q = (
+            _bookings_visible_to(role)
+            + ("\nWHERE " + " AND ".join(where) if where else "")
+            + """
+            MATCH (b)-[:BY_CUSTOMER]->(c:User)
+            MATCH (b)-[:FOR_PROVIDER]->(p:User)
+            MATCH (b)-[:OF_CATEGORY]->(cat:Category)
+            WITH b, c, p, cat ORDER BY b.created_at, b.id
+            RETURN """
+            + BOOKING_PUBLIC_RETURN
+        )
+        async for rec in astream(self.session, "bookings.export", q, params, timeout=settings.export_timeout_seconds):
+            yield booking_record_to_public(rec)
+
+    async def transition(self, t: Transition, params: dict) -> tuple[bool, dict] | None:
+        rec = await aexecute_write(self.session, f"bookings.transition.{t.name}", _single, TRANSITION_QUERIES[t.name], params)
+        if not rec or rec["b"] is None:
+            return None
+        return rec["allowed"], booking_record_to_public(rec)
+
+    async def update_details(self, booking_id: str, provider_id: str, payload: BookingUpdateDetails) -> dict:
+        now = datetime.now(PH_TZ).isoformat()
+        return await aexecute_write(self.session, "bookings.update_details", _update_details_tx, booking_id, provider_id, payload, now)
+
+
+class Neo4jNotificationRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def list_page(self, user_id: str, *, limit: int, cursor: str | None) -> tuple[list[dict], str | None]:
+        where, params = keyset_filters("n", cursor, None, None)
+        params.update(uid=user_id, limit=limit + 1)
+        records = await aread(
+            self.session,
+            "notifications.list_mine",
+            "MATCH (n:Notification)-[:FOR_USER]->(u:User {id: $uid})"
+            + ("\nWHERE " + " AND ".join(where) if where else "")
+            + """
+            RETURN n { .id, .type, .message, .created_at, .read, .receipt_id, .booking_id } AS n
+            ORDER BY n.created_at DESC, n.id DESC
+            LIMIT $limit
+            """,
+            params,
+        )
+        items = [rec["n"] for rec in records[:limit]]
+        next_cursor = None
+        if len(records) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+        return items, next_cursor
+
+    async def unread_count(self, user_id: str) -> int:
+        rec = await aread_one(
+            self.session,
+            "notifications.unread_count",
+            "MATCH (u:User {id: $uid}) RETURN coalesce(u.unread_notifications, 0) AS unread",
+            uid=user_id,
+        )
+        return rec["unread"] if rec else 0
+
+    async def mark_read(self, notification_id: str, user_id: str) -> dict | None:
+        # Lock the notification before reading `read` so two concurrent marks
+        # decrement the counter once
+        rec = await awrite_one(
+            self.session,
+            "notifications.mark_read",
+            """
+            MATCH (n:Notification {id: $id})-[:FOR_USER]->(u:User {id: $uid})
+            SET n._lock = true
+            REMOVE n._lock
+            WITH n, u, coalesce(n.read, false) AS was_read
+            SET n.read = true
+            FOREACH (_ IN CASE WHEN was_read THEN [] ELSE [1] END |
+            """ + decrement_unread("u") + """)
+            RETURN n { .id, .type, .message, .created_at, .read } AS n
+            """,
+            id=notification_id,
+            uid=user_id,
+        )
+        return rec["n"] if rec else None
+
+    async def mark_all_read(self, user_id: str) -> int:
+        # The user lock serializes this against notification writes for the same
+        # user, so the counter can be reset rather than decremented
+        rec = await awrite_one(
+            self.session,
+            "notifications.mark_all_read",
+            """
+            MATCH (u:User {id: $uid})
+            SET u._lock = true
+            REMOVE u._lock
+            WITH u
+            OPTIONAL MATCH (n:Notification)-[:FOR_USER]->(u)
+            WHERE NOT coalesce(n.read, false)
+            SET n.read = true
+            WITH u, count(n) AS marked
+            SET u.unread_notifications = 0
+            RETURN marked
+            """,
+            uid=user_id,
+        )
+        return rec["marked"] if rec else 0
+
+
+class Neo4jReceiptRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def list_page(self, role: str, user_id: str, *, limit: int, cursor: str | None,
+                        date_from, date_to) -> tuple[list[dict], str | None]:
+        match = _receipts_of(role)
+        where, params = keyset_filters("r", cursor, date_from, date_to)
+        params.update(id=user_id, limit=limit + 1)
+        # Receipts carry their own snapshot (receipt_snapshot), so the page is the whole answer
+        q = (
+            match
+            + ("\nWHERE " + " AND ".join(where) if where else "")
+            + f"""
+            WITH r ORDER BY r.created_at DESC, r.id DESC LIMIT $limit
+            RETURN r {receipt_snapshot.RETURN_PROJECTION} AS r
+            ORDER BY r.created_at DESC, r.id DESC
+            """
+        )
+        records = await aread(self.session, "receipts.list_mine", q, params)
+        items = [receipt_snapshot.to_public(rec["r"]) for rec in records[:limit]]
+        next_cursor = None
+        if len(records) > limit:
+            last = records[limit - 1]["r"]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+        return items, next_cursor
+
+    async def export(self, role: str, user_id: str, *, status: str | None, date_from, date_to):
+        where, params = keyset_filters("r", None, date_from, date_to)
+        if status is not None:
+            # Order status mirrors the booking's; only this filter leaves the snapshot
+            where.append("EXISTS { (r)-[:FOR_ORDER]->(:Order {status: $status}) }")
+            params["status"] = status
+        params["id"] = user_id
+        q = (
+            _receipts_of(role)
+            + ("\nWHERE " + " AND ".join(where) if where else "")
+            + f"""
+            WITH r ORDER BY r.created_at, r.id
+            RETURN r {receipt_snapshot.RETURN_PROJECTION} AS r
+            """
+        )
+        async for rec in astream(self.session, "receipts.export", q, params, timeout=settings.export_timeout_seconds):
+            yield receipt_snapshot.to_public(rec["r"])
+
+
+def _receipts_of(role: str) -> str:
+    if role == UserRole.customer:
+        return "MATCH (r:Receipt)-[:FOR_CUSTOMER]->(:User {id: $id})"
+    return "MATCH (r:Receipt)-[:FOR_PROVIDER]->(:User {id: $id})"
+
+
+# Recomputes a provider's review aggregates; expects $pid
+_REFRESH_PROVIDER_RATING = """
+MATCH (p:User {id: $pid, role: 'provider'})
+OPTIONAL MATCH (p)<-[:FOR_PROVIDER]-(r:Review)
+WITH p, count(r) AS total_reviews, avg(r.rating) AS avg_rating
+SET p.review_count = total_reviews,
+    p.avg_rating = coalesce(round(10 * avg_rating) / 10.0, 0.0)
+"""
+
+_REVIEW_PUBLIC_RETURN = """
+RETURN r {.id, .rating, .comment, .created_at} AS r,
+       c.id AS customer_id, c.full_name AS customer_name,
+       p.id AS provider_id,
+       b.id AS booking_id
+"""
+
+
+def review_record_to_public(rec) -> dict:
+    r = rec["r"]
+    return {
+        "id": r.get("id"),
+        "provider_id": rec["provider_id"],
+        "customer_id": rec["customer_id"],
+        "customer_name": rec.get("customer_name"),
+        "booking_id": rec["booking_id"],
+        "rating": int(r.get("rating")),
+        "comment": r.get("comment"),
+        "created_at": datetime.fromisoformat(r.get("created_at")),
+    }
+
+
+async def _review_to_public(tx, review_id: str) -> dict | None:
+    """Convert review node to public dict (runs inside the caller's transaction)"""
+    result = await tx.run(
+        """
+        MATCH (r:Review {id: $id})-[:BY_CUSTOMER]->(c:User)
+        MATCH (r)-[:FOR_PROVIDER]->(p:User)
+        MATCH (r)-[:FOR_BOOKING]->(b:Booking)
+        """ + _REVIEW_PUBLIC_RETURN,
+        id=review_id,
+    )
+    rec = await result.single()
+    if not rec:
+        return None
+    return review_record_to_public(rec)
+
+
+async def _create_review_tx(tx, params: dict):
+    # Check if booking exists, belongs to customer, and is completed; and whether it was reviewed
+    result = await tx.run(
+        """
+        MATCH (b:Booking {id: $bid})-[:BY_CUSTOMER]->(c:User {id: $cid})
+        MATCH (b)-[:FOR_PROVIDER]->(p:User {id: $pid})
+        OPTIONAL MATCH (existing:Review)-[:FOR_BOOKING]->(b)
+        RETURN b.status AS status, count(existing) AS reviews
+        """,
+        params,
+    )
+    booking_check = await result.single()
+
+    if not booking_check:
+        raise HTTPException(status_code=404, detail="Booking not found or not authorized")
+
+    if booking_check["status"] != BookingStatus.completed.value:
+        raise HTTPException(status_code=400, detail="Can only review completed bookings")
+
+    if booking_check["reviews"]:
+        raise HTTPException(status_code=400, detail="Review already exists for this booking")
+
+    # Create review and notify provider
+    result = await tx.run(
+        """
+        MATCH (c:User {id: $cid}), (p:User {id: $pid}), (b:Booking {id: $bid})
+        CREATE (r:Review {
+            id: $rid,
+            rating: $rating,
+            comment: $comment,
+            created_at: $now
+        })-[:BY_CUSTOMER]->(c)
+        CREATE (r)-[:FOR_PROVIDER]->(p)
+        CREATE (r)-[:FOR_BOOKING]->(b)
+        CREATE (:OutboxEntry {
+            id: randomUUID(),
+            kind: 'notification',
+            user_id: p.id,
+            type: 'new_review',
+            message: c.full_name + ' left a ' + toString($rating) + '-star review for your shop.',
+            created_at: $now,
+            available_at: timestamp()
+        })
+        """,
+        params,
+    )
+    await result.consume()
+
+    # Update provider aggregate fields (average and count)
+    result = await tx.run(_REFRESH_PROVIDER_RATING, params)
+    await result.consume()
+    return await _review_to_public(tx, params["rid"])
+
+
+async def _update_review_tx(tx, review_id: str, customer_id: str, updates: dict):
+    # Ensure the review exists and belongs to current user
+    result = await tx.run(
+        """
+        MATCH (r:Review {id: $rid})-[:BY_CUSTOMER]->(c:User {id: $cid})
+        MATCH (r)-[:FOR_PROVIDER]->(p:User)
+        SET r += $updates
+        RETURN r.id AS id, p.id AS provider_id
+        """,
+        rid=review_id,
+        cid=customer_id,
+        updates=updates,
+    )
+    rec = await result.single()
+
+    if not rec:
+        raise HTTPException(status_code=404, detail="Review not found or not authorized")
+
+    if updates:
+        # Update provider aggregates
+        result = await tx.run(_REFRESH_PROVIDER_RATING, pid=rec["provider_id"])
+        await result.consume()
+
+    data = await _review_to_public(tx, review_id)
+    if not data:
+        raise HTTPException(status_code=404, detail="Review not found")
+    return data
+
+
+class Neo4jReviewRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def create(self, params: dict) -> dict:
+        # Checks and writes share one transaction so a retry replays the whole unit
+        return await aexecute_write(self.session, "reviews.create", _create_review_tx, params)
+
+    async def update(self, review_id: str, customer_id: str, updates: dict) -> dict:
+        return await aexecute_write(self.session, "reviews.update", _update_review_tx, review_id, customer_id, updates)
+
+    async def get(self, review_id: str) -> dict | None:
+        return await aexecute_read(self.session, "reviews.get", _review_to_public, review_id)
+
+    async def list_for_provider(self, provider_id: str) -> list[dict]:
+        result = await aread(
+            self.session,
+            "reviews.list_by_provider",
+            """
+            MATCH (r:Review)-[:FOR_PROVIDER]->(p:User {id: $pid})
+            MATCH (r)-[:BY_CUSTOMER]->(c:User)
+            MATCH (r)-[:FOR_BOOKING]->(b:Booking)
+            """ + _REVIEW_PUBLIC_RETURN + "ORDER BY r.created_at DESC",
+            pid=provider_id,
+        )
+        return [review_record_to_public(rec) for rec in result]
+
+    async def provider_stats(self, provider_id: str) -> dict | None:
+        rec = await aread_one(
+            self.session,
+            "reviews.provider_stats",
+            """
+            MATCH (r:Review)-[:FOR_PROVIDER]->(p:User {id: $pid})
+            RETURN
+                count(r) AS total_reviews,
+                avg(r.rating) AS average_rating,
+                sum(CASE WHEN r.rating = 5 THEN 1 ELSE 0 END) AS five_star,
+                sum(CASE WHEN r.rating = 4 THEN 1 ELSE 0 END) AS four_star,
+                sum(CASE WHEN r.rating = 3 THEN 1 ELSE 0 END) AS three_star,
+                sum(CASE WHEN r.rating = 2 THEN 1 ELSE 0 END) AS two_star,
+                sum(CASE WHEN r.rating = 1 THEN 1 ELSE 0 END) AS one_star
+            """,
+            pid=provider_id,
+        )
+        return dict(rec) if rec else None
+
+    async def id_for_booking(self, booking_id: str) -> str | None:
+        rec = await aread_one(
+            self.session,
+            "reviews.check_booking",
+            "MATCH (r:Review)-[:FOR_BOOKING]->(b:Booking {id: $bid}) RETURN r.id AS id",
+            bid=booking_id,
+        )
+        return rec["id"] if rec else None
+
+
+# Materializes due notification entries per user: Notifications, one counter
+# update per user, entries deleted - one transaction, so delivery is exactly once.
+# Entries for a user deleted since are dropped.
+_DELIVER_NOTIFICATIONS = """
+MATCH (e:OutboxEntry {kind: 'notification'})
+WHERE e.available_at <= $now
+WITH e ORDER BY e.available_at LIMIT $limit
+OPTIONAL MATCH (u:User {id: e.user_id})
+WITH u, collect(e) AS entries
+FOREACH (_ IN CASE WHEN u IS NULL THEN [] ELSE [1] END |
+  FOREACH (e IN entries |
+    CREATE (:Notification {
+      id: randomUUID(),
+      type: e.type,
+      message: e.message,
+      created_at: e.created_at,
+      read: false,
+      booking_id: e.booking_id,
+      receipt_id: e.receipt_id
+    })-[:FOR_USER]->(u))
+""" + add_unread("u", "size(entries)") + """)
+WITH u, entries, [e IN entries | {type: e.type, booking_id: e.booking_id}] AS delivered
+FOREACH (e IN entries | DELETE e)
+RETURN u.id AS user_id, delivered
+"""
+
+
+class Neo4jOutboxRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def enqueue(self, entry: dict) -> None:
+        await awrite(self.session, "outbox.enqueue", "CREATE (e:OutboxEntry) SET e = $entry", entry=entry)
+
+    async def has_due(self, now: int) -> bool:
+        rec = await aread_one(
+            self.session,
+            "outbox.has_due",
+            "MATCH (e:OutboxEntry) WHERE e.available_at <= $now RETURN e.id AS id LIMIT 1",
+            now=now,
+        )
+        return rec is not None
+
+    async def acquire_lease(self, holder: str, now: int, until: int) -> bool:
+        # The lock makes the holder check see the latest committed lease
+        rec = await awrite_one(
+            self.session,
+            "outbox.acquire_lease",
+            """
+            MERGE (l:OutboxLease {name: 'dispatcher'})
+            SET l._lock = true
+            REMOVE l._lock
+            WITH l
+            WHERE l.holder IS NULL OR l.holder = $holder OR l.until <= $now
+            SET l.holder = $holder, l.until = $until
+            RETURN l.holder AS holder
+            """,
+            holder=holder,
+            now=now,
+            until=until,
+        )
+        return rec is not None
+
+    async def deliver_notifications(self, now: int, limit: int) -> list[dict]:
+        records = await awrite(self.session, "outbox.deliver_notifications", _DELIVER_NOTIFICATIONS, now=now, limit=limit)
+        return [
+            {"user_id": rec["user_id"], **item}
+            for rec in records
+            for item in rec["delivered"]
+        ]
+
+    async def claim_emails(self, now: int, limit: int, until: int) -> list[dict]:
+        records = await awrite(
+            self.session,
+            "outbox.claim_emails",
+            """
+            MATCH (e:OutboxEntry {kind: 'email'})
+            WHERE e.available_at <= $now
+            WITH e ORDER BY e.available_at LIMIT $limit
+            SET e.available_at = $until, e.attempts = coalesce(e.attempts, 0) + 1
+            RETURN e { .id, .to, .template, .payload, .attempts } AS e
+            """,
+            now=now,
+            limit=limit,
+            until=until,
+        )
+        return [rec["e"] for rec in records]
+
+    async def complete(self, ids: list[str]) -> None:
+        if ids:
+            await awrite(
+                self.session,
+                "outbox.complete",
+                "UNWIND $ids AS id MATCH (e:OutboxEntry {id: id}) DELETE e",
+                ids=ids,
+            )
+
+    async def fail(self, failures: list[dict]) -> None:
+        if failures:
+            await awrite(
+                self.session,
+                "outbox.fail",
+                """
+                UNWIND $rows AS row
+                MATCH (e:OutboxEntry {id: row.id})
+                SET e.available_at = row.available_at,
+                    e.last_error = row.error,
+                    e.status = CASE WHEN row.available_at IS NULL THEN 'dead' ELSE e.status END
+                """,
+                rows=failures,
+            )
+
+    async def stats(self) -> list[dict]:
+        records = await aread(
+            self.session,
+            "outbox.stats",
+            """
+            MATCH (e:OutboxEntry)
+            RETURN e.kind AS kind, coalesce(e.status, 'pending') AS status, count(*) AS count
+            ORDER BY kind, status
+            """,
+        )
+        return [dict(rec) for rec in records]
+
+    async def list_dead(self, limit: int) -> list[dict]:
+        records = await aread(
+            self.session,
+            "outbox.list_dead",
+            """
+            MATCH (e:OutboxEntry {status: 'dead'})
+            RETURN e { .id, .kind, .to, .template, .user_id, .type, .attempts, .last_error, .created_at } AS e
+            ORDER BY e.created_at DESC
+            LIMIT $limit
+            """,
+            limit=limit,
+        )
+        return [rec["e"] for rec in records]
+
+    async def requeue(self, entry_id: str, now: int) -> bool:
+        rec = await awrite_one(
+            self.session,
+            "outbox.requeue",
+            """
+            MATCH (e:OutboxEntry {id: $id, status: 'dead'})
+            SET e.available_at = $now, e.attempts = 0
+            REMOVE e.status
+            RETURN e.id AS id
+            """,
+            id=entry_id,
+            now=now,
+        )
+        return rec is not None
+
+
+class Neo4jReportRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def sales_rollups(self, provider_id: str, day_from: str, day_to: str) -> list[dict]:
+        # Served by the sales_rollup_key constraint's (provider_id, day) index
+        records = await aread(
+            self.session,
+            "reports.provider_sales",
+            f"""
+            MATCH (sr:{ROLLUP_LABEL} {{provider_id: $pid}})
+            WHERE sr.day >= $day_from AND sr.day <= $day_to
+            RETURN sr {ROLLUP_PROJECTION} AS sr
+            ORDER BY sr.day
+            """,
+            pid=provider_id,
+            day_from=day_from,
+            day_to=day_to,
+        )
+        return [rec["sr"] for rec in records]
+
+
+class Neo4jRepositories:
+    """Every repository bound to one request's AsyncSession."""
+
+    def __init__(self, session):
+        self.session = session
+        self.users = Neo4jUserRepository(session)
+        self.providers = Neo4jProviderRepository(session)
+        self.categories = Neo4jCategoryRepository(session)
+        self.bookings = Neo4jBookingRepository(session)
+        self.notifications = Neo4jNotificationRepository(session)
+        self.receipts = Neo4jReceiptRepository(session)
+        self.reviews = Neo4jReviewRepository(session)
+        self.outbox = Neo4jOutboxRepository(session)
+        self.reports = Neo4jReportRepository(session)
+
+    async def stats(self) -> dict:
+        rec = await aread_one(
+            self.session,
+            "admin.stats",
+            """
+            CALL { MATCH (u:User) RETURN count(u) AS users }
+            CALL { MATCH (u:User {role: 'provider'}) RETURN count(u) AS providers }
+            CALL { MATCH (b:Booking) RETURN count(b) AS bookings }
+            RETURN users, providers, bookings
+            """,
+        )
+        return {"users": rec["users"], "providers": rec["providers"], "bookings": rec["bookings"]}
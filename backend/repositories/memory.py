@@ -0,0 +1,998 @@
+"""In-memory repositories backed by indexed dicts (DATA_BACKEND=memory).
+
+For profiling the Python hot paths and load-testing the whole API without a
+database. One process-wide MemoryStore holds every node as a plain dict keyed
+by id, plus the secondary indexes the routes look things up by: email, each
+user's bookings / notifications / receipts newest first, a provider's
+categories and reviews, and a booking's orders and review. Nothing is
+persisted.
+
+Repository methods never await, so each one runs to completion on the event
+loop without interleaving - the all-or-nothing behaviour the Neo4j
+transactions give. The store is not shared across worker processes; run a
+single worker in this mode.
+"""
+import bisect
+import math
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from booking_states import (
+    PH_TZ,
+    Transition,
+    booking_record_to_public,
+    booking_total,
+    plan_details_update,
+)
+from models import BookingStatus, BookingUpdateDetails, CategoryPricingType, UserPublic, UserRole
+from pagination import decode_cursor, encode_cursor, to_ph_iso
+from geo import GeoGrid
+from provider_search import TrigramIndex
+from rollups import RollupTable
+from receipt_snapshot import snapshot, to_public as receipt_public
+
+# Property sets of the Cypher map projections each listing returns
+_USER_FIELDS = ("id", "role", "email", "contact_number", "full_name", "address", "shop_name", "shop_address",
+                "provider_status", "banned", "is_available")
+_LOGIN_FIELDS = _USER_FIELDS + ("email_verified",)
+_PROVIDER_FIELDS = ("id", "email", "contact_number", "shop_name", "shop_address", "is_available")
+_ADMIN_USER_FIELDS = ("id", "email", "contact_number", "role", "full_name", "address", "shop_name", "shop_address",
+                      "provider_status", "banned")
+_PENDING_FIELDS = ("id", "email", "contact_number", "shop_name", "shop_address", "provider_status")
+_CATEGORY_FIELDS = ("id", "name", "pricing_type", "price", "min_kilo", "max_kilo", "provider_id")
+_NOTIFICATION_FIELDS = ("id", "type", "message", "created_at", "read", "receipt_id", "booking_id")
+_MARK_READ_FIELDS = ("id", "type", "message", "created_at", "read")
+
+# Sorts after every real id, so (created_at, _MAX_ID) bounds all rows at created_at
+_MAX_ID = "\U0010ffff"
+
+
+def _now_ms() -> int:
+    # Cypher timestamp()
+    return int(time.time() * 1000)
+
+
+def _project(node: dict, fields: tuple[str, ...]) -> dict:
+    return {f: node.get(f) for f in fields}
+
+
+def _nulls_last(value) -> tuple:
+    # Cypher ORDER BY puts nulls last in ascending order
+    return (value is None, value or "")
+
+
+class _Timeline:
+    """Ids kept sorted by (created_at, id), read newest first like the keyset queries."""
+
+    def __init__(self):
+        self.keys: list[tuple[str, str]] = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, created_at: str, id: str):
+        bisect.insort(self.keys, (created_at, id))
+
+    def remove(self, created_at: str, id: str):
+        i = bisect.bisect_left(self.keys, (created_at, id))
+        if i < len(self.keys) and self.keys[i] == (created_at, id):
+            del self.keys[i]
+
+    def newest_first(self, before: tuple[str, str] | None = None, date_from: str | None = None, date_to: str | None = None):
+        hi = len(self.keys)
+        if before is not None:
+            hi = bisect.bisect_left(self.keys, before)
+        if date_to is not None:
+            hi = min(hi, bisect.bisect_right(self.keys, (date_to, _MAX_ID)))
+        for i in range(hi - 1, -1, -1):
+            created_at, id = self.keys[i]
+            if date_from is not None and created_at < date_from:
+                return
+            yield id
+
+    def oldest_first(self, date_from: str | None = None, date_to: str | None = None):
+        lo = 0 if date_from is None else bisect.bisect_left(self.keys, (date_from, ""))
+        hi = len(self.keys) if date_to is None else bisect.bisect_right(self.keys, (date_to, _MAX_ID))
+        # Rows may be added or removed while a streaming consumer is paused
+        for i in range(lo, hi):
+            if i >= len(self.keys):
+                return
+            yield self.keys[i][1]
+
+
+class MemoryStore:
+    """Nodes as dicts keyed by id; relationships as id fields plus the indexes below."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.users: dict[str, dict] = {}
+        self.user_ids_by_email: dict[str, str] = {}
+        self.provider_ids: set[str] = set()
+        self.provider_search = TrigramIndex()
+        self.provider_locations = GeoGrid()
+        self.categories: dict[str, dict] = {}
+        self.category_ids_by_provider: defaultdict[str, set[str]] = defaultdict(set)
+        self.bookings: dict[str, dict] = {}
+        self.all_bookings = _Timeline()
+        self.bookings_by_customer: defaultdict[str, _Timeline] = defaultdict(_Timeline)
+        self.bookings_by_provider: defaultdict[str, _Timeline] = defaultdict(_Timeline)
+        self.orders: dict[str, dict] = {}
+        self.order_ids_by_booking: defaultdict[str, list[str]] = defaultdict(list)
+        self.receipts: dict[str, dict] = {}
+        self.receipt_id_by_order: dict[str, str] = {}
+        self.receipts_by_customer: defaultdict[str, _Timeline] = defaultdict(_Timeline)
+        self.receipts_by_provider: defaultdict[str, _Timeline] = defaultdict(_Timeline)
+        self.sales_rollups = RollupTable()
+        self.notifications: dict[str, dict] = {}
+        self.notifications_by_user: defaultdict[str, _Timeline] = defaultdict(_Timeline)
+        self.reviews: dict[str, dict] = {}
+        self.reviews_by_provider: defaultdict[str, _Timeline] = defaultdict(_Timeline)
+        self.review_id_by_booking: dict[str, str] = {}
+        self.outbox: dict[str, dict] = {}
+        self.outbox_lease: dict = {}
+
+    # --- writes; each keeps its indexes in step ---------------------------------
+
+    def add_user(self, props: dict):
+        user = dict(props)
+        self.users[user["id"]] = user
+        self.user_ids_by_email[user["email"]] = user["id"]
+        if user.get("role") == UserRole.provider.value:
+            self.provider_ids.add(user["id"])
+            self.reindex_provider(user["id"])
+        return user
+
+    def reindex_provider(self, user_id: str):
+        # Like the :SearchableProvider label: only approved providers are searchable
+        user = self.users.get(user_id)
+        if user is not None and user_id in self.provider_ids and user.get("provider_status") == "approved":
+            self.provider_search.add(user_id, user)
+            if user.get("location"):
+                self.provider_locations.put(user_id, *user["location"])
+            else:
+                self.provider_locations.remove(user_id)
+        else:
+            self.provider_search.remove(user_id)
+            self.provider_locations.remove(user_id)
+
+    def remove_user(self, user_id: str):
+        # Like DETACH DELETE: the user's own relationships go, the other end stays
+        user = self.users.pop(user_id, None)
+        if user is None:
+            return
+        self.user_ids_by_email.pop(user["email"], None)
+        self.provider_ids.discard(user_id)
+        self.provider_search.remove(user_id)
+        self.provider_locations.remove(user_id)
+        self.category_ids_by_provider.pop(user_id, None)
+        self.notifications_by_user.pop(user_id, None)
+
+    def add_category(self, row: dict):
+        category = _project(row, _CATEGORY_FIELDS)
+        self.categories[category["id"]] = category
+        self.category_ids_by_provider[category["provider_id"]].add(category["id"])
+        return category
+
+    def remove_category(self, category_id: str):
+        category = self.categories.pop(category_id)
+        self.category_ids_by_provider[category["provider_id"]].discard(category_id)
+
+    def add_booking(self, row: dict):
+        booking = dict(row)
+        self.bookings[booking["id"]] = booking
+        key = (booking["created_at"], booking["id"])
+        self.all_bookings.add(*key)
+        self.bookings_by_customer[booking["customer_id"]].add(*key)
+        self.bookings_by_provider[booking["provider_id"]].add(*key)
+        self.sales_rollups.move_booking(booking, None, booking["status"])
+        return booking
+
+    def add_order(self, row: dict):
+        order = dict(row)
+        self.orders[order["id"]] = order
+        self.order_ids_by_booking[order["booking_id"]].append(order["id"])
+        return order
+
+    def add_receipt(self, row: dict):
+        receipt = dict(row)
+        self.receipts[receipt["id"]] = receipt
+        self.receipt_id_by_order[receipt["order_id"]] = receipt["id"]
+        key = (receipt["created_at"], receipt["id"])
+        self.receipts_by_customer[receipt["customer_id"]].add(*key)
+        self.receipts_by_provider[receipt["provider_id"]].add(*key)
+        self.sales_rollups.add_receipt(receipt)
+        return receipt
+
+    def add_notification(self, row: dict):
+        notification = dict(row)
+        self.notifications[notification["id"]] = notification
+        self.notifications_by_user[notification["user_id"]].add(notification["created_at"], notification["id"])
+        user = self.users.get(notification["user_id"])
+        if user is not None and not notification.get("read"):
+            user["unread_notifications"] = user.get("unread_notifications", 0) + 1
+        return notification
+
+    def notify(self, user_id: str, type: str, message: str, created_at: str, **extra):
+        # Queued like the Cypher writes do; MemoryOutboxRepository delivers it
+        return self.enqueue({
+            "id": str(uuid.uuid4()),
+            "kind": "notification",
+            "user_id": user_id,
+            "type": type,
+            "message": message,
+            "created_at": created_at,
+            "available_at": _now_ms(),
+            **extra,
+        })
+
+    def enqueue(self, row: dict):
+        entry = dict(row)
+        self.outbox[entry["id"]] = entry
+        return entry
+
+    def add_review(self, row: dict):
+        review = dict(row)
+        self.reviews[review["id"]] = review
+        self.reviews_by_provider[review["provider_id"]].add(review["created_at"], review["id"])
+        self.review_id_by_booking[review["booking_id"]] = review["id"]
+        return review
+
+    def load(self, users=(), categories=(), bookings=(), notifications=()):
+        """Bulk-load rows in the shapes benchmark.py seeds Neo4j with.
+
+        Booking rows with an order_id/receipt_id also get their Order and Receipt.
+        """
+        for row in users:
+            self.add_user(row)
+        for row in categories:
+            self.add_category(row)
+        for row in bookings:
+            booking = {k: v for k, v in row.items() if k not in ("order_id", "receipt_id")}
+            booking.setdefault("schedule_at", booking["created_at"])
+            self.add_booking(booking)
+            if row.get("receipt_id"):
+                self.add_order({"id": row["order_id"], "booking_id": row["id"], "status": row["status"], "created_at": row["created_at"]})
+                cat = self.categories[row["category_id"]]
+                self.add_receipt({
+                    "id": row["receipt_id"],
+                    "subtotal": row["total_price"],
+                    "delivery_fee": 0.0,
+                    "total": row["total_price"],
+                    "created_at": row["created_at"],
+                    **snapshot(row["order_id"], self.users[row["customer_id"]], self.users[row["provider_id"]], [
+                        {"service_id": cat["id"], "service_name": cat["name"], "weight_kg": row["weight_kg"]},
+                    ]),
+                })
+        for row in notifications:
+            self.add_notification(row)
+
+    # --- reads -------------------------------------------------------------------
+
+    def booking_public(self, booking: dict) -> dict | None:
+        """Public projection, or None when a party is gone (the Cypher MATCHes drop those rows)."""
+        c = self.users.get(booking["customer_id"])
+        p = self.users.get(booking["provider_id"])
+        cat = self.categories.get(booking["category_id"])
+        if c is None or p is None or cat is None:
+            return None
+        return booking_record_to_public({
+            "b": booking,
+            "customer_id": c["id"],
+            "customer_name": c.get("full_name"),
+            "customer_contact": c.get("contact_number"),
+            "provider_id": p["id"],
+            "provider_shop_name": p.get("shop_name"),
+            "provider_full_name": p.get("full_name"),
+            "provider_address": p.get("shop_address"),
+            "provider_contact": p.get("contact_number"),
+            "cat": cat,
+        })
+
+    def review_public(self, review: dict) -> dict | None:
+        c = self.users.get(review["customer_id"])
+        if c is None or review["provider_id"] not in self.users or review["booking_id"] not in self.bookings:
+            return None
+        return {
+            "id": review["id"],
+            "provider_id": review["provider_id"],
+            "customer_id": c["id"],
+            "customer_name": c.get("full_name"),
+            "booking_id": review["booking_id"],
+            "rating": int(review["rating"]),
+            "comment": review.get("comment"),
+            "created_at": datetime.fromisoformat(review["created_at"]),
+        }
+
+
+class MemoryUserRepository:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _by_email(self, email: str) -> dict | None:
+        user_id = self.store.user_ids_by_email.get(email)
+        return self.store.users.get(user_id) if user_id else None
+
+    async def get(self, user_id: str) -> UserPublic | None:
+        user = self.store.users.get(user_id)
+        return UserPublic(**_project(user, _USER_FIELDS)) if user else None
+
+    async def get_login_record(self, email: str) -> tuple[UserPublic, str | None] | None:
+        user = self._by_email(email)
+        if user is None:
+            return None
+        return UserPublic(**_project(user, _LOGIN_FIELDS)), user.get("hashed_password")
+
+    async def email_exists(self, email: str) -> bool:
+        return email in self.store.user_ids_by_email
+
+    async def create(self, props: dict, email: dict | None = None) -> bool:
+        if props["email"] in self.store.user_ids_by_email:
+            return False
+        self.store.add_user(props)
+        if email is not None:
+            self.store.enqueue(email)
+        return True
+
+    async def update_profile(self, user_id: str, updates: dict) -> UserPublic | None:
+        user = self.store.users.get(user_id)
+        if user is None:
+            return None
+        user.update(updates)
+        if user_id in self.store.provider_search:
+            self.store.reindex_provider(user_id)
+        return UserPublic(**_project(user, _USER_FIELDS))
+
+    async def set_location(self, user_id: str, location: tuple[float, float] | None) -> None:
+        user = self.store.users.get(user_id)
+        if user is None:
+            return
+        user["location"] = location
+        self.store.reindex_provider(user_id)
+
+    async def get_password_hash(self, user_id: str) -> str | None:
+        user = self.store.users.get(user_id)
+        return user.get("hashed_password") if user else None
+
+    async def set_password_hash(self, user_id: str, hashed_password: str) -> None:
+        user = self.store.users.get(user_id)
+        if user is not None:
+            user["hashed_password"] = hashed_password
+
+    async def toggle_availability(self, user_id: str) -> bool | None:
+        user = self.store.users.get(user_id)
+        if user is None:
+            return None
+        user["is_available"] = not user.get("is_available", True)
+        return user["is_available"]
+
+    async def mark_email_verified(self, email: str) -> bool:
+        user = self._by_email(email)
+        if user is None:
+            return False
+        user["email_verified"] = True
+        return True
+
+    async def email_verified(self, email: str) -> bool | None:
+        user = self._by_email(email)
+        return bool(user.get("email_verified")) if user else None
+
+    async def get_or_create_oauth(self, email: str, full_name: str, provider: str, provider_id: str) -> dict:
+        user = self._by_email(email)
+        if user is None:
+            user = self.store.add_user({
+                "id": str(uuid.uuid4()),
+                "role": UserRole.customer.value,
+                "email": email,
+                "contact_number": "Not provided",
+                "full_name": full_name,
+                "address": "Not provided",
+                "banned": False,
+                "email_verified": True,
+                "oauth_provider": provider,
+                "oauth_id": provider_id,
+            })
+        return _project(user, _USER_FIELDS)
+
+    async def set_provider_status(self, provider_id: str, status: str) -> bool:
+        if provider_id not in self.store.provider_ids:
+            return False
+        self.store.users[provider_id]["provider_status"] = status
+        self.store.reindex_provider(provider_id)
+        return True
+
+    async def set_banned(self, user_id: str, banned: bool) -> bool:
+        user = self.store.users.get(user_id)
+        if user is None:
+            return False
+        user["banned"] = banned
+        return True
+
+    async def delete(self, user_id: str) -> None:
+        self.store.remove_user(user_id)
+
+    async def list_all(self) -> list[dict]:
+        users = sorted(
+            self.store.users.values(),
+            key=lambda u: (_nulls_last(u.get("role")), _nulls_last(u.get("full_name") or u.get("shop_name") or u.get("email"))),
+        )
+        return [_project(u, _ADMIN_USER_FIELDS) for u in users]
+
+    async def list_pending_providers(self) -> list[dict]:
+        pending = [
+            u for pid in self.store.provider_ids
+            if (u := self.store.users[pid]).get("provider_status") in (None, "pending")
+        ]
+        pending.sort(key=lambda u: _nulls_last(u.get("shop_name")))
+        return [_project(u, _PENDING_FIELDS) for u in pending]
+
+
+class MemoryProviderRepository:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _approved(self) -> list[dict]:
+        approved = [
+            u for pid in self.store.provider_ids
+            if (u := self.store.users[pid]).get("provider_status") == "approved"
+        ]
+        approved.sort(key=lambda u: _nulls_last(u.get("shop_name")))
+        return approved
+
+    async def list_approved(self) -> list[dict]:
+        return [_project(u, _PROVIDER_FIELDS) for u in self._approved()]
+
+    async def search(self, term: str, limit: int) -> list[dict]:
+        hits = self.store.provider_search.search(term, limit)
+        return [_project(self.store.users[pid], _PROVIDER_FIELDS) for pid, _ in hits]
+
+    async def nearby(self, lat: float, lon: float, radius_m: float, limit: int) -> list[dict]:
+        hits = self.store.provider_locations.within(lat, lon, radius_m)
+        hits.sort(key=lambda hit: (hit[1], _nulls_last(self.store.users[hit[0]].get("shop_name"))))
+        providers = []
+        for pid, distance in hits[:limit]:
+            user = self.store.users[pid]
+            latitude, longitude = user["location"]
+            providers.append({
+                **_project(user, _PROVIDER_FIELDS),
+                "latitude": latitude,
+                "longitude": longitude,
+                "distance_km": round(distance / 1000.0, 2),
+            })
+        return providers
+
+
+class MemoryCategoryRepository:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def create(self, provider_id: str, category: dict) -> dict | None:
+        if provider_id not in self.store.provider_ids:
+            return None
+        return dict(self.store.add_category({**category, "provider_id": provider_id}))
+
+    async def list_for_provider(self, provider_id: str) -> list[dict]:
+        ids = self.store.category_ids_by_provider.get(provider_id, ())
+        categories = sorted((self.store.categories[cid] for cid in ids), key=lambda c: _nulls_last(c.get("name")))
+        return [dict(c) for c in categories]
+
+    def _owned(self, category_id: str, provider_id: str) -> dict | None:
+        category = self.store.categories.get(category_id)
+        if category is None or category["provider_id"] != provider_id or provider_id not in self.store.users:
+            return None
+        return category
+
+    async def update(self, category_id: str, provider_id: str, updates: dict) -> dict | None:
+        category = self._owned(category_id, provider_id)
+        if category is None:
+            return None
+        category.update(updates)
+        return dict(category)
+
+    async def delete(self, category_id: str, provider_id: str) -> bool:
+        if self._owned(category_id, provider_id) is None:
+            return False
+        self.store.remove_category(category_id)
+        return True
+
+
+class MemoryBookingRepository:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def get(self, booking_id: str) -> dict | None:
+        booking = self.store.bookings.get(booking_id)
+        return self.store.booking_public(booking) if booking else None
+
+    async def create(self, params: dict) -> dict | None:
+        store = self.store
+        c = store.users.get(params["cid"])
+        if c is None or c.get("role") != UserRole.customer.value:
+            return None
+        p = store.users.get(params["pid"]) if params["pid"] in store.provider_ids else None
+        cat = store.categories.get(params["catid"])
+        if cat is not None and (p is None or cat["provider_id"] != p["id"]):
+            cat = None
+        w = params["w"]
+        if p is None:
+            error = "provider_not_found"
+        elif p.get("provider_status") != "approved":
+            error = "provider_not_approved"
+        elif not p.get("is_available", True):
+            error = "provider_closed"
+        elif cat is None:
+            error = "category_not_found"
+        elif cat["pricing_type"] != CategoryPricingType.per_kilo.value and cat["min_kilo"] is not None and w < cat["min_kilo"]:
+            error = "below_min_kilo"
+        else:
+            error = None
+        min_kilo = cat["min_kilo"] if cat is not None else None
+        if error is not None:
+            return {"error": error, "min_kilo": min_kilo, "booking": None}
+
+        total = booking_total(cat["pricing_type"], cat["price"], cat["max_kilo"], w)
+        booking = store.add_booking({
+            "id": params["id"],
+            "customer_id": c["id"],
+            "provider_id": p["id"],
+            "category_id": cat["id"],
+            "schedule_at": params["schedule_at"],
+            "status": BookingStatus.pending.value,
+            "notes": params["notes"],
+            "created_at": params["created_at"],
+            "weight_kg": w,
+            "total_price": total,
+        })
+        now = params["created_at"]
+        store.notify(
+            c["id"], "booking_created",
+            f"Your booking for {cat['name']} at {p.get('shop_name')} has been submitted. Waiting for provider confirmation.",
+            now, booking_id=booking["id"],
+        )
+        store.notify(
+            p["id"], "new_booking",
+            f"New booking received for {cat['name']} from {c.get('full_name')}. Total: ₱{total}",
+            now, booking_id=booking["id"],
+        )
+        return {"error": None, "min_kilo": min_kilo, "booking": store.booking_public(booking)}
+
+    async def list_page(self, role: str, user_id: str, *, limit: int, cursor: str | None, status: str | None,
+                        date_from, date_to) -> tuple[list[dict], str | None]:
+        store = self.store
+        if role == UserRole.customer:
+            timeline = store.bookings_by_customer.get(user_id)
+        elif role == UserRole.provider:
+            timeline = store.bookings_by_provider.get(user_id)
+        else:
+            timeline = store.all_bookings
+        if timeline is None:
+            return [], None
+        rows = timeline.newest_first(
+            before=decode_cursor(cursor) if cursor else None,
+            date_from=to_ph_iso(date_from) if date_from is not None else None,
+            date_to=to_ph_iso(date_to) if date_to is not None else None,
+        )
+        items: list[dict] = []
+        last = None
+        for booking_id in rows:
+            booking = store.bookings[booking_id]
+            if status is not None and booking["status"] != status:
+                continue
+            public = store.booking_public(booking)
+            if public is None:
+                continue
+            if len(items) == limit:
+                return items, encode_cursor(last["created_at"], last["id"])
+            items.append(public)
+            last = booking
+        return items, None
+
+    async def export(self, role: str, user_id: str, *, status: str | None, date_from, date_to):
+        store = self.store
+        if role == UserRole.customer:
+            timeline = store.bookings_by_customer.get(user_id)
+        elif role == UserRole.provider:
+            timeline = store.bookings_by_provider.get(user_id)
+        else:
+            timeline = store.all_bookings
+        if timeline is None:
+            return
+        rows = timeline.oldest_first(
+            date_from=to_ph_iso(date_from) if date_from is not None else None,
+            date_to=to_ph_iso(date_to) if date_to is not None else None,
+        )
+        for booking_id in rows:
+            booking = store.bookings[booking_id]
+            if status is not None and booking["status"] != status:
+                continue
+            public = store.booking_public(booking)
+            if public is not None:
+                yield public
+
+    async def transition(self, t: Transition, params: dict) -> tuple[bool, dict] | None:
+        store = self.store
+        b = store.bookings.get(params["id"])
+        if b is None or b["provider_id"] != params["pid"] or params["pid"] not in store.users:
+            return None
+        allowed = b["status"] in t.sources
+        if allowed:
+            store.sales_rollups.move_booking(b, b["status"], t.target)
+            b["status"] = t.target
+            if t.order_status:
+                for order_id in store.order_ids_by_booking.get(b["id"], ()):
+                    store.orders[order_id]["status"] = t.order_status
+            self._transition_effects(t, b, params)
+        return allowed, store.booking_public(b)
+
+    def _transition_effects(self, t: Transition, b: dict, params: dict):
+        # Python mirror of each Transition.effects Cypher block
+        store = self.store
+        c = store.users[b["customer_id"]]
+        p = store.users[b["provider_id"]]
+        cat = store.categories[b["category_id"]]
+        now = params["now"]
+        if t.name == "accept":
+            store.add_order({"id": params["oid"], "booking_id": b["id"], "status": "confirmed", "created_at": now})
+            store.add_receipt({
+                "id": params["rid"],
+                "subtotal": b["total_price"],
+                "delivery_fee": 0.0,
+                "total": b["total_price"],
+                "created_at": now,
+                **snapshot(params["oid"], c, p, [
+                    {"service_id": cat["id"], "service_name": cat["name"], "weight_kg": b["weight_kg"]},
+                ]),
+            })
+            store.notify(
+                c["id"], "booking_accepted",
+                f"Your booking for {cat['name']} has been accepted by {p.get('shop_name')}. Receipt generated. "
+                f"Please pay ₱{b['total_price']} in cash when you deliver your laundry.",
+                now, booking_id=b["id"], receipt_id=params["rid"],
+            )
+            store.notify(
+                p["id"], "receipt_generated",
+                f"Receipt generated for {cat['name']} booking from {c.get('full_name')}. Amount: ₱{b['total_price']}. "
+                "Waiting for customer payment and delivery.",
+                now, booking_id=b["id"], receipt_id=params["rid"],
+            )
+        elif t.name == "reject":
+            store.notify(
+                c["id"], "booking_rejected",
+                f"Your booking for {cat['name']} has been rejected by {p.get('shop_name')}.",
+                now, booking_id=b["id"],
+            )
+        elif t.name == "confirm_payment":
+            store.notify(
+                c["id"], "payment_confirmed",
+                f"Payment confirmed! Your laundry for {cat['name']} is now being processed.",
+                now, booking_id=b["id"],
+            )
+        else:
+            store.notify(c["id"], "status_update", f"{params['message']} - {cat['name']}", now, booking_id=b["id"])
+
+    async def update_details(self, booking_id: str, provider_id: str, payload: BookingUpdateDetails) -> dict:
+        store = self.store
+        b = store.bookings.get(booking_id)
+        cat = store.categories.get(b["category_id"]) if b else None
+        if b is None or cat is None or b["provider_id"] != provider_id:
+            raise HTTPException(status_code=404, detail="Booking not found or not for this provider")
+        updates, message = plan_details_update(
+            {
+                "status": b["status"],
+                "old_weight": b["weight_kg"],
+                "old_total": b["total_price"],
+                "pricing_type": cat["pricing_type"],
+                "price": cat["price"],
+                "min_kilo": cat["min_kilo"],
+                "max_kilo": cat["max_kilo"],
+            },
+            payload,
+        )
+        b.update(updates)
+        store.notify(b["customer_id"], "booking_updated", message, datetime.now(PH_TZ).isoformat(), booking_id=booking_id)
+        if "total_price" in updates:
+            # Keep any receipt (confirmed+ bookings) in step with the weighed-in total and weight
+            for order_id in store.order_ids_by_booking.get(booking_id, ()):
+                receipt = store.receipts.get(store.receipt_id_by_order.get(order_id))
+                if receipt is not None:
+                    store.sales_rollups.adjust_receipt(
+                        receipt,
+                        updates["total_price"] - receipt["total"],
+                        float(b["weight_kg"]) - sum(receipt["item_weights_kg"]),
+                    )
+                    receipt["subtotal"] = receipt["total"] = updates["total_price"]
+                    receipt["item_weights_kg"] = [float(b["weight_kg"])]
+        return store.booking_public(b)
+
+
+class MemoryNotificationRepository:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def list_page(self, user_id: str, *, limit: int, cursor: str | None) -> tuple[list[dict], str | None]:
+        timeline = self.store.notifications_by_user.get(user_id)
+        if timeline is None:
+            return [], None
+        items: list[dict] = []
+        for notification_id in timeline.newest_first(before=decode_cursor(cursor) if cursor else None):
+            if len(items) == limit:
+                last = items[-1]
+                return items, encode_cursor(last["created_at"], last["id"])
+            items.append(_project(self.store.notifications[notification_id], _NOTIFICATION_FIELDS))
+        return items, None
+
+    async def unread_count(self, user_id: str) -> int:
+        user = self.store.users.get(user_id)
+        return user.get("unread_notifications", 0) if user else 0
+
+    async def mark_read(self, notification_id: str, user_id: str) -> dict | None:
+        notification = self.store.notifications.get(notification_id)
+        user = self.store.users.get(user_id)
+        if notification is None or notification["user_id"] != user_id or user is None:
+            return None
+        if not notification.get("read"):
+            notification["read"] = True
+            user["unread_notifications"] = max(user.get("unread_notifications", 0) - 1, 0)
+        return _project(notification, _MARK_READ_FIELDS)
+
+    async def mark_all_read(self, user_id: str) -> int:
+        user = self.store.users.get(user_id)
+        if user is None:
+            return 0
+        marked = 0
+        timeline = self.store.notifications_by_user.get(user_id)
+        for notification_id in timeline.newest_first() if timeline is not None else ():
+            notification = self.store.notifications[notification_id]
+            if not notification.get("read"):
+                notification["read"] = True
+                marked += 1
+        user["unread_notifications"] = 0
+        return marked
+
+
+class MemoryReceiptRepository:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def list_page(self, role: str, user_id: str, *, limit: int, cursor: str | None,
+                        date_from, date_to) -> tuple[list[dict], str | None]:
+        store = self.store
+        index = store.receipts_by_customer if role == UserRole.customer else store.receipts_by_provider
+        timeline = index.get(user_id)
+        if timeline is None:
+            return [], None
+        rows = timeline.newest_first(
+            before=decode_cursor(cursor) if cursor else None,
+            date_from=to_ph_iso(date_from) if date_from is not None else None,
+            date_to=to_ph_iso(date_to) if date_to is not None else None,
+        )
+        items: list[dict] = []
+        last = None
+        for rid in rows:
+            receipt = store.receipts[rid]
+            if len(items) == limit:
+                return items, encode_cursor(last["created_at"], last["id"])
+            # Each receipt carries its own snapshot; nothing else to look up
+            items.append(receipt_public(receipt))
+            last = receipt
+        return items, None
+
+    async def export(self, role: str, user_id: str, *, status: str | None, date_from, date_to):
+        store = self.store
+        index = store.receipts_by_customer if role == UserRole.customer else store.receipts_by_provider
+        timeline = index.get(user_id)
+        if timeline is None:
+            return
+        rows = timeline.oldest_first(
+            date_from=to_ph_iso(date_from) if date_from is not None else None,
+            date_to=to_ph_iso(date_to) if date_to is not None else None,
+        )
+        for rid in rows:
+            receipt = store.receipts[rid]
+            if status is not None and store.orders.get(receipt["order_id"], {}).get("status") != status:
+                continue
+            yield receipt_public(receipt)
+
+
+class MemoryReviewRepository:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _refresh_provider_rating(self, provider_id: str):
+        provider = self.store.users.get(provider_id)
+        if provider is None:
+            return
+        ratings = [self.store.reviews[rid]["rating"] for rid in self.store.reviews_by_provider[provider_id].newest_first()]
+        provider["review_count"] = len(ratings)
+        # round() in Cypher is half-up, unlike Python's
+        provider["avg_rating"] = math.floor(10 * sum(ratings) / len(ratings) + 0.5) / 10.0 if ratings else 0.0
+
+    async def create(self, params: dict) -> dict:
+        store = self.store
+        b = store.bookings.get(params["bid"])
+        c = store.users.get(params["cid"])
+        if b is None or c is None or b["customer_id"] != c["id"] or b["provider_id"] != params["pid"] or params["pid"] not in store.users:
+            raise HTTPException(status_code=404, detail="Booking not found or not authorized")
+        if b["status"] != BookingStatus.completed.value:
+            raise HTTPException(status_code=400, detail="Can only review completed bookings")
+        if b["id"] in store.review_id_by_booking:
+            raise HTTPException(status_code=400, detail="Review already exists for this booking")
+        review = store.add_review({
+            "id": params["rid"],
+            "customer_id": c["id"],
+            "provider_id": params["pid"],
+            "booking_id": b["id"],
+            "rating": params["rating"],
+            "comment": params["comment"],
+            "created_at": params["now"],
+        })
+        store.notify(params["pid"], "new_review", f"{c.get('full_name')} left a {params['rating']}-star review for your shop.", params["now"])
+        self._refresh_provider_rating(params["pid"])
+        return store.review_public(review)
+
+    async def update(self, review_id: str, customer_id: str, updates: dict) -> dict:
+        review = self.store.reviews.get(review_id)
+        if review is None or review["customer_id"] != customer_id or customer_id not in self.store.users:
+            raise HTTPException(status_code=404, detail="Review not found or not authorized")
+        if updates:
+            review.update(updates)
+            self._refresh_provider_rating(review["provider_id"])
+        data = self.store.review_public(review)
+        if not data:
+            raise HTTPException(status_code=404, detail="Review not found")
+        return data
+
+    async def get(self, review_id: str) -> dict | None:
+        review = self.store.reviews.get(review_id)
+        return self.store.review_public(review) if review else None
+
+    async def list_for_provider(self, provider_id: str) -> list[dict]:
+        timeline = self.store.reviews_by_provider.get(provider_id)
+        if timeline is None:
+            return []
+        reviews = (self.store.review_public(self.store.reviews[rid]) for rid in timeline.newest_first())
+        return [r for r in reviews if r is not None]
+
+    async def provider_stats(self, provider_id: str) -> dict | None:
+        timeline = self.store.reviews_by_provider.get(provider_id)
+        ratings = [self.store.reviews[rid]["rating"] for rid in timeline.newest_first()] if timeline else []
+        return {
+            "total_reviews": len(ratings),
+            "average_rating": sum(ratings) / len(ratings) if ratings else None,
+            "five_star": ratings.count(5),
+            "four_star": ratings.count(4),
+            "three_star": ratings.count(3),
+            "two_star": ratings.count(2),
+            "one_star": ratings.count(1),
+        }
+
+    async def id_for_booking(self, booking_id: str) -> str | None:
+        return self.store.review_id_by_booking.get(booking_id)
+
+
+class MemoryOutboxRepository:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _due(self, kind: str, now: int, limit: int) -> list[dict]:
+        due = [
+            e for e in self.store.outbox.values()
+            if e["kind"] == kind and e.get("available_at") is not None and e["available_at"] <= now
+        ]
+        due.sort(key=lambda e: e["available_at"])
+        return due[:limit]
+
+    async def enqueue(self, entry: dict) -> None:
+        self.store.enqueue(entry)
+
+    async def has_due(self, now: int) -> bool:
+        return any(e.get("available_at") is not None and e["available_at"] <= now for e in self.store.outbox.values())
+
+    async def acquire_lease(self, holder: str, now: int, until: int) -> bool:
+        lease = self.store.outbox_lease
+        if lease.get("holder") not in (None, holder) and lease["until"] > now:
+            return False
+        lease.update(holder=holder, until=until)
+        return True
+
+    async def deliver_notifications(self, now: int, limit: int) -> list[dict]:
+        store = self.store
+        delivered = []
+        for entry in self._due("notification", now, limit):
+            del store.outbox[entry["id"]]
+            if entry["user_id"] not in store.users:
+                continue
+            store.add_notification({
+                "id": str(uuid.uuid4()),
+                "user_id": entry["user_id"],
+                "type": entry["type"],
+                "message": entry["message"],
+                "created_at": entry["created_at"],
+                "read": False,
+                "booking_id": entry.get("booking_id"),
+                "receipt_id": entry.get("receipt_id"),
+            })
+            delivered.append({"user_id": entry["user_id"], "type": entry["type"], "booking_id": entry.get("booking_id")})
+        return delivered
+
+    async def claim_emails(self, now: int, limit: int, until: int) -> list[dict]:
+        claimed = []
+        for entry in self._due("email", now, limit):
+            entry["available_at"] = until
+            entry["attempts"] = entry.get("attempts", 0) + 1
+            claimed.append(_project(entry, ("id", "to", "template", "payload", "attempts")))
+        return claimed
+
+    async def complete(self, ids: list[str]) -> None:
+        for entry_id in ids:
+            self.store.outbox.pop(entry_id, None)
+
+    async def fail(self, failures: list[dict]) -> None:
+        for row in failures:
+            entry = self.store.outbox.get(row["id"])
+            if entry is None:
+                continue
+            entry["available_at"] = row["available_at"]
+            entry["last_error"] = row["error"]
+            if row["available_at"] is None:
+                entry["status"] = "dead"
+
+    async def stats(self) -> list[dict]:
+        counts: defaultdict[tuple[str, str], int] = defaultdict(int)
+        for entry in self.store.outbox.values():
+            counts[(entry["kind"], entry.get("status", "pending"))] += 1
+        return [{"kind": kind, "status": status, "count": n} for (kind, status), n in sorted(counts.items())]
+
+    async def list_dead(self, limit: int) -> list[dict]:
+        dead = [e for e in self.store.outbox.values() if e.get("status") == "dead"]
+        dead.sort(key=lambda e: _nulls_last(e.get("created_at")), reverse=True)
+        fields = ("id", "kind", "to", "template", "user_id", "type", "attempts", "last_error", "created_at")
+        return [_project(e, fields) for e in dead[:limit]]
+
+    async def requeue(self, entry_id: str, now: int) -> bool:
+        entry = self.store.outbox.get(entry_id)
+        if entry is None or entry.get("status") != "dead":
+            return False
+        entry.pop("status")
+        entry.update(available_at=now, attempts=0)
+        return True
+
+
+class MemoryReportRepository:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def sales_rollups(self, provider_id: str, day_from: str, day_to: str) -> list[dict]:
+        return self.store.sales_rollups.range(provider_id, day_from, day_to)
+
+
+class MemoryRepositories:
+    """Every repository over one MemoryStore."""
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+        self.users = MemoryUserRepository(store)
+        self.providers = MemoryProviderRepository(store)
+        self.categories = MemoryCategoryRepository(store)
+        self.bookings = MemoryBookingRepository(store)
+        self.notifications = MemoryNotificationRepository(store)
+        self.receipts = MemoryReceiptRepository(store)
+        self.reviews = MemoryReviewRepository(store)
+        self.outbox = MemoryOutboxRepository(store)
+        self.reports = MemoryReportRepository(store)
+
+    async def stats(self) -> dict:
+        return {
+            "users": len(self.store.users),
+            "providers": len(self.store.provider_ids),
+            "bookings": len(self.store.bookings),
+        }
+
+
+memory_store = MemoryStore()
+memory_repositories = MemoryRepositories(memory_store)
@@ -0,0 +1,274 @@
+"""Per-provider daily sales rollups behind GET /reports/provider/sales.
+
+One `(:SalesRollup {provider_id, day})` node per provider per Philippine-time
+day ('YYYY-MM-DD', the date part of the stored created_at strings) holds
+
+- bookings_<status>: bookings created that day, by their current status;
+- receipts, revenue, kg: receipts issued that day, their total in pesos and
+  the kilograms on their line items.
+
+The writes that change these move the counters in the same transaction, the
+way unread_counter does: creating a booking counts it as pending, every
+booking transition moves it from its previous status to the new one, a new
+receipt (booking accepted, or an order's receipt generated) adds its total
+and weight, and a weigh-in (update_details) adds the difference. The
+fragments write-lock the rollup before reading it so concurrent writers
+serialize. The report reads rollups alone; average ticket is revenue over
+receipts.
+
+`python rollups.py` recomputes every provider's rollups from their bookings
+and receipts, in parallel batches of providers; schema migration 8 does the
+same once for data written before rollups existed.
+"""
+import argparse
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from db import close_driver, execute_write, get_session, read
+from models import BookingStatus
+
+LABEL = "SalesRollup"
+STATUSES = tuple(s.value for s in BookingStatus)
+COUNTERS = tuple(f"bookings_{s}" for s in STATUSES) + ("receipts", "revenue", "kg")
+# Returned by reads: `RETURN sr {PROJECTION} AS sr`
+PROJECTION = "{.day, " + ", ".join(f".{c}" for c in COUNTERS) + "}"
+
+
+def _day(created_at: str) -> str:
+    return f"substring({created_at}, 0, 10)"
+
+
+def _merge(alias: str, day: str) -> str:
+    return (
+        f"  MERGE ({alias}:{LABEL} {{provider_id: p.id, day: {day}}})\n"
+        f"  SET {alias}._lock = true REMOVE {alias}._lock\n"
+    )
+
+
+def move_booking(previous: str, status: str, alias: str = "booking_day") -> str:
+    """Move `b` (at provider `p`) from status `previous` to `status` on the rollup of its
+    creation day. Both are Cypher expressions; previous 'null' counts a new booking.
+    Only MERGE/SET, so valid inside FOREACH."""
+    sets = ",\n      ".join(
+        f"{alias}.bookings_{s} = coalesce({alias}.bookings_{s}, 0)"
+        f" + CASE WHEN {status} = '{s}' THEN 1 ELSE 0 END - CASE WHEN {previous} = '{s}' THEN 1 ELSE 0 END"
+        for s in STATUSES
+    )
+    return _merge(alias, _day("b.created_at")) + f"  SET {sets}\n"
+
+
+def add_receipt(alias: str = "receipt_day") -> str:
+    """Count receipt `r` (of provider `p`) on the rollup of its day."""
+    return _merge(alias, _day("r.created_at")) + (
+        f"  SET {alias}.receipts = coalesce({alias}.receipts, 0) + 1,\n"
+        f"      {alias}.revenue = coalesce({alias}.revenue, 0.0) + r.total,\n"
+        f"      {alias}.kg = coalesce({alias}.kg, 0.0) + reduce(kg = 0.0, w IN coalesce(r.item_weights_kg, []) | kg + w)\n"
+    )
+
+
+def adjust_receipt(revenue_delta: str, kg_delta: str, alias: str = "receipt_day") -> str:
+    """Add the deltas (Cypher expressions) to the rollup of receipt `r`'s day."""
+    return _merge(alias, _day("r.created_at")) + (
+        f"  SET {alias}.revenue = coalesce({alias}.revenue, 0.0) + {revenue_delta},\n"
+        f"      {alias}.kg = coalesce({alias}.kg, 0.0) + {kg_delta}\n"
+    )
+
+
+# Recomputes one provider's rollups from scratch; expects `p` bound.
+# Used by the schema backfill and `python rollups.py`.
+REBUILD_FOR_PROVIDER = f"""
+CALL {{
+  WITH p
+  MATCH (old:{LABEL} {{provider_id: p.id}})
+  DELETE old
+}}
+CALL {{
+  WITH p
+  MATCH (b:Booking)-[:FOR_PROVIDER]->(p)
+  WITH p, {_day("b.created_at")} AS day, {", ".join(
+      f"sum(CASE WHEN b.status = '{s}' THEN 1 ELSE 0 END) AS {s}" for s in STATUSES
+  )}
+  MERGE (sr:{LABEL} {{provider_id: p.id, day: day}})
+  SET {", ".join(f"sr.bookings_{s} = {s}" for s in STATUSES)}
+}}
+CALL {{
+  WITH p
+  MATCH (r:Receipt)-[:FOR_PROVIDER]->(p)
+  WITH p, {_day("r.created_at")} AS day, count(r) AS receipts, sum(r.total) AS revenue,
+       sum(reduce(kg = 0.0, w IN coalesce(r.item_weights_kg, []) | kg + w)) AS kg
+  MERGE (sr:{LABEL} {{provider_id: p.id, day: day}})
+  SET sr.receipts = receipts, sr.revenue = toFloat(revenue), sr.kg = kg
+}}
+"""
+
+
+# Longest report, in periods of each granularity; empty periods are buckets too
+MAX_PERIODS = {"day": 366, "week": 104, "month": 120}
+
+
+def period_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        # ISO weeks, Monday first
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def period_count(date_from: date, date_to: date, granularity: str) -> int:
+    """Periods (buckets) a report from date_from to date_to has; date_from <= date_to."""
+    if granularity == "month":
+        return (date_to.year - date_from.year) * 12 + date_to.month - date_from.month + 1
+    days = period_start(date_to, granularity).toordinal() - period_start(date_from, granularity).toordinal()
+    return days // 7 + 1 if granularity == "week" else days + 1
+
+
+def _empty_bucket(start: date) -> dict:
+    return {
+        "period_start": start,
+        "bookings": {s: 0 for s in STATUSES},
+        "receipts": 0,
+        "revenue": 0.0,
+        "kg": 0.0,
+        "avg_ticket": 0.0,
+    }
+
+
+def _add(bucket: dict, row: dict):
+    for s in STATUSES:
+        bucket["bookings"][s] += int(row.get(f"bookings_{s}") or 0)
+    bucket["receipts"] += int(row.get("receipts") or 0)
+    bucket["revenue"] += float(row.get("revenue") or 0.0)
+    bucket["kg"] += float(row.get("kg") or 0.0)
+
+
+def _finish(bucket: dict) -> dict:
+    bucket["revenue"] = round(bucket["revenue"], 2)
+    bucket["kg"] = round(bucket["kg"], 3)
+    bucket["avg_ticket"] = round(bucket["revenue"] / bucket["receipts"], 2) if bucket["receipts"] else 0.0
+    return bucket
+
+
+def sales_report(rows: list[dict], date_from: date, date_to: date, granularity: str) -> dict:
+    """Buckets (every period in range, empty ones included) and totals from daily rollup rows."""
+    buckets: dict[date, dict] = {}
+    start = period_start(date_from, granularity)
+    last = period_start(date_to, granularity)
+    while True:
+        buckets[start] = _empty_bucket(start)
+        # Stop on the last period rather than past date_to, which may be date.max
+        if start == last:
+            break
+        start = _next_period(start, granularity)
+    totals = _empty_bucket(date_from)
+    for row in rows:
+        bucket = buckets.get(period_start(date.fromisoformat(row["day"]), granularity))
+        if bucket is not None:
+            _add(bucket, row)
+            _add(totals, row)
+    return {
+        "buckets": [_finish(b) for b in buckets.values()],
+        "totals": _finish(totals),
+    }
+
+
+class RollupTable:
+    """The same counters for the memory backend: provider id -> day -> row."""
+
+    def __init__(self):
+        self._days: defaultdict[str, dict[str, dict]] = defaultdict(dict)
+
+    def _row(self, provider_id: str, created_at: str) -> dict:
+        day = created_at[:10]
+        days = self._days[provider_id]
+        row = days.get(day)
+        if row is None:
+            row = days[day] = {"day": day, **{c: 0 for c in COUNTERS}}
+        return row
+
+    def move_booking(self, booking: dict, previous: str | None, status: str):
+        row = self._row(booking["provider_id"], booking["created_at"])
+        if previous is not None:
+            row[f"bookings_{previous}"] -= 1
+        row[f"bookings_{status}"] += 1
+
+    def add_receipt(self, receipt: dict):
+        row = self._row(receipt["provider_id"], receipt["created_at"])
+        row["receipts"] += 1
+        row["revenue"] += float(receipt["total"])
+        row["kg"] += sum(receipt.get("item_weights_kg") or ())
+
+    def adjust_receipt(self, receipt: dict, revenue_delta: float, kg_delta: float):
+        row = self._row(receipt["provider_id"], receipt["created_at"])
+        row["revenue"] += revenue_delta
+        row["kg"] += kg_delta
+
+    def range(self, provider_id: str, day_from: str, day_to: str) -> list[dict]:
+        days = self._days.get(provider_id, {})
+        return [dict(days[day]) for day in sorted(days) if day_from <= day <= day_to]
+
+
+def _rebuild_batch_tx(tx, provider_ids: list[str]) -> int:
+    rec = tx.run(
+        "UNWIND $ids AS pid MATCH (p:User {id: pid, role: 'provider'})" + REBUILD_FOR_PROVIDER + "RETURN count(p) AS n",
+        ids=provider_ids,
+    ).single()
+    return rec["n"]
+
+
+def _rebuild_batch(provider_ids: list[str]) -> int:
+    with get_session() as session:
+        return execute_write(session, "rollups.rebuild", _rebuild_batch_tx, provider_ids, timeout=0)
+
+
+def rebuild(workers: int = 4, batch_size: int = 50, provider_id: str | None = None) -> int:
+    """Recompute rollups for every provider (or one); returns providers rebuilt.
+
+    Each batch of providers is one transaction, so a provider's rollups are
+    replaced atomically; bookings written while a batch runs may need another
+    rebuild of that provider to be counted exactly once.
+    """
+    with get_session() as session:
+        rows = read(
+            session,
+            "rollups.providers",
+            "MATCH (p:User {role: 'provider'}) WHERE $id IS NULL OR p.id = $id RETURN p.id AS id ORDER BY p.id",
+            id=provider_id,
+        )
+    ids = [row["id"] for row in rows]
+    batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+    started = time.perf_counter()
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rollups") as pool:
+        for n, future in enumerate(as_completed(pool.submit(_rebuild_batch, batch) for batch in batches), 1):
+            done += future.result()
+            if n % max(1, workers * 4) == 0:
+                print(f"rebuilt {done}/{len(ids)} providers, {done / (time.perf_counter() - started):,.0f}/s")
+    print(f"Rebuilt sales rollups for {done} providers in {time.perf_counter() - started:,.1f}s")
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute provider sales rollups from bookings and receipts")
+    parser.add_argument("--workers", type=int, default=4, help="parallel writer threads")
+    parser.add_argument("--batch-size", type=int, default=50, help="providers per transaction")
+    parser.add_argument("--provider", default=None, help="rebuild only this provider id")
+    args = parser.parse_args()
+    try:
+        rebuild(args.workers, args.batch_size, args.provider)
+    finally:
+        close_driver()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,96 +1,102 @@
 from fastapi import APIRouter, Depends, HTTPException
 from models import UserPublic, UserRole, ProviderStatus
 from auth import get_current_user
-from db import get_session
+from repositories import Repositories, get_repos
+from booking_states import transition_metrics
+from user_cache import user_cache
+from password_hashing import executor_stats
+from query_stats import route_stats
+from outbox import now_ms
+import places
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
-def require_admin(current: UserPublic = Depends(get_current_user)) -> UserPublic:
+async def require_admin(current: UserPublic = Depends(get_current_user)) -> UserPublic:
     if current.role != UserRole.admin:
         raise HTTPException(status_code=403, detail="Admin only")
     return current
 
 @router.post("/providers/{provider_id}/approve")
-def approve_provider(provider_id: str, _: UserPublic = Depends(require_admin)):
-    with get_session() as session:
-        res = session.run(
-            "MATCH (u:User {id: $id, role: 'provider'}) SET u.provider_status = 'approved' RETURN u.id AS id",
-            id=provider_id,
-        ).single()
-        if not res:
-            raise HTTPException(status_code=404, detail="Provider not found")
+async def approve_provider(provider_id: str, _: UserPublic = Depends(require_admin), repos: Repositories = Depends(get_repos)):
+    if not await repos.users.set_provider_status(provider_id, ProviderStatus.approved.value):
+        raise HTTPException(status_code=404, detail="Provider not found")
+    user_cache.invalidate(provider_id)
     return {"detail": "approved", "id": provider_id}
 
 @router.post("/providers/{provider_id}/reject")
-def reject_provider(provider_id: str, _: UserPublic = Depends(require_admin)):
-    with get_session() as session:
-        res = session.run(
-            "MATCH (u:User {id: $id, role: 'provider'}) SET u.provider_status = 'rejected' RETURN u.id AS id",
-            id=provider_id,
-        ).single()
-        if not res:
-            raise HTTPException(status_code=404, detail="Provider not found")
+async def reject_provider(provider_id: str, _: UserPublic = Depends(require_admin), repos: Repositories = Depends(get_repos)):
+    if not await repos.users.set_provider_status(provider_id, ProviderStatus.rejected.value):
+        raise HTTPException(status_code=404, detail="Provider not found")
+    user_cache.invalidate(provider_id)
     return {"detail": "rejected", "id": provider_id}
 
 @router.get("/providers/pending")
-def list_pending_providers(_: UserPublic = Depends(require_admin)):
-    with get_session() as session:
-        result = session.run(
-            """
-            MATCH (u:User {role: 'provider'})
-            WHERE coalesce(u.provider_status,'pending') = 'pending'
-            RETURN u { .id, .email, .contact_number, .shop_name, .shop_address, .provider_status } AS u
-            ORDER BY u.shop_name
-            """
-        )
-        return [r["u"] for r in result]
+async def list_pending_providers(_: UserPublic = Depends(require_admin), repos: Repositories = Depends(get_repos)):
+    return await repos.users.list_pending_providers()
 
 @router.post("/users/{user_id}/ban")
-def ban_user(user_id: str, _: UserPublic = Depends(require_admin)):
-    with get_session() as session:
-        res = session.run(
-            "MATCH (u:User {id: $id}) SET u.banned = true RETURN u.id AS id",
-            id=user_id,
-        ).single()
-        if not res:
-            raise HTTPException(status_code=404, detail="User not found")
+async def ban_user(user_id: str, _: UserPublic = Depends(require_admin), repos: Repositories = Depends(get_repos)):
+    if not await repos.users.set_banned(user_id, True):
+        raise HTTPException(status_code=404, detail="User not found")
+    user_cache.invalidate(user_id)
     return {"detail": "banned", "id": user_id}
 
 @router.post("/users/{user_id}/unban")
-def unban_user(user_id: str, _: UserPublic = Depends(require_admin)):
-    with get_session() as session:
-        res = session.run(
-            "MATCH (u:User {id: $id}) SET u.banned = false RETURN u.id AS id",
-            id=user_id,
-        ).single()
-        if not res:
-            raise HTTPException(status_code=404, detail="User not found")
+async def unban_user(user_id: str, _: UserPublic = Depends(require_admin), repos: Repositories = Depends(get_repos)):
+    if not await repos.users.set_banned(user_id, False):
+        raise HTTPException(status_code=404, detail="User not found")
+    user_cache.invalidate(user_id)
     return {"detail": "unbanned", "id": user_id}
 
 @router.delete("/users/{user_id}")
-def delete_user(user_id: str, _: UserPublic = Depends(require_admin)):
-    with get_session() as session:
-        # Also delete their orders/bookings/services relationships
-        session.run("MATCH (u:User {id: $id}) DETACH DELETE u", id=user_id)
+async def delete_user(user_id: str, _: UserPublic = Depends(require_admin), repos: Repositories = Depends(get_repos)):
+    # Also delete their orders/bookings/services relationships
+    await repos.users.delete(user_id)
+    user_cache.invalidate(user_id)
     return {"detail": "deleted", "id": user_id}
 
 @router.get("/users")
-def list_users(_: UserPublic = Depends(require_admin)):
-    with get_session() as session:
-        result = session.run(
-            """
-            MATCH (u:User)
-            RETURN u { .id, .email, .contact_number, .role, .full_name, .address, .shop_name, .shop_address, .provider_status, .banned } AS u
-            ORDER BY u.role, coalesce(u.full_name,u.shop_name,u.email)
-            """
-        )
-        return [r["u"] for r in result]
+async def list_users(_: UserPublic = Depends(require_admin), repos: Repositories = Depends(get_repos)):
+    return await repos.users.list_all()
 
 @router.get("/stats")
-def stats(_: UserPublic = Depends(require_admin)):
-    with get_session() as session:
-        users = session.run("MATCH (u:User) RETURN count(u) AS c").single()["c"]
-        providers = session.run("MATCH (u:User {role: 'provider'}) RETURN count(u) AS c").single()["c"]
-        bookings = session.run("MATCH (b:Booking) RETURN count(b) AS c").single()["c"]
-    return {"total_users": users, "total_providers": providers, "total_bookings": bookings}
+async def stats(_: UserPublic = Depends(require_admin), repos: Repositories = Depends(get_repos)):
+    counts = await repos.stats()
+    return {"total_users": counts["users"], "total_providers": counts["providers"], "total_bookings": counts["bookings"]}
+
+@router.get("/metrics/booking-transitions")
+async def booking_transition_metrics(_: UserPublic = Depends(require_admin)):
+    """Per-transition call counts, outcomes and latency since process start"""
+    return transition_metrics()
+
+@router.get("/metrics/user-cache")
+async def user_cache_metrics(_: UserPublic = Depends(require_admin)):
+    """Hit/miss counters and occupancy of the authenticated-user cache"""
+    return user_cache.stats()
+
+@router.get("/metrics/db-requests")
+async def db_request_metrics(_: UserPublic = Depends(require_admin)):
+    """Neo4j queries, transactions, retries and DB time per request, by route"""
+    return route_stats()
+
+@router.get("/metrics/password-hashing")
+async def password_hashing_metrics(_: UserPublic = Depends(require_admin)):
+    """Queue depth and throughput of the dedicated password hashing pool"""
+    return executor_stats()
+
+@router.get("/metrics/places")
+async def places_metrics(_: UserPublic = Depends(require_admin)):
+    """Address lookup cache hit ratio, coalesced lookups and rate-limit sheds"""
+    return places.stats()
+
+@router.get("/outbox")
+async def outbox_status(_: UserPublic = Depends(require_admin), repos: Repositories = Depends(get_repos)):
+    """Queued and dead-lettered outbox entries by kind, plus the latest dead letters"""
+    return {"counts": await repos.outbox.stats(), "dead": await repos.outbox.list_dead(50)}
+
+@router.post("/outbox/{entry_id}/retry")
+async def retry_outbox_entry(entry_id: str, _: UserPublic = Depends(require_admin), repos: Repositories = Depends(get_repos)):
+    if not await repos.outbox.requeue(entry_id, now_ms()):
+        raise HTTPException(status_code=404, detail="Dead-lettered entry not found")
+    return {"detail": "requeued", "id": entry_id}
@@ -0,0 +1,33 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from auth import user_from_token
+from repositories import open_repositories
+import events
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# EventSource cannot send headers, so the token may also come as ?token=
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
+
+
+@router.get("/stream")
+async def stream_events(token: Optional[str] = Query(None), bearer: Optional[str] = Depends(optional_oauth2_scheme)):
+    """Server-sent events for the caller's bookings and notifications.
+
+    Sends `booking`, `notification` and `resync` events (JSON data) and a
+    comment line every EVENTS_HEARTBEAT_SECONDS while idle.
+    """
+    credential = bearer or token
+    if not credential:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    # Authenticate on a short-lived session rather than get_current_user's
+    # request session, which would stay open for the life of the stream
+    async with open_repositories() as repos:
+        user = await user_from_token(credential, repos)
+    return StreamingResponse(
+        events.stream(user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,66 @@
+from datetime import date, datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
+from fastapi import APIRouter, Depends, HTTPException, Query
+from models import SalesGranularity, SalesReport, UserPublic, UserRole
+from auth import get_current_user
+from repositories import Repositories, get_repos
+import rollups
+
+# Philippine timezone
+PH_TZ = ZoneInfo('Asia/Manila')
+
+# Range reported when ?from= is not given
+DEFAULT_DAYS = 30
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+
+@router.get("/provider/sales", response_model=SalesReport)
+async def provider_sales(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    granularity: SalesGranularity = SalesGranularity.day,
+    provider_id: Optional[str] = None,
+    current_user: UserPublic = Depends(get_current_user),
+    repos: Repositories = Depends(get_repos),
+):
+    """Bookings, receipts, revenue, kilograms and average ticket per day, week or month.
+
+    Providers see their own shop; admins pass ?provider_id=. Dates are
+    Philippine-time days, both ends inclusive; the default is the last 30 days.
+    Ranges longer than rollups.MAX_PERIODS periods are refused with 400.
+    """
+    if current_user.role == UserRole.provider:
+        if provider_id is not None and provider_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Providers can only see their own sales")
+        provider_id = current_user.id
+    elif current_user.role == UserRole.admin:
+        if provider_id is None:
+            raise HTTPException(status_code=400, detail="provider_id is required")
+    else:
+        raise HTTPException(status_code=403, detail="Only providers and admins can see sales reports")
+
+    if date_to is None:
+        date_to = datetime.now(PH_TZ).date()
+    if date_from is None:
+        # Ordinals, not timedelta, so a `to` in the first days of year 1 can't overflow
+        date_from = date.fromordinal(max(1, date_to.toordinal() - DEFAULT_DAYS + 1))
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    max_periods = rollups.MAX_PERIODS[granularity.value]
+    if rollups.period_count(date_from, date_to, granularity.value) > max_periods:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A {granularity.value} report covers at most {max_periods} {granularity.value}s",
+        )
+
+    rows = await repos.reports.sales_rollups(provider_id, date_from.isoformat(), date_to.isoformat())
+    report = rollups.sales_report(rows, date_from, date_to, granularity.value)
+    return {
+        "provider_id": provider_id,
+        "granularity": granularity,
+        "date_from": date_from,
+        "date_to": date_to,
+        **report,
+    }
@@ -0,0 +1,218 @@
+"""Versioned schema bootstrap for the Neo4j graph.
+
+Each migration is a numbered list of idempotent statements (DDL, or a batched
+data backfill). The highest
+applied number is stored on a single ``(:SchemaVersion {id: 'laundry'})`` node so
+startup only runs migrations the database has not seen yet.
+
+Run from the backend directory:
+
+    python schema.py            # apply pending migrations
+    python schema.py --status   # show applied version and index population
+    python schema.py --wait     # apply, then block until all indexes are ONLINE
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+from db import get_session
+from provider_search import FULLTEXT_INDEX, SEARCHABLE_LABEL
+from receipt_snapshot import BACKFILL_SNAPSHOT
+from rollups import LABEL as ROLLUP_LABEL, REBUILD_FOR_PROVIDER
+from unread_counter import RECOUNT_UNREAD
+
+SCHEMA_NODE_ID = "laundry"
+
+# (version, description, statements)
+MIGRATIONS: list[tuple[int, str, list[str]]] = [
+    (
+        1,
+        "uniqueness constraints on node ids and User.email",
+        [
+            "CREATE CONSTRAINT user_id_unique IF NOT EXISTS FOR (n:User) REQUIRE n.id IS UNIQUE",
+            "CREATE CONSTRAINT user_email_unique IF NOT EXISTS FOR (n:User) REQUIRE n.email IS UNIQUE",
+            "CREATE CONSTRAINT booking_id_unique IF NOT EXISTS FOR (n:Booking) REQUIRE n.id IS UNIQUE",
+            "CREATE CONSTRAINT category_id_unique IF NOT EXISTS FOR (n:Category) REQUIRE n.id IS UNIQUE",
+            "CREATE CONSTRAINT order_id_unique IF NOT EXISTS FOR (n:Order) REQUIRE n.id IS UNIQUE",
+            "CREATE CONSTRAINT receipt_id_unique IF NOT EXISTS FOR (n:Receipt) REQUIRE n.id IS UNIQUE",
+            "CREATE CONSTRAINT review_id_unique IF NOT EXISTS FOR (n:Review) REQUIRE n.id IS UNIQUE",
+            "CREATE CONSTRAINT notification_id_unique IF NOT EXISTS FOR (n:Notification) REQUIRE n.id IS UNIQUE",
+            "CREATE CONSTRAINT service_id_unique IF NOT EXISTS FOR (n:Service) REQUIRE n.id IS UNIQUE",
+            "CREATE CONSTRAINT schema_version_id_unique IF NOT EXISTS FOR (n:SchemaVersion) REQUIRE n.id IS UNIQUE",
+        ],
+    ),
+    (
+        2,
+        "range indexes for provider listings and booking filters",
+        [
+            "CREATE INDEX user_role_provider_status IF NOT EXISTS FOR (n:User) ON (n.role, n.provider_status)",
+            "CREATE INDEX booking_status IF NOT EXISTS FOR (n:Booking) ON (n.status)",
+            "CREATE INDEX booking_created_at IF NOT EXISTS FOR (n:Booking) ON (n.created_at)",
+            "CREATE INDEX receipt_created_at IF NOT EXISTS FOR (n:Receipt) ON (n.created_at)",
+            "CREATE INDEX notification_created_at IF NOT EXISTS FOR (n:Notification) ON (n.created_at)",
+        ],
+    ),
+    (
+        3,
+        "backfill User.unread_notifications",
+        [
+            # Auto-commit, so the backfill can commit in batches
+            "MATCH (u:User) CALL { WITH u" + RECOUNT_UNREAD + "} IN TRANSACTIONS OF 1000 ROWS",
+        ],
+    ),
+    (
+        4,
+        "outbox entries and dispatcher lease",
+        [
+            "CREATE CONSTRAINT outbox_entry_id_unique IF NOT EXISTS FOR (n:OutboxEntry) REQUIRE n.id IS UNIQUE",
+            "CREATE CONSTRAINT outbox_lease_name_unique IF NOT EXISTS FOR (n:OutboxLease) REQUIRE n.name IS UNIQUE",
+            "CREATE INDEX outbox_entry_available_at IF NOT EXISTS FOR (n:OutboxEntry) ON (n.available_at)",
+            "CREATE INDEX outbox_entry_status IF NOT EXISTS FOR (n:OutboxEntry) ON (n.status)",
+        ],
+    ),
+    (
+        5,
+        "full-text index for provider search",
+        [
+            f"MATCH (u:User {{role: 'provider', provider_status: 'approved'}}) SET u:{SEARCHABLE_LABEL}",
+            f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} IF NOT EXISTS FOR (n:{SEARCHABLE_LABEL}) "
+            "ON EACH [n.shop_name, n.shop_address, n.email]",
+        ],
+    ),
+    (
+        6,
+        "point index for nearby providers",
+        [
+            f"CREATE POINT INDEX provider_location IF NOT EXISTS FOR (n:{SEARCHABLE_LABEL}) ON (n.location)",
+        ],
+    ),
+    (
+        7,
+        "receipt snapshots",
+        [
+            "CREATE INDEX receipt_order_id IF NOT EXISTS FOR (n:Receipt) ON (n.order_id)",
+            # Receipts written before snapshots have no order_id; snapshot them from today's graph
+            "MATCH (r:Receipt) WHERE r.order_id IS NULL CALL { WITH r" + BACKFILL_SNAPSHOT + "} IN TRANSACTIONS OF 1000 ROWS",
+        ],
+    ),
+    (
+        8,
+        "provider sales rollups",
+        [
+            f"CREATE CONSTRAINT sales_rollup_key IF NOT EXISTS FOR (n:{ROLLUP_LABEL}) REQUIRE (n.provider_id, n.day) IS UNIQUE",
+            "MATCH (p:User {role: 'provider'}) CALL { WITH p" + REBUILD_FOR_PROVIDER + "} IN TRANSACTIONS OF 100 ROWS",
+        ],
+    ),
+    (
+        9,
+        "Order.created_at in Philippine time",
+        [
+            "CREATE INDEX order_created_at IF NOT EXISTS FOR (n:Order) ON (n.created_at)",
+            # POST /orders/ used to store naive UTC; keyset cursors and date filters compare PH-time strings
+            "MATCH (o:Order) WHERE NOT o.created_at =~ '.*([+-][0-9]{2}:[0-9]{2}|Z)' "
+            "CALL { WITH o SET o.created_at = toString(datetime({"
+            "datetime: datetime({datetime: localdatetime(o.created_at), timezone: 'UTC'}), timezone: '+08:00'})) "
+            "} IN TRANSACTIONS OF 1000 ROWS",
+        ],
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_applied_version(session) -> int:
+    rec = session.run(
+        "MATCH (s:SchemaVersion {id: $id}) RETURN s.version AS version",
+        id=SCHEMA_NODE_ID,
+    ).single()
+    return int(rec["version"]) if rec and rec["version"] is not None else 0
+
+
+def _record_version(session, version: int, description: str):
+    session.run(
+        """
+        MERGE (s:SchemaVersion {id: $id})
+        SET s.version = $version, s.description = $description, s.applied_at = $now
+        """,
+        id=SCHEMA_NODE_ID,
+        version=version,
+        description=description,
+        now=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+def apply_migrations() -> int:
+    """Apply every migration newer than the recorded version; return the resulting version."""
+    with get_session() as session:
+        current = get_applied_version(session)
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            print(f"Applying schema migration {version}: {description}")
+            # DDL and CALL ... IN TRANSACTIONS must run in auto-commit transactions, one statement at a time
+            for stmt in statements:
+                session.run(stmt).consume()
+            _record_version(session, version, description)
+            current = version
+    return current
+
+
+def index_status() -> list[dict]:
+    """Return name, state and population progress for every index in the database."""
+    with get_session() as session:
+        result = session.run(
+            """
+            SHOW INDEXES YIELD name, type, labelsOrTypes, properties, state, populationPercent
+            RETURN name, type, labelsOrTypes, properties, state, populationPercent
+            ORDER BY name
+            """
+        )
+        return [r.data() for r in result]
+
+
+def report_index_progress() -> bool:
+    """Print indexes that are still populating; return True when all are ONLINE."""
+    pending = [ix for ix in index_status() if ix["state"] != "ONLINE"]
+    for ix in pending:
+        print(f"Index {ix['name']} is {ix['state']} ({ix['populationPercent'] or 0.0:.1f}% populated)")
+    return not pending
+
+
+def wait_for_indexes(timeout: float = 600.0, poll_interval: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while True:
+        if report_index_progress():
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(poll_interval)
+
+
+def bootstrap():
+    """Startup hook: apply pending migrations and report index population."""
+    version = apply_migrations()
+    print(f"Neo4j schema at version {version}")
+    report_index_progress()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply or inspect the Neo4j schema")
+    parser.add_argument("--status", action="store_true", help="show schema version and indexes, apply nothing")
+    parser.add_argument("--wait", action="store_true", help="block until all indexes are ONLINE")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds to wait with --wait")
+    args = parser.parse_args()
+
+    if args.status:
+        with get_session() as session:
+            print(f"Applied schema version: {get_applied_version(session)} (latest {LATEST_VERSION})")
+        for ix in index_status():
+            print(f"{ix['name']:<40} {ix['state']:<12} {ix['populationPercent'] or 0.0:6.1f}%  {ix['labelsOrTypes']} {ix['properties']}")
+        return
+
+    bootstrap()
+    if args.wait and not wait_for_indexes(args.timeout):
+        raise SystemExit("Timed out waiting for indexes to come online")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""GET /reports/provider/sales range checks, on the memory backend.
+
+Run from the backend directory: python -m pytest tests
+"""
+import os
+
+os.environ["DATA_BACKEND"] = "memory"
+
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import rollups
+from auth import create_access_token
+from repositories import memory_store
+
+PROVIDER = {
+    "id": "p1", "role": "provider", "email": "p@x.com", "contact_number": "09171234567",
+    "shop_name": "Suds", "shop_address": "Makati", "provider_status": "approved",
+    "is_available": True, "banned": False, "email_verified": True, "hashed_password": "x",
+}
+
+
+@pytest.fixture
+def client():
+    memory_store.load(users=[PROVIDER])
+    return TestClient(main.app)
+
+
+def sales(client, **params):
+    token = create_access_token({"sub": "p1", "role": "provider"})
+    return client.get("/reports/provider/sales", params=params, headers={"Authorization": f"Bearer {token}"})
+
+
+@pytest.mark.parametrize("granularity, date_from, date_to, periods", [
+    ("day", "2025-01-01", "2025-12-31", 365),
+    ("day", "2024-01-01", "2024-12-31", 366),
+    ("week", "2024-01-01", "2025-12-28", 104),
+    ("month", "2016-01-31", "2025-12-01", 120),
+])
+def test_longest_allowed_range(client, granularity, date_from, date_to, periods):
+    r = sales(client, **{"from": date_from, "to": date_to, "granularity": granularity})
+    assert r.status_code == 200
+    assert len(r.json()["buckets"]) == periods
+
+
+@pytest.mark.parametrize("granularity, date_from, date_to", [
+    ("day", "1900-01-01", "2026-12-31"),
+    ("day", "0001-01-01", "9999-12-31"),
+    ("day", "2024-01-01", "2025-01-01"),
+    ("week", "2024-01-01", "2025-12-29"),
+    ("month", "2016-01-01", "2026-01-01"),
+    ("month", "0001-01-01", "9999-12-31"),
+])
+def test_too_long_range_is_400(client, granularity, date_from, date_to):
+    r = sales(client, **{"from": date_from, "to": date_to, "granularity": granularity})
+    assert r.status_code == 400
+
+
+@pytest.mark.parametrize("granularity", ["day", "week", "month"])
+def test_range_ending_on_date_max(client, granularity):
+    r = sales(client, **{"from": "9999-12-01", "to": "9999-12-31", "granularity": granularity})
+    assert r.status_code == 200
+    assert r.json()["buckets"][-1]["period_start"] <= "9999-12-31"
+
+
+@pytest.mark.parametrize("granularity", ["day", "week", "month"])
+def test_to_only_near_date_min(client, granularity):
+    r = sales(client, to="0001-01-05", granularity=granularity)
+    assert r.status_code == 200
+    assert r.json()["date_from"] == "0001-01-01"
+
+
+def test_to_only_far_future_defaults_to_30_days(client):
+    r = sales(client, to="9999-12-31")
+    assert r.status_code == 200
+    assert r.json()["date_from"] == "9999-12-02"
+    assert len(r.json()["buckets"]) == 30
+
+
+def test_from_after_to_is_400(client):
+    assert sales(client, **{"from": "2025-02-01", "to": "2025-01-01"}).status_code == 400
+
+
+def test_sales_report_stops_at_date_max():
+    report = rollups.sales_report([], date(9999, 12, 31), date.max, "month")
+    assert [b["period_start"] for b in report["buckets"]] == [date(9999, 12, 1)]
@@ -0,0 +1,36 @@
+"""Unread-notification counter kept on the User node.
+
+GET /notifications/unread_count reads `User.unread_notifications` instead of
+scanning the user's notifications, so every write that changes how many unread
+notifications a user has moves the counter in the same transaction: the
+outbox dispatcher adds the notifications it materializes for the user, marking
+one read subtracts 1, mark-all-read resets it to 0. The fragments write-lock
+the user node before reading the counter so concurrent writers serialize rather
+than lose updates. They contain only SET/REMOVE, so they are valid inside FOREACH.
+"""
+
+
+def add_unread(alias: str, amount: str) -> str:
+    """`amount` is a Cypher expression, e.g. size(entries)."""
+    return (
+        f"  SET {alias}._lock = true REMOVE {alias}._lock\n"
+        f"  SET {alias}.unread_notifications = coalesce({alias}.unread_notifications, 0) + {amount}\n"
+    )
+
+
+def decrement_unread(alias: str) -> str:
+    return (
+        f"  SET {alias}._lock = true REMOVE {alias}._lock\n"
+        f"  SET {alias}.unread_notifications = CASE WHEN coalesce({alias}.unread_notifications, 0) > 0"
+        f" THEN {alias}.unread_notifications - 1 ELSE 0 END\n"
+    )
+
+
+# Recomputes the counter from the notifications themselves; expects `u` bound.
+# Used by the schema backfill and the bulk generators.
+RECOUNT_UNREAD = """
+OPTIONAL MATCH (n:Notification)-[:FOR_USER]->(u)
+WHERE NOT coalesce(n.read, false)
+WITH u, count(n) AS unread
+SET u.unread_notifications = unread
+"""
@@ -1,164 +1,126 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from models import CustomerCreate, ProviderCreate, UserPublic, UserRole, ProviderStatus, ChangePasswordRequest
-from db import get_session
-from auth import get_password_hash, get_current_user, verify_password
-from email_utils import send_verification_email, create_verification_token, verify_verification_token
+from auth import get_current_user
+from password_hashing import hash_password, verify_and_update
+from user_cache import user_cache
+from repositories import Repositories, get_repos
+from email_utils import create_verification_token, verify_verification_token
+from outbox import email_entry
+import asyncio
+import places
 import uuid
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.post("/register/customer")
-async def register_customer(payload: CustomerCreate):
-    with get_session() as session:
-        exists = session.run("MATCH (u:User {email: $email}) RETURN u", email=payload.email).single()
-        if exists:
-            raise HTTPException(status_code=400, detail="Email already registered")
-        user_id = str(uuid.uuid4())
-        session.run(
-            """
-            CREATE (u:User {
-                id: $id, role: $role, email: $email, contact_number: $contact_number,
-                full_name: $full_name, address: $address, hashed_password: $hashed_password,
-                banned: false, email_verified: false
-            })
-            RETURN u
-            """,
-            id=user_id,
-            role=UserRole.customer.value,
-            email=payload.email,
-            contact_number=payload.contact_number,
-            full_name=payload.full_name,
-            address=payload.address,
-            hashed_password=get_password_hash(payload.password),
-        )
-        
-        # Send verification email
-        token = create_verification_token(payload.email)
-        await send_verification_email(payload.email, token)
-        
-        return {
-            "message": "Registration successful! Please check your email to verify your account.",
-            "email": payload.email
-        }
+async def register_customer(payload: CustomerCreate, repos: Repositories = Depends(get_repos)):
+    if await repos.users.email_exists(payload.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+    # Hash on the dedicated executor, never on the event loop
+    hashed_password = await hash_password(payload.password)
+    # Creates the user only if the email is still free; the verification email
+    # is queued in the same write and sent by the outbox dispatcher
+    created = await repos.users.create(
+        {
+            "id": str(uuid.uuid4()),
+            "role": UserRole.customer.value,
+            "email": payload.email,
+            "contact_number": payload.contact_number,
+            "full_name": payload.full_name,
+            "address": payload.address,
+            "hashed_password": hashed_password,
+            "banned": False,
+            "email_verified": False,
+        },
+        email=email_entry(payload.email, "verification", token=create_verification_token(payload.email)),
+    )
+    if not created:
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    return {
+        "message": "Registration successful! Please check your email to verify your account.",
+        "email": payload.email
+    }
 
 @router.post("/register/provider")
-async def register_provider(payload: ProviderCreate):
-    with get_session() as session:
-        exists = session.run("MATCH (u:User {email: $email}) RETURN u", email=payload.email).single()
-        if exists:
-            raise HTTPException(status_code=400, detail="Email already registered")
-        user_id = str(uuid.uuid4())
-        session.run(
-            """
-            CREATE (u:User {
-                id: $id, role: $role, email: $email, contact_number: $contact_number,
-                shop_name: $shop_name, shop_address: $shop_address, hashed_password: $hashed_password,
-                provider_status: 'pending', banned: false, is_available: true, email_verified: false
-            })
-            RETURN u
-            """,
-            id=user_id,
-            role=UserRole.provider.value,
-            email=payload.email,
-            contact_number=payload.contact_number,
-            shop_name=payload.shop_name,
-            shop_address=payload.shop_address,
-            hashed_password=get_password_hash(payload.password),
-        )
-        
-        # Send verification email
-        token = create_verification_token(payload.email)
-        await send_verification_email(payload.email, token)
-        
-        return {
-            "message": "Registration successful! Please check your email to verify your account.",
-            "email": payload.email
-        }
+async def register_provider(payload: ProviderCreate, repos: Repositories = Depends(get_repos)):
+    if await repos.users.email_exists(payload.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+    # Hash on the dedicated executor, never on the event loop; geocode the shop meanwhile
+    hashed_password, location = await asyncio.gather(hash_password(payload.password), places.geocode(payload.shop_address))
+    provider_id = str(uuid.uuid4())
+    # Creates the user only if the email is still free; the verification email
+    # is queued in the same write and sent by the outbox dispatcher
+    created = await repos.users.create(
+        {
+            "id": provider_id,
+            "role": UserRole.provider.value,
+            "email": payload.email,
+            "contact_number": payload.contact_number,
+            "shop_name": payload.shop_name,
+            "shop_address": payload.shop_address,
+            "hashed_password": hashed_password,
+            "provider_status": ProviderStatus.pending.value,
+            "banned": False,
+            "is_available": True,
+            "email_verified": False,
+        },
+        email=email_entry(payload.email, "verification", token=create_verification_token(payload.email)),
+    )
+    if not created:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    if location is not None:
+        await repos.users.set_location(provider_id, location)
+
+    return {
+        "message": "Registration successful! Please check your email to verify your account.",
+        "email": payload.email
+    }
 
 @router.get("/me", response_model=UserPublic)
-def get_profile(current_user: UserPublic = Depends(get_current_user)):
+async def get_profile(current_user: UserPublic = Depends(get_current_user)):
     return current_user
 
 @router.get("/{user_id}", response_model=UserPublic)
-def get_user_by_id(user_id: str, current_user: UserPublic = Depends(get_current_user)):
+async def get_user_by_id(user_id: str, current_user: UserPublic = Depends(get_current_user), repos: Repositories = Depends(get_repos)):
     """Get user details by ID (for viewing provider info)"""
-    with get_session() as session:
-        result = session.run(
-            """
-            MATCH (u:User {id: $id})
-            RETURN u { .id, .role, .email, .contact_number, .full_name, .address, 
-                      .shop_name, .shop_address, .provider_status, .banned, .is_available } AS user
-            """,
-            id=user_id
-        ).single()
-        
-        if not result:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_data = result["user"]
-        return UserPublic(**user_data)
+    user = await repos.users.get(user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 # Public: list approved providers (id, shop_name, contact, shop_address)
 @router.get("/providers/approved")
-def list_approved_providers():
-    from neo4j.exceptions import ServiceUnavailable
-    attempts = 0
-    while attempts < 3:
-        try:
-            with get_session() as session:
-                result = session.run(
-                    """
-                    MATCH (u:User {role: 'provider'})
-                    WHERE u.provider_status = 'approved'
-                    RETURN u { .id, .email, .contact_number, .shop_name, .shop_address, .is_available } AS provider
-                    ORDER BY u.shop_name
-                    """
-                )
-                return [r["provider"] for r in result]
-        except ServiceUnavailable:
-            attempts += 1
-            if attempts >= 3:
-                print(f"Neo4j unavailable after {attempts} attempts")
-                return []
-        except Exception as e:
-            print(f"Error fetching approved providers: {e}")
-            # Return empty list instead of 500 error
-            return []
-    return []
+async def list_approved_providers(repos: Repositories = Depends(get_repos)):
+    try:
+        return await repos.providers.list_approved()
+    except Exception as e:
+        print(f"Error fetching approved providers: {e}")
+        # Return empty list instead of 500 error
+        return []
 
 @router.get("/providers/search")
-def search_providers(q: str = ""):
+async def search_providers(q: str = "", limit: int = Query(20, ge=1, le=100), repos: Repositories = Depends(get_repos)):
     term = (q or "").strip()
-    with get_session() as session:
-        if not term:
-            # fallback to approved list when query empty
-            result = session.run(
-                """
-                MATCH (u:User {role: 'provider'})
-                WHERE u.provider_status = 'approved'
-                RETURN u { .id, .email, .contact_number, .shop_name, .shop_address, .is_available } AS provider
-                ORDER BY u.shop_name
-                """
-            )
-            return [r["provider"] for r in result]
-        result = session.run(
-            """
-            MATCH (u:User {role: 'provider'})
-            WHERE u.provider_status = 'approved'
-              AND (
-                toLower(coalesce(u.shop_name,'')) CONTAINS toLower($q)
-                OR toLower(coalesce(u.shop_address,'')) CONTAINS toLower($q)
-                OR toLower(coalesce(u.email,'')) CONTAINS toLower($q)
-              )
-            RETURN u { .id, .email, .contact_number, .shop_name, .shop_address, .is_available } AS provider
-            ORDER BY u.shop_name
-            """,
-            q=term,
-        )
-        return [r["provider"] for r in result]
+    if not term:
+        # fallback to approved list when query empty
+        return await repos.providers.list_approved()
+    # Prefix and typo-tolerant, best match first (see provider_search)
+    return await repos.providers.search(term, limit)
+
+@router.get("/providers/nearby")
+async def nearby_providers(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(5.0, gt=0, le=50, description="Kilometers"),
+    limit: int = Query(20, ge=1, le=100),
+    repos: Repositories = Depends(get_repos),
+):
+    """Approved providers with a geocoded shop within `radius` km, nearest first"""
+    return await repos.providers.nearby(lat, lon, radius * 1000, limit)
 
 @router.patch("/me", response_model=UserPublic)
-def update_profile(payload: dict, current_user: UserPublic = Depends(get_current_user)):
+async def update_profile(payload: dict, current_user: UserPublic = Depends(get_current_user), repos: Repositories = Depends(get_repos)):
     allowed = {}
     if current_user.role == UserRole.customer:
         # Customer editable fields
@@ -176,86 +138,61 @@ def update_profile(payload: dict, current_user: UserPublic = Depends(get_current
     if not allowed:
         # Return current state
         return current_user
-    with get_session() as session:
-        rec = session.run(
-            """
-            MATCH (u:User {id: $id})
-            SET u += $updates
-            RETURN u { .id, .role, .email, .contact_number, .full_name, .address, .shop_name, .shop_address, .provider_status, .banned, .is_available } AS user
-            """,
-            id=current_user.id,
-            updates=allowed,
-        ).single()
-        return UserPublic(**rec["user"]) if rec else current_user
+    user = await repos.users.update_profile(current_user.id, allowed)
+    if "shop_address" in allowed and allowed["shop_address"] != current_user.shop_address:
+        # A failed lookup clears the old point rather than keep a stale one
+        await repos.users.set_location(current_user.id, await places.geocode(allowed["shop_address"]))
+    user_cache.invalidate(current_user.id)
+    return user or current_user
 
 @router.post("/change_password")
-def change_password(payload: ChangePasswordRequest, current_user: UserPublic = Depends(get_current_user)):
+async def change_password(payload: ChangePasswordRequest, current_user: UserPublic = Depends(get_current_user), repos: Repositories = Depends(get_repos)):
     if current_user.id == "admin":
         raise HTTPException(status_code=400, detail="Admin password cannot be changed here")
-    with get_session() as session:
-        rec = session.run("MATCH (u:User {id: $id}) RETURN u.hashed_password AS hp", id=current_user.id).single()
-        if not rec or not rec["hp"]:
-            raise HTTPException(status_code=404, detail="User not found")
-        if not verify_password(payload.current_password, rec["hp"]):
-            raise HTTPException(status_code=400, detail="Current password is incorrect")
-        new_hp = get_password_hash(payload.new_password)
-        session.run("MATCH (u:User {id: $id}) SET u.hashed_password = $hp", id=current_user.id, hp=new_hp)
+    hashed_password = await repos.users.get_password_hash(current_user.id)
+    if not hashed_password:
+        raise HTTPException(status_code=404, detail="User not found")
+    valid, _ = await verify_and_update(payload.current_password, hashed_password)
+    if not valid:
+        raise HTTPException(status_code=400, detail="Current password is incorrect")
+    new_hp = await hash_password(payload.new_password)
+    await repos.users.set_password_hash(current_user.id, new_hp)
     return {"detail": "password_changed"}
 
 @router.post("/toggle_availability")
-def toggle_availability(current_user: UserPublic = Depends(get_current_user)):
+async def toggle_availability(current_user: UserPublic = Depends(get_current_user), repos: Repositories = Depends(get_repos)):
     """Provider endpoint to toggle shop availability (open/closed)"""
     if current_user.role != UserRole.provider:
         raise HTTPException(status_code=403, detail="Only providers can toggle availability")
-    with get_session() as session:
-        rec = session.run(
-            """
-            MATCH (u:User {id: $id})
-            SET u.is_available = NOT coalesce(u.is_available, true)
-            RETURN u.is_available AS is_available
-            """,
-            id=current_user.id
-        ).single()
-        return {"is_available": rec["is_available"] if rec else True}
+    is_available = await repos.users.toggle_availability(current_user.id)
+    user_cache.invalidate(current_user.id)
+    return {"is_available": is_available if is_available is not None else True}
 
 @router.get("/verify-email")
-def verify_email(token: str):
+async def verify_email(token: str, repos: Repositories = Depends(get_repos)):
     """Verify user email with token"""
     email = verify_verification_token(token)
     if not email:
         raise HTTPException(status_code=400, detail="Invalid or expired verification token")
-    
-    with get_session() as session:
-        # Check if user exists
-        user = session.run("MATCH (u:User {email: $email}) RETURN u", email=email).single()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Update email_verified status
-        session.run(
-            "MATCH (u:User {email: $email}) SET u.email_verified = true",
-            email=email
-        )
-    
+
+    # Update email_verified status; False means the user does not exist
+    if not await repos.users.mark_email_verified(email):
+        raise HTTPException(status_code=404, detail="User not found")
+
     return {"message": "Email verified successfully! You can now log in."}
 
 @router.post("/resend-verification")
-async def resend_verification(email: str):
+async def resend_verification(email: str, repos: Repositories = Depends(get_repos)):
     """Resend verification email"""
-    with get_session() as session:
-        result = session.run(
-            "MATCH (u:User {email: $email}) RETURN u.email_verified AS verified",
-            email=email
-        ).single()
-        
-        if not result:
-            raise HTTPException(status_code=404, detail="Email not found")
-        
-        if result["verified"]:
-            raise HTTPException(status_code=400, detail="Email already verified")
-    
-    # Send new verification email
-    token = create_verification_token(email)
-    await send_verification_email(email, token)
-    
+    verified = await repos.users.email_verified(email)
+
+    if verified is None:
+        raise HTTPException(status_code=404, detail="Email not found")
+
+    if verified:
+        raise HTTPException(status_code=400, detail="Email already verified")
+
+    # Queue a new verification email; the outbox dispatcher sends it
+    await repos.outbox.enqueue(email_entry(email, "verification", token=create_verification_token(email)))
+
     return {"message": "Verification email sent! Please check your inbox."}
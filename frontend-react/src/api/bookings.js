@@ -4,8 +4,23 @@ export async function createBooking(token, payload){
   return apiFetch('/bookings/', { method: 'POST', token, json: payload })
 }
 
-export async function listMyBookings(token){
-  return apiFetch('/bookings/mine', { token })
+// params: { limit, cursor, status, date_from, date_to } -> { items, next_cursor }
+export async function listMyBookingsPage(token, params = {}){
+  const qs = new URLSearchParams(Object.entries(params).filter(([, v]) => v != null && v !== '')).toString()
+  return apiFetch(`/bookings/mine${qs ? `?${qs}` : ''}`, { token })
+}
+
+// Newest pages until at least `count` bookings (or the last page) -> { items, next_cursor }.
+// Refreshes reload as many bookings as are on screen so older ones loaded with
+// next_cursor stay reachable.
+export async function listMyBookingsThrough(token, count, params = {}){
+  let page = await listMyBookingsPage(token, params)
+  let items = page.items
+  while (page.next_cursor && items.length < count){
+    page = await listMyBookingsPage(token, { ...params, cursor: page.next_cursor })
+    items = [...items, ...page.items]
+  }
+  return { items, next_cursor: page.next_cursor }
 }
 
 export async function acceptBooking(token, id){
@@ -1,5 +1,5 @@
 const RAW_API_BASE = (import.meta.env.VITE_API_BASE ?? '').trim()
-const API_BASE = RAW_API_BASE.replace(/\/+$/, '')
+export const API_BASE = RAW_API_BASE.replace(/\/+$/, '')
 
 export function getAuthHeaders(token) {
   return token ? { Authorization: `Bearer ${token}` } : {}
@@ -0,0 +1,37 @@
+import { API_BASE } from './client'
+
+// One EventSource per tab, shared by every subscriber
+let source = null
+let sourceToken = null
+const listeners = new Set()
+
+function dispatch(e){
+  const event = JSON.parse(e.data)
+  listeners.forEach(fn => fn(event))
+}
+
+// onEvent receives { type: 'booking' | 'notification' | 'resync', ... }; returns an unsubscribe function
+export function subscribeEvents(token, onEvent){
+  if (!token || typeof EventSource === 'undefined') return () => {}
+  if (source && sourceToken !== token) {
+    source.close()
+    source = null
+  }
+  if (!source) {
+    sourceToken = token
+    // EventSource cannot send an Authorization header
+    source = new EventSource(`${API_BASE}/events/stream?token=${encodeURIComponent(token)}`)
+    for (const type of ['booking', 'notification', 'resync']) {
+      source.addEventListener(type, dispatch)
+    }
+  }
+  listeners.add(onEvent)
+  return () => {
+    listeners.delete(onEvent)
+    if (listeners.size === 0 && source) {
+      source.close()
+      source = null
+      sourceToken = null
+    }
+  }
+}
@@ -1,9 +1,25 @@
 import { apiFetch } from './client'
 
-export async function listMyNotifications(token){
-  return apiFetch('/notifications/mine', { token })
+export async function listMyNotificationsPage(token, params = {}){
+  const qs = new URLSearchParams(Object.entries(params).filter(([, v]) => v != null && v !== '')).toString()
+  return apiFetch(`/notifications/mine${qs ? `?${qs}` : ''}`, { token })
+}
+
+// Newest page only; use listMyNotificationsPage with next_cursor to load older notifications
+export async function listMyNotifications(token, params = {}){
+  const page = await listMyNotificationsPage(token, params)
+  return page.items
+}
+
+export async function getUnreadCount(token){
+  const res = await apiFetch('/notifications/unread_count', { token })
+  return res.unread_count
 }
 
 export async function markNotificationRead(token, id){
   return apiFetch(`/notifications/${id}/read`, { method: 'PATCH', token })
 }
+
+export async function markAllNotificationsRead(token){
+  return apiFetch('/notifications/read_all', { method: 'PATCH', token })
+}
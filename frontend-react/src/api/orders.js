@@ -5,8 +5,16 @@ export async function createOrder(token, payload){
   return apiFetch('/orders/', { method: 'POST', token, json: payload })
 }
 
-export async function getMyOrders(token){
-  return apiFetch('/orders/mine/list', { token })
+// params: { limit, cursor, date_from, date_to } -> { items, next_cursor }
+export async function listMyOrdersPage(token, params = {}){
+  const qs = new URLSearchParams(Object.entries(params).filter(([, v]) => v != null && v !== '')).toString()
+  return apiFetch(`/orders/mine/list${qs ? `?${qs}` : ''}`, { token })
+}
+
+// Newest page only; use listMyOrdersPage with next_cursor to load older orders
+export async function getMyOrders(token, params = {}){
+  const page = await listMyOrdersPage(token, params)
+  return page.items
 }
 
 export async function getOrder(token, id){
@@ -1,7 +1,14 @@
 import { apiFetch } from './client.js'
 
-export async function listMyReceipts(token){
-  return apiFetch('/receipts/mine', { token })
+export async function listMyReceiptsPage(token, params = {}){
+  const qs = new URLSearchParams(Object.entries(params).filter(([, v]) => v != null && v !== '')).toString()
+  return apiFetch(`/receipts/mine${qs ? `?${qs}` : ''}`, { token })
+}
+
+// Newest page only; use listMyReceiptsPage with next_cursor to load older receipts
+export async function listMyReceipts(token, params = {}){
+  const page = await listMyReceiptsPage(token, params)
+  return page.items
 }
 
 export async function generateReceipt(token, orderId){
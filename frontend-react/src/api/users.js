@@ -21,6 +21,11 @@ export async function searchProviders(query){
   return apiFetch(`/users/providers/search?q=${qp}`)
 }
 
+export async function nearbyProviders(lat, lon, radiusKm = 5){
+  const qp = new URLSearchParams({ lat, lon, radius: radiusKm })
+  return apiFetch(`/users/providers/nearby?${qp}`)
+}
+
 export async function toggleAvailability(token){
   return apiFetch('/users/toggle_availability', { method: 'POST', token })
 }
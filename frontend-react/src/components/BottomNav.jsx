@@ -1,7 +1,8 @@
 import React, { useState, useEffect } from 'react'
 import { Link, useLocation } from 'react-router-dom'
 import { useAuth } from '../context/AuthContext.jsx'
-import { listMyNotifications } from '../api/notifications.js'
+import { getUnreadCount } from '../api/notifications.js'
+import { subscribeEvents } from '../api/events.js'
 
 export default function BottomNav(){
   const { pathname } = useLocation()
@@ -14,9 +15,7 @@ export default function BottomNav(){
     // Fetch unread notifications count
     const fetchUnreadCount = async () => {
       try {
-        const notifications = await listMyNotifications(token)
-        const unread = notifications.filter(n => !n.read).length
-        setUnreadCount(unread)
+        setUnreadCount(await getUnreadCount(token))
       } catch (e) {
         // If unauthorized, stop polling
         if (e.message?.includes('401') || e.message?.includes('Unauthorized')) {
@@ -30,9 +29,15 @@ export default function BottomNav(){
     
     fetchUnreadCount()
     
-    // Poll every 30 seconds for new notifications
-    const interval = setInterval(fetchUnreadCount, 30000)
-    return () => clearInterval(interval)
+    // Refresh when the server pushes a notification; slow poll as a fallback
+    const unsubscribe = subscribeEvents(token, e => {
+      if (e.type === 'notification' || e.type === 'resync') fetchUnreadCount()
+    })
+    const interval = setInterval(fetchUnreadCount, 60000)
+    return () => {
+      unsubscribe()
+      clearInterval(interval)
+    }
   }, [user, token])
   
   if (!user) return null
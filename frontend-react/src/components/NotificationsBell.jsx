@@ -1,18 +1,18 @@
 import React, { useState, useEffect, useCallback } from 'react'
-import { listMyNotifications } from '../api/notifications'
+import { getUnreadCount } from '../api/notifications'
+import { subscribeEvents } from '../api/events'
 import { useAuth } from '../context/AuthContext.jsx'
 import { useNavigate } from 'react-router-dom'
 
 export default function NotificationsBell(){
   const { token } = useAuth()
   const nav = useNavigate()
-  const [items, setItems] = useState([])
+  const [unread, setUnread] = useState(0)
 
   const load = useCallback(async () => {
     if (!token) return
     try { 
-      const res = await listMyNotifications(token)
-      setItems(res)
+      setUnread(await getUnreadCount(token))
     } catch(e) { 
       // If unauthorized, stop trying
       if (e.message?.includes('401') || e.message?.includes('Unauthorized')) {
@@ -28,19 +28,23 @@ export default function NotificationsBell(){
     load()
   }, [load])
 
-  // Auto-refresh notifications every 10 seconds
+  // Refresh on pushed notification events; slow poll as a fallback
   useEffect(() => {
     if (!token) return // Don't poll if no token
     
+    const unsubscribe = subscribeEvents(token, e => {
+      if (e.type === 'notification' || e.type === 'resync') load()
+    })
     const interval = setInterval(() => {
       load()
-    }, 10000) // Poll every 10 seconds
+    }, 60000) // Poll every 60 seconds
     
-    return () => clearInterval(interval)
+    return () => {
+      unsubscribe()
+      clearInterval(interval)
+    }
   }, [load, token])
 
-  const unread = items.filter(n=>!n.read).length
-
   return (
     <button 
       type="button" 
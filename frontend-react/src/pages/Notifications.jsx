@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useCallback } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { listMyNotifications, markNotificationRead } from '../api/notifications'
+import { getUnreadCount, listMyNotificationsPage, markAllNotificationsRead, markNotificationRead } from '../api/notifications'
+import { subscribeEvents } from '../api/events'
 import { useAuth } from '../context/AuthContext.jsx'
 import { formatDateTime } from '../components/RealTimeClock.jsx'
 
@@ -8,6 +9,9 @@ export default function Notifications() {
   const { token, user } = useAuth()
   const nav = useNavigate()
   const [items, setItems] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [unread, setUnread] = useState(0)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [error, setError] = useState('')
   const [loading, setLoading] = useState(true)
   const [isRefreshing, setIsRefreshing] = useState(false)
@@ -31,8 +35,11 @@ export default function Notifications() {
       setIsRefreshing(true)
     }
     try {
-      const res = await listMyNotifications(token)
-      setItems(res)
+      // Refresh the newest page; older pages are fetched on demand
+      const [page, count] = await Promise.all([listMyNotificationsPage(token), getUnreadCount(token)])
+      setItems(page.items)
+      setNextCursor(page.next_cursor)
+      setUnread(count)
     } catch (e) {
       setError(e.message)
     } finally {
@@ -45,23 +52,46 @@ export default function Notifications() {
     load()
   }, [load])
 
-  // Auto-refresh notifications every 10 seconds
+  // Refresh on pushed notification events; slow poll as a fallback
   useEffect(() => {
     if (!token) return
 
+    const unsubscribe = subscribeEvents(token, e => {
+      if (e.type === 'notification' || e.type === 'resync') load(true) // Silent refresh - doesn't show loading spinner
+    })
     const interval = setInterval(() => {
-      load(true) // Silent refresh - doesn't show loading spinner
-    }, 10000) // Refresh every 10 seconds
+      load(true)
+    }, 60000) // Refresh every 60 seconds
 
-    return () => clearInterval(interval)
+    return () => {
+      unsubscribe()
+      clearInterval(interval)
+    }
   }, [load, token])
 
-  const unread = items.filter(n => !n.read).length
+  async function onLoadMore() {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const page = await listMyNotificationsPage(token, { cursor: nextCursor })
+      setItems(prev => [...prev, ...page.items])
+      setNextCursor(page.next_cursor)
+    } catch (e) {
+      setError(e.message)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
+  function markLocallyRead(id) {
+    setItems(prev => prev.map(n => n.id === id ? { ...n, read: true } : n))
+    setUnread(prev => Math.max(prev - 1, 0))
+  }
 
   async function onMark(id) {
     try {
       await markNotificationRead(token, id)
-      setItems(prev => prev.map(n => n.id === id ? { ...n, read: true } : n))
+      markLocallyRead(id)
     } catch (e) {
       setError(e.message)
     }
@@ -69,9 +99,9 @@ export default function Notifications() {
 
   async function onMarkAll() {
     try {
-      const unreadIds = items.filter(n => !n.read).map(n => n.id)
-      await Promise.all(unreadIds.map(id => markNotificationRead(token, id)))
+      await markAllNotificationsRead(token)
       setItems(prev => prev.map(n => ({ ...n, read: true })))
+      setUnread(0)
     } catch (e) {
       setError(e.message)
     }
@@ -81,7 +111,7 @@ export default function Notifications() {
     if (!n.read) {
       try {
         await markNotificationRead(token, n.id)
-        setItems(prev => prev.map(item => item.id === n.id ? { ...item, read: true } : item))
+        markLocallyRead(n.id)
       } catch (e) { }
     }
     if (n.receipt_id) {
@@ -205,6 +235,18 @@ export default function Notifications() {
           </div>
         ))}
       </div>
+
+      {nextCursor && (
+        <div className="text-center">
+          <button
+            onClick={onLoadMore}
+            disabled={loadingMore}
+            className="btn-white text-xs md:text-sm"
+          >
+            {loadingMore ? 'Loading...' : 'Load older notifications'}
+          </button>
+        </div>
+      )}
     </div>
   )
 }
@@ -1,12 +1,14 @@
 import React, { useEffect, useMemo, useState } from 'react'
 import { useSearchParams } from 'react-router-dom'
 import { useAuth } from '../context/AuthContext.jsx'
-import { listMyReceipts } from '../api/receipts.js'
+import { listMyReceiptsPage } from '../api/receipts.js'
 import { formatDateTime } from '../components/RealTimeClock.jsx'
 
 export default function Receipts(){
   const { token, user } = useAuth()
   const [receipts, setReceipts] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [error, setError] = useState('')
   const [loading, setLoading] = useState(true)
   const [open, setOpen] = useState(false)
@@ -16,12 +18,23 @@ export default function Receipts(){
   useEffect(()=>{
     (async ()=>{
       try {
-        const data = await listMyReceipts(token)
-        setReceipts(data)
+        const page = await listMyReceiptsPage(token)
+        setReceipts(page.items)
+        setNextCursor(page.next_cursor)
       } catch(e){ setError(e.message) } finally { setLoading(false) }
     })()
   }, [token])
 
+  async function onLoadMore(){
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const page = await listMyReceiptsPage(token, { cursor: nextCursor })
+      setReceipts(prev => [...prev, ...page.items])
+      setNextCursor(page.next_cursor)
+    } catch(e){ setError(e.message) } finally { setLoadingMore(false) }
+  }
+
   // Auto-open a receipt when navigated with ?rid=...
   useEffect(()=>{
     const rid = searchParams.get('rid')
@@ -37,7 +50,7 @@ export default function Receipts(){
     <div className="space-y-4">
       <div className="flex items-center justify-between">
         <h2 className="text-2xl md:text-3xl font-bold">Receipts</h2>
-        <div className="text-xs text-gray-600">{receipts.length} receipt{receipts.length !== 1 ? 's' : ''}</div>
+        <div className="text-xs text-gray-600">{receipts.length}{nextCursor ? '+' : ''} receipt{receipts.length !== 1 ? 's' : ''}</div>
       </div>
       
       {receipts.length === 0 && (
@@ -101,6 +114,14 @@ export default function Receipts(){
         ))}
       </div>
 
+      {nextCursor && (
+        <div className="text-center">
+          <button onClick={onLoadMore} disabled={loadingMore} className="btn-white text-xs md:text-sm">
+            {loadingMore ? 'Loading...' : 'Load older receipts'}
+          </button>
+        </div>
+      )}
+
       {open && current && (
         <ReceiptModal user={user} receipt={current} onClose={()=>setOpen(false)} />)
       }
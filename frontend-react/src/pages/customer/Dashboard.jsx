@@ -2,7 +2,7 @@ import React, { useEffect, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { useAuth } from '../../context/AuthContext.jsx'
 import { apiFetch } from '../../api/client.js'
-import { searchProviders } from '../../api/users.js'
+import { nearbyProviders, searchProviders } from '../../api/users.js'
 import RealTimeClock from '../../components/RealTimeClock.jsx'
 
 export default function CustomerDashboard(){
@@ -59,7 +59,7 @@ export default function CustomerDashboard(){
               <div className="flex items-start justify-between gap-2">
                 <div className="flex-1 min-w-0">
                   <div className="font-semibold text-lg">{p.shop_name || p.email}</div>
-                  {p.shop_address && <div className="text-xs mt-1 text-gray-600">📍 {p.shop_address}</div>}
+                  {p.shop_address && <div className="text-xs mt-1 text-gray-600">📍 {p.shop_address}{p.distance_km != null && ` · ${p.distance_km} km`}</div>}
                   {p.contact_number && <div className="text-xs text-gray-600">📞 {p.contact_number}</div>}
                   <div className="mt-2">
                     <span className="text-sm text-bubble-dark font-semibold">
@@ -159,6 +159,17 @@ function ProviderSearch({ onResults }){
       onResults(list)
     } catch(e){ setErr(e.message) } finally { setLoading(false) }
   }
+  function onNearby(){
+    if (!navigator.geolocation){ setErr('Location is not available in this browser'); return }
+    setErr(''); setLoading(true)
+    navigator.geolocation.getCurrentPosition(async pos => {
+      try {
+        const list = await nearbyProviders(pos.coords.latitude, pos.coords.longitude)
+        onResults(list)
+        if (!list.length) setErr('No shops within 5 km')
+      } catch(e){ setErr(e.message) } finally { setLoading(false) }
+    }, () => { setErr('Could not get your location'); setLoading(false) })
+  }
   return (
     <div className="mb-3">
       <form onSubmit={onSearch} className="flex gap-2">
@@ -171,6 +182,9 @@ function ProviderSearch({ onResults }){
         <button className="btn-primary text-sm whitespace-nowrap">
           {loading ? '🔍 Searching…' : '🔍 Search'}
         </button>
+        <button type="button" onClick={onNearby} className="btn-secondary text-sm whitespace-nowrap">
+          📍 Near me
+        </button>
       </form>
       {err && <div className="text-xs text-red-600 mt-2">{err}</div>}
     </div>
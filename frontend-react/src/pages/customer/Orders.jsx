@@ -1,7 +1,8 @@
-import React, { useEffect, useState } from 'react'
+import React, { useEffect, useRef, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { useAuth } from '../../context/AuthContext.jsx'
-import { listMyBookings } from '../../api/bookings.js'
+import { listMyBookingsPage, listMyBookingsThrough } from '../../api/bookings.js'
+import { subscribeEvents } from '../../api/events.js'
 import { checkBookingReview, getReview } from '../../api/reviews.js'
 import { formatDateTime } from '../../components/RealTimeClock.jsx'
 import ReviewForm from '../../components/ReviewForm.jsx'
@@ -10,6 +11,10 @@ export default function Orders(){
   const { token } = useAuth()
   const nav = useNavigate()
   const [orders, setOrders] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  // Bookings on screen; refreshes reload at least this many
+  const loadedCount = useRef(0)
   const [error, setError] = useState('')
   const [loading, setLoading] = useState(true)
   const [reviewedBookings, setReviewedBookings] = useState(new Set())
@@ -18,31 +23,57 @@ export default function Orders(){
   const [selectedBooking, setSelectedBooking] = useState(null)
   const [existingReview, setExistingReview] = useState(null)
 
+  function showOrders(page){
+    setOrders(page.items)
+    setNextCursor(page.next_cursor)
+    loadedCount.current = page.items.length
+  }
+
+  // Check which completed bookings have reviews
+  async function checkReviews(data){
+    const completedOrders = data.filter(o => o.status === 'completed')
+    const reviewChecks = await Promise.all(
+      completedOrders.map(o => checkBookingReview(token, o.id).catch(() => ({ has_review: false })))
+    )
+    const reviewed = []
+    const map = {}
+    completedOrders.forEach((o, idx) => {
+      if (reviewChecks[idx]?.has_review) {
+        reviewed.push(o.id)
+        if (reviewChecks[idx]?.review_id) map[o.id] = reviewChecks[idx].review_id
+      }
+    })
+    setReviewedBookings(prev => new Set([...prev, ...reviewed]))
+    setReviewIdByBooking(prev => ({ ...prev, ...map }))
+  }
+
   useEffect(()=>{
     (async ()=>{
       try {
-        const data = await listMyBookings(token)
-        setOrders(data)
-        
-        // Check which completed bookings have reviews
-        const completedOrders = data.filter(o => o.status === 'completed')
-        const reviewChecks = await Promise.all(
-          completedOrders.map(o => checkBookingReview(token, o.id).catch(() => ({ has_review: false })))
-        )
-        const reviewed = new Set()
-        const map = {}
-        completedOrders.forEach((o, idx) => {
-          if (reviewChecks[idx]?.has_review) {
-            reviewed.add(o.id)
-            if (reviewChecks[idx]?.review_id) map[o.id] = reviewChecks[idx].review_id
-          }
-        })
-        setReviewedBookings(reviewed)
-        setReviewIdByBooking(map)
+        const page = await listMyBookingsPage(token)
+        showOrders(page)
+        await checkReviews(page.items)
       } catch(e){ setError(e.message) } finally { setLoading(false) }
     })()
   }, [token])
 
+  async function onLoadMore(){
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const page = await listMyBookingsPage(token, { cursor: nextCursor })
+      setOrders(prev => [...prev, ...page.items])
+      setNextCursor(page.next_cursor)
+      loadedCount.current += page.items.length
+      await checkReviews(page.items)
+    } catch(e){ setError(e.message) } finally { setLoadingMore(false) }
+  }
+
+  // Status changes are pushed by the server
+  useEffect(() => subscribeEvents(token, e => {
+    if (e.type === 'booking' || e.type === 'resync') listMyBookingsThrough(token, loadedCount.current).then(showOrders).catch(() => {})
+  }), [token])
+
   const handleReviewClick = (booking) => {
     setSelectedBooking(booking)
     setExistingReview(null)
@@ -178,6 +209,14 @@ export default function Orders(){
         ))}
       </div>
 
+      {nextCursor && (
+        <div className="text-center">
+          <button onClick={onLoadMore} disabled={loadingMore} className="btn-white text-xs md:text-sm">
+            {loadingMore ? 'Loading...' : 'Load older orders'}
+          </button>
+        </div>
+      )}
+
       {showReviewForm && selectedBooking && (
         <ReviewForm
           booking={selectedBooking}
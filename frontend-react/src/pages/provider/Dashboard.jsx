@@ -1,9 +1,10 @@
-import React, { useEffect, useState } from 'react'
+import React, { useEffect, useRef, useState } from 'react'
 import { useSearchParams } from 'react-router-dom'
 import { useAuth } from '../../context/AuthContext.jsx'
 import { listMyCategories, createCategory, updateCategory, deleteCategory } from '../../api/categories.js'
-import { listMyBookings, acceptBooking, rejectBooking, updateBookingStatus, confirmPayment, updateBookingDetails } from '../../api/bookings.js'
+import { listMyBookingsPage, listMyBookingsThrough, acceptBooking, rejectBooking, updateBookingStatus, confirmPayment, updateBookingDetails } from '../../api/bookings.js'
 import { toggleAvailability } from '../../api/users.js'
+import { subscribeEvents } from '../../api/events.js'
 import RealTimeClock, { formatDateTime } from '../../components/RealTimeClock.jsx'
 
 export default function ProviderDashboard(){
@@ -20,23 +21,49 @@ export default function ProviderDashboard(){
 
   // Bookings
   const [bookings, setBookings] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  // Bookings on screen; refreshes reload at least this many
+  const loadedCount = useRef(0)
   const [editingBooking, setEditingBooking] = useState(null)
   const [editForm, setEditForm] = useState({ weight_kg: '', notes: '' })
 
+  function showBookings(page){
+    setBookings(page.items)
+    setNextCursor(page.next_cursor)
+    loadedCount.current = page.items.length
+  }
+
   async function refreshAll(){
     setError('')
     try {
-      const [cats, bks] = await Promise.all([
+      const [cats, page] = await Promise.all([
         listMyCategories(token),
-        listMyBookings(token),
+        listMyBookingsThrough(token, loadedCount.current),
       ])
       setCategories(cats)
-      setBookings(bks)
+      showBookings(page)
     } catch(e){ setError(e.message) }
   }
 
+  async function onLoadMore(){
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const page = await listMyBookingsPage(token, { cursor: nextCursor })
+      setBookings(prev => [...prev, ...page.items])
+      setNextCursor(page.next_cursor)
+      loadedCount.current += page.items.length
+    } catch(e){ setError(e.message) } finally { setLoadingMore(false) }
+  }
+
   useEffect(()=>{ refreshAll() }, [token])
 
+  // New and changed bookings are pushed by the server
+  useEffect(() => subscribeEvents(token, e => {
+    if (e.type === 'booking' || e.type === 'resync') listMyBookingsThrough(token, loadedCount.current).then(showBookings).catch(() => {})
+  }), [token])
+
   // Check if we should open bookings tab from URL parameter
   useEffect(() => {
     const tabParam = searchParams.get('tab')
@@ -400,6 +427,13 @@ export default function ProviderDashboard(){
               </div>
             </div>
           ))}
+          {nextCursor && (
+            <div className="text-center">
+              <button onClick={onLoadMore} disabled={loadingMore} className="btn-white text-xs md:text-sm">
+                {loadingMore ? 'Loading...' : 'Load older bookings'}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -40,6 +40,10 @@ export default defineConfig({
         target: 'http://127.0.0.1:8000',
         changeOrigin: true,
       },
+      '/events': {
+        target: 'http://127.0.0.1:8000',
+        changeOrigin: true,
+      },
       '/admin': {
         target: 'http://127.0.0.1:8000',
         changeOrigin: true,